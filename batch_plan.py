@@ -0,0 +1,157 @@
+import json
+import sys
+
+import rig_plans
+from build_plan import BuildPlan
+
+# Batch planning for crowds. Character specs are planned without Maya (pure Python), optionally in a process pool, and
+# the serialized plans are then applied one after another by a single Maya session with applyCharacterPlans().
+#
+# The plans only hold the networks that are wired onto an already built skeleton, not the skeleton itself, so they are
+# applied to a partially built scene. Each character needs:
+#     ribbons  "[prefix]deformation_joint_N" joints (bendy.py builds them with the ribbon)
+#     spines   the IK joints and the curveInfo node of the spine curve
+#     limbs    the result chain joints, IKSettingCtrl and the nodes of stretchPlugs (the limb's stretch network)
+#     feet     footCtrl and the attribute/pivot locators
+# applyCharacterPlans() checks for these first and applies nothing if any are missing.
+#
+# A character spec holds everything the planners need, already sampled from the skeleton:
+#     {"name": "crowd_017",
+#      "ribbons": [{"prefix": "l_arm_", "numCtrlJnts": 2, "bendyPerJnt": 1, "deformersPerManip": 2}],
+#      "spines":  [{"prefix": "ik_spine_", "curveInfo": "curveInfo1", "curveLength": 42.0,
+#                   "stretchJoints": ["spine_02", "spine_03"], "restLengths": [10.5, 10.5],
+#                   "globalScale": "global_ctrl.globalScale"}],
+#      "limbs":   [{"IKSettingCtrl": "l_leg_settings", "joints": ["l_knee", "l_ankle"], "restLengths": [40.0, 38.0],
+#                   "stretchPlugs": ["unitConversion12.output", "unitConversion15.output"], "packed": True}],
+#      "feet":    [{"footCtrl": "l_foot_ctrl", "leftright": "l_", "heelAttrLoc": "l_heel_attr_loc", ..., "packedScale": True}]}
+#
+# Planning is mostly name templating, so a character plans in well under a millisecond and starting the pool and pickling
+# the plans back costs more than it saves for most crowds. Characters are planned in-process unless processes is given.
+# NOTE: Only run the pool from mayapy or a plain Python interpreter. Inside an interactive Maya session child processes
+# would be started with the Maya executable.
+#
+# From the command line:
+#     python batch_plan.py character_specs.json plans.json
+
+FOOT_KEYS = ["footCtrl", "leftright", "heelAttrLoc", "ballAttrLoc", "toeAttrLoc", "insideAttrLoc", "outsideAttrLoc",
+             "toeWiggleLoc", "ballPivotLoc", "heelFootRollLoc", "ballFootRollLoc", "toeFootRollLoc"]
+
+
+def planCharacter(characterSpec):
+    ''' Plans every component of a single character.
+
+        characterSpec  : dict, character spec. See top of file.
+
+        On Exit:
+        Returns dictionary with the character "name" and "plans", a list of plan dictionaries (BuildPlan.toDict) in the
+        order they should be applied. Only plain data is returned so it can be passed between processes.'''
+
+    plans = []
+
+    for ribbon in characterSpec.get("ribbons", []):
+        numIsos = rig_plans.ribbonSpans(ribbon["numCtrlJnts"], ribbon["bendyPerJnt"], ribbon["deformersPerManip"])[1]
+        plan = rig_plans.planManipJnts(numIsos, ribbon["bendyPerJnt"], ribbon["deformersPerManip"], ribbon["prefix"])[0]
+        plans.append(plan.toDict())
+
+    for spine in characterSpec.get("spines", []):
+        plan = rig_plans.planChainStretch(spine["prefix"], spine["curveInfo"] + ".arcLength", spine["curveLength"],
+                                          spine["stretchJoints"], spine["restLengths"], spine.get("globalScale"))
+        plans.append(plan.toDict())
+
+    for limb in characterSpec.get("limbs", []):
+        plan = rig_plans.planStretchSwitch(limb["IKSettingCtrl"], limb["joints"], limb["restLengths"],
+                                           limb["stretchPlugs"], limb.get("addToggle", True), limb.get("packed", False))
+        plans.append(plan.toDict())
+
+    for foot in characterSpec.get("feet", []):
+        missing = [key for key in FOOT_KEYS if key not in foot]
+        if missing:
+            raise ValueError("Foot spec of character '%s' is missing: %s" % (characterSpec.get("name"), ", ".join(missing)))
+
+        plans.append(rig_plans.planFootAttrs(foot["footCtrl"], foot["heelAttrLoc"], foot["ballAttrLoc"], foot["toeAttrLoc"],
+                                             foot["toeWiggleLoc"], foot["ballPivotLoc"], foot.get("existingAttrs", []),
+                                             foot.get("packedScale", False)).toDict())
+        plans.append(rig_plans.planFootRoll(foot["footCtrl"], foot["leftright"], foot["heelFootRollLoc"],
+                                            foot["ballFootRollLoc"], foot["toeFootRollLoc"]).toDict())
+        plans.append(rig_plans.planSideSide(foot["footCtrl"], foot["leftright"], foot["outsideAttrLoc"], foot["insideAttrLoc"]).toDict())
+
+    return {"name": characterSpec.get("name", ""), "plans": plans}
+
+
+def planCharacters(characterSpecs, processes=1, chunksize=4):
+    ''' Plans many characters, optionally in parallel.
+
+        characterSpecs  : list, character spec dictionaries. See top of file.
+        processes       : int, number of worker processes. 1 plans in this process, None uses one per core.
+        chunksize       : int, number of characters handed to a worker at a time.
+
+        On Exit:
+        Returns list of planCharacter results, in the same order as characterSpecs.'''
+
+    if processes == 1 or len(characterSpecs) < 2:
+        return [planCharacter(spec) for spec in characterSpecs]
+
+    import multiprocessing
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(planCharacter, characterSpecs, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+    return results
+
+
+def applyCharacterPlans(characterPlans):
+    ''' Applies planned characters to the open Maya scene, one after another.
+
+        characterPlans  : list, planCharacter results, or a JSON string / file path of them.
+
+        On Exit:
+        Every plan of every character is executed. Returns list of (character name, number of operations applied).
+        Raises RuntimeError before applying anything if nodes the plans build on are missing from the scene. See top of file.'''
+
+    import build_plan
+    from lazy_modules import cmds
+
+    if not isinstance(characterPlans, list):
+        if characterPlans.lstrip().startswith("["):
+            characterPlans = json.loads(characterPlans)
+        else:
+            with open(characterPlans, "r") as planFile:
+                characterPlans = json.load(planFile)
+
+    plansByCharacter = [[BuildPlan.fromDict(planData) for planData in character["plans"]] for character in characterPlans]
+
+    # Nodes made by an earlier plan of the same character don't have to exist yet.
+    missing = []
+    for plans in plansByCharacter:
+        created = []
+        for plan in plans:
+            for node in plan.requiredNodes(created):
+                if not cmds.objExists(node) and node not in missing:
+                    missing.append(node)
+            created.extend(plan.createdNodes())
+    if missing:
+        raise RuntimeError("Character plans need a partially built scene. Missing: %s" % ", ".join(missing))
+
+    applied = []
+    for character, plans in zip(characterPlans, plansByCharacter):
+        numOps = 0
+        for plan in plans:
+            build_plan.executePlan(plan)
+            numOps += len(plan)
+        applied.append((character["name"], numOps))
+
+    return applied
+
+
+if __name__ == "__main__":
+    # python batch_plan.py character_specs.json plans.json [processes]
+    with open(sys.argv[1], "r") as specFile:
+        specs = json.load(specFile)
+    numProcesses = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    with open(sys.argv[2], "w") as planFile:
+        json.dump(planCharacters(specs, numProcesses), planFile)
@@ -1,7 +1,10 @@
-import maya.cmds as cmds
-import maya.mel as mel
-import maya.api.OpenMaya as api
+from lazy_modules import cmds, mel, api
 import math
+import build_trace
+import build_plan
+import rig_plans
+import plan_cache
+from create_group import createMatchedNodes
 
 
 def bendyGUI():
@@ -32,6 +35,8 @@ def bendyGUI():
     cmds.separator()
     cmds.checkBox("ribbonSine", l="Sine Blendshape", v=True)
     cmds.separator()
+    cmds.checkBox("directDeformers", l="Deform Ribbon Directly", v=False)
+    cmds.separator()
     cmds.checkBox("limbMode", label = "Limb Mode", v=True,
                     onc = "cmds.checkBox('isoCrease', e=True, v=True, en=False)", 
                     ofc = "cmds.checkBox('isoCrease', e=True, en=True)")
@@ -49,17 +54,18 @@ def bendyGUI():
         
         twistOn = cmds.checkBox("ribbonTwist", q=True, v=True)
         sineOn = cmds.checkBox("ribbonSine", q=True, v=True)
+        deformerMode = "direct" if cmds.checkBox("directDeformers", q=True, v=True) else "blendShape"
         limbMode = cmds.checkBox("limbMode", q=True, v=True)
         isoCrease = cmds.checkBox("isoCrease", q=True, v=True)
                  
-        bendyMain(prefix, sJnt, eJnt, bendyPerJnt, deformersPerManip, ctrlSize, twistOn, sineOn, limbMode, isoCrease)
+        bendyMain(prefix, sJnt, eJnt, bendyPerJnt, deformersPerManip, ctrlSize, twistOn, sineOn, limbMode, isoCrease, deformerMode)
         
     cmds.separator()
     cmds.button(label="Create", command=getData)
     cmds.showWindow(bendyWin)
 
 
-def bendyMain(prefix, sJnt, eJnt, bendyPerJnt, deformersPerManip, ctrlSize, twistOn, sineOn, limbMode, isoCrease):
+def bendyMain(prefix, sJnt, eJnt, bendyPerJnt, deformersPerManip, ctrlSize, twistOn, sineOn, limbMode, isoCrease, deformerMode="blendShape", planCache=None):
     ''' Creates ribbon at user defined joints with user defined settings.
     
         prefix             : string, identifier prefix for ribbon system being constructed.
@@ -74,6 +80,8 @@ def bendyMain(prefix, sJnt, eJnt, bendyPerJnt, deformersPerManip, ctrlSize, twis
         sineOn             : bool, toggle switch for creation of sine deformer blendshape
         limbMode           : bool, toggle switch for additional systems for better limb-ribbon deformation. Forces isoCrease True.
         isoCrease          : bool, True/False switch to toggle isoparm creasing. True by default.
+        deformerMode       : string, "blendShape" or "direct". How twist/sine are applied. See addDeformers.
+        planCache          : PlanCache, optional cache of computed ribbon data. See plan_cache.py. Uses the default cache if set.
             
         On Exit:
         Creates a ribbon system for bendy joints set up in the joint chain including sJnt and eJnt, created to user
@@ -92,65 +100,108 @@ def bendyMain(prefix, sJnt, eJnt, bendyPerJnt, deformersPerManip, ctrlSize, twis
     numCtrlJnts = 0                    # Number of control joints.
     currentJnt = eJnt                  # Holding variable for names of Skeleton joints for comparison.
 
-    # Get list of names of all Skeleton joints in desired chain, ordered root-end.
-    while currentJnt[0] != sJnt:
-        currentJnt = cmds.listRelatives(currentJnt, p=True, pa=True, typ="joint")
-        skelJntList.insert(0, currentJnt)
-        numCtrlJnts += 1
-    skelJntList.append(eJnt)    
-    
-    numSpans = (deformersPerManip + (bendyPerJnt * deformersPerManip)) * numCtrlJnts     # Number of spans on the ribbon.
-    numIsos = (numSpans + 1)                                                             # Number of isoparms on the ribbon.
+    # Every stage is timed by build_trace when a trace has been started. See build_trace.py.
+    with build_trace.stage("getSkeletonChain"):
+        # Get list of names of all Skeleton joints in desired chain, ordered root-end.
+        while currentJnt[0] != sJnt:
+            currentJnt = cmds.listRelatives(currentJnt, p=True, pa=True, typ="joint")
+            skelJntList.insert(0, currentJnt)
+            numCtrlJnts += 1
+        skelJntList.append(eJnt)    
+    
+    numSpans, numIsos = rig_plans.ribbonSpans(numCtrlJnts, bendyPerJnt, deformersPerManip)      # Number of spans and isoparms on the ribbon.
+    
+    # Axis, distance and orientation math, plus the manipulator plan, are skipped if this skeleton has been built before.
+    settings = {"prefix": prefix, "bendyPerJnt": bendyPerJnt, "deformersPerManip": deformersPerManip}
+    ribbonData = plan_cache.cachedBuildData(planCache, "ribbon", skelJntList, settings,
+                                            lambda: calcRibbonData(skelJntList, sJnt, eJnt, numIsos, bendyPerJnt, deformersPerManip, prefix))
+    priVec = ribbonData["priVec"]
+    skelDist = ribbonData["skelDist"]
+    orientation = ribbonData["orientation"]
     
-    # Get primary and secondary axis orientation of sJnt
-    priVec = priAxisTest(skelJntList)                                                    # List of primary axis index and magnitude. 
-    secVec = secAxisTest(sJnt, priVec)                                                   # List of secondary axis index and magnitude. 
-        
-        
-    # Get world positions of sJnt and eJnt
-    startPos = cmds.xform(sJnt, q=True, ws=True, t=True)
-    endPos = cmds.xform(eJnt, q=True, ws=True, t=True)
+    # Function Calls
+    with build_trace.stage("createRibbon"):
+        createRibbon(prefix, numSpans, numIsos, orientation, skelDist)
     
-    # Modify startPos & endPos values but maintain the same distance.
-    # New Dist. Dim. nodes are not created when specifying the same points as an existing one.
-    # Modify our values to avoid disrupting any existing distance nodes in the rig.
-    startPos[1] = startPos[1] + 1
-    endPos[1] = endPos[1] + 1
+    if isoCrease == True:
+        with build_trace.stage("creaseRibbon"):
+            numSpans = creaseRibbon(prefix, numCtrlJnts, numSpans)
     
-    # Calculate distance between startPos and endPos, and clean up after.
-    distShape = cmds.distanceDimension(sp = startPos, ep = endPos)
-    distLocList = cmds.listConnections(distShape, s=True, d=True)
+    with build_trace.stage("addDeformers"):
+        addDeformers(twistOn, sineOn, prefix, deformerMode)
     
-    skelDist = cmds.getAttr(distShape + ".distance")
-    cmds.delete(distLocList, distShape.replace("Shape", ""))
+    with build_trace.stage("createManipJnts"):
+        manipJntList, ctrlJntList, bendyJntList, limbFixList = createManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix, ribbonData["manipPlan"])
     
+    with build_trace.stage("createNurbsControls"):
+        createNurbsControls(priVec, manipJntList, ctrlSize)
     
-    # Function Calls
-    orientation = calcJointOrient(priVec, secVec)
+    with build_trace.stage("bindRibbon"):
+        bindRibbon(manipJntList, prefix)
     
-    createRibbon(prefix, numSpans, numIsos, orientation, skelDist)
+    with build_trace.stage("setupConstraints"):
+        orderedBendyJntList = setupConstraints(bendyPerJnt, manipJntList, skelJntList, ctrlJntList, bendyJntList)
     
-    if isoCrease == True:
-        creaseRibbon(prefix, numCtrlJnts, numSpans)
+    with build_trace.stage("matchRibbon"):
+        matchRibbon(manipJntList, skelJntList, bendyPerJnt, orderedBendyJntList)
     
-    addDeformers(twistOn, sineOn, prefix)
+    if limbMode == True:
+        with build_trace.stage("limbFix"):
+            limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, skelJntList, numSpans)
+ 
+    with build_trace.stage("fixConstraintWeights"):
+        fixConstraintWeights(orderedBendyJntList)
     
-    manipJntList, ctrlJntList, bendyJntList, limbFixList = createManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix)
+    with build_trace.stage("putInGroup"):
+        putInGroup(prefix)
     
-    createNurbsControls(priVec, manipJntList, ctrlSize)
     
-    bindRibbon(manipJntList, prefix)
+def calcRibbonData(skelJntList, sJnt, eJnt, numIsos, bendyPerJnt, deformersPerManip, prefix):
+    ''' Calculates everything about the ribbon that depends only on the Skeleton Joints and settings.
     
-    orderedBendyJntList = setupConstraints(bendyPerJnt, manipJntList, skelJntList, ctrlJntList, bendyJntList)
+        skelJntList        : list, root-end list of all Skeleton Joints in desired chain.
+        sJnt               : string, the name of the start Skeleton Joint
+        eJnt               : string, the name of the end Skeleton joint.
+        numIsos            : int, number of isoparms on the ribbon
+        bendyPerJnt        : int, number of Bendy joints desired per Skeleton joint
+        deformersPerManip  : int, the number of deformer joints between manipulator controls.
+        prefix             : string, the identifier prefix for the ribbon system
+        
+        On Exit:
+        Returns dictionary of primary/secondary axis ("priVec", "secVec"), distance between sJnt and eJnt ("skelDist"),
+        joint orientation of ribbon joints ("orientation") and the Manipulator Joint plan and lists ("manipPlan").
+        Only plain data is returned, so it can be stored by plan_cache.'''
     
-    matchRibbon(manipJntList, skelJntList, bendyPerJnt, orderedBendyJntList)
+    # Get primary and secondary axis orientation of sJnt
+    with build_trace.stage("axisTests"):
+        priVec = priAxisTest(skelJntList)                                                # List of primary axis index and magnitude. 
+        secVec = secAxisTest(sJnt, priVec)                                               # List of secondary axis index and magnitude. 
+        
+    with build_trace.stage("measureChain"):
+        # Get world positions of sJnt and eJnt
+        startPos = cmds.xform(sJnt, q=True, ws=True, t=True)
+        endPos = cmds.xform(eJnt, q=True, ws=True, t=True)
+        
+        # Modify startPos & endPos values but maintain the same distance.
+        # New Dist. Dim. nodes are not created when specifying the same points as an existing one.
+        # Modify our values to avoid disrupting any existing distance nodes in the rig.
+        startPos[1] = startPos[1] + 1
+        endPos[1] = endPos[1] + 1
+        
+        # Calculate distance between startPos and endPos, and clean up after.
+        distShape = cmds.distanceDimension(sp = startPos, ep = endPos)
+        distLocList = cmds.listConnections(distShape, s=True, d=True)
+        
+        skelDist = cmds.getAttr(distShape + ".distance")
+        cmds.delete(distLocList, distShape.replace("Shape", ""))
     
-    if limbMode == True:
-        limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, skelJntList)
- 
-    fixConstraintWeights(orderedBendyJntList)
+    with build_trace.stage("calcJointOrient"):
+        orientation = calcJointOrient(priVec, secVec)
+        
+    plan, manipJntList, ctrlJntList, bendyJntList, limbFixList = rig_plans.planManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix)
     
-    putInGroup(prefix)
+    return {"priVec": list(priVec), "secVec": list(secVec), "skelDist": skelDist, "orientation": list(orientation),
+            "manipPlan": [plan.toDict(), manipJntList, ctrlJntList, bendyJntList, limbFixList]}
     
     
 def createRibbon(prefix, numSpans, numIsos, orientation, skelDist):
@@ -204,23 +255,21 @@ def creaseRibbon(prefix, numCtrlJnts, numSpans):
         On Exit:
         Isoparms aligned to Skeleton Joints (except sJnt or eJnt) are 'creased' 
         with additional isoparms on either side. This is done to aid in weight painting
-        to allow ribbon to more accurately follow Skeleton Joints.'''
+        to allow ribbon to more accurately follow Skeleton Joints.
+        Returns the new number of spans on the ribbon.'''
         
-    # Calculate creasePercent - all target isoparms are located at multiples of creasePercent (eg. 0.25 -> 0.25, 0.5, 0.75)
-    spansPerJnt = numSpans / numCtrlJnts        
-    creasePercent = float(spansPerJnt) / numSpans 
+    # All target isoparms are located at multiples of creasePercent (eg. 0.25 -> 0.25, 0.5, 0.75). See rig_plans.py.
+    creaseParams = rig_plans.calcCreaseParams(numCtrlJnts, numSpans)
+    if not creaseParams:
+        return numSpans
+    
     # History deleted to avoid needless warning.
     cmds.delete(prefix + "ribbon", ch=True)
     
-    # Add creases to targeted isoparms. 
-    for i in range(1, numCtrlJnts):
-        targetIso = creasePercent * i
-        cmds.select(prefix + "ribbon" + ".u[" + str(targetIso - 0.01) + "]")
-        cmds.select(prefix + "ribbon" + ".u[" + str(targetIso + 0.01) + "]", add=True)
-        cmds.insertKnotSurface(rpo=True)
-        
-    # Delete history again.
-    cmds.delete(prefix + "ribbon", ch=True)
+    # Add every crease in one operation, without history. Every inserted knot adds one span.
+    cmds.insertKnotSurface(prefix + "ribbon", d=1, p=creaseParams, nk=1, ch=False, rpo=True)
+    
+    return numSpans + len(creaseParams)
     
     
 def priAxisTest(skelJntList):
@@ -399,13 +448,14 @@ def calcJointOrient(priVec, secVec):
     return orientation
     
 
-def createManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix):
+def createManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix, manipPlan=None):
     ''' Creates all Manipulator joints and their controls.
     
         numIsos            : int, number of isoparms on the ribbon
         bendyPerJnt        : int, number of Bendy joints desired per Skeleton joint
         deformersPerManip  : int, the number of deformer joints between manipulator controls.
         prefix             : string, the identifier prefix for the ribbon system
+        manipPlan          : list, optional pre-computed (or cached) plan and lists, as stored by calcRibbonData.
             
         On Exit:
         Manipulator Joints are created according to user settings, using Deformation Joints.
@@ -423,46 +473,13 @@ def createManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix):
         defJnt04
         defJnt05 -> ctrlJnt02'''
         
-    manipJntList = []        # All joints that can be used to manipulate the ribbon ("Manipulator Joints")
-    ctrlJntList = []         # Manipulator Joints that overlap with Skeleton Joints ("Control Joints")
-    bendyJntList = []        # Manipulator Joints that do not overlap with Skeleton Joints. ("Bendy Joints")
-    limbFixList = []         # Follicle joints aligned with Control Joints. Used for limb fix function.
-    ctrlBendyCounter = 0     # Counter to be used as an if condition: differentiates between Control and Bendy joints.
-    
-    # Loop iterates to values where Manipulator Joints should be created (using i and existing deformation joints.)
-    for i in range(1, numIsos+1, deformersPerManip): 
-    
-        # Create Manipulator Joint, add to Manip list.
-        manipJnt = prefix + "ribbon_manip_"+str(i)
-        cmds.duplicate(prefix + "deformation_joint_"+str(i), n=manipJnt)
-        cmds.parent(manipJnt, world=True)
-        cmds.makeIdentity(apply=True, r=True)  
-        manipJntList.append(manipJnt)
-         
-        # OffsetGrp creation       
-        cmds.group(em=True, n=manipJnt+"_offset")
-        cmds.matchTransform(manipJnt+"_offset", manipJnt)
-       
-        # Manip Joint is a Control Joint - aligns with Skeleton Joint
-        if ctrlBendyCounter == 0 or bendyPerJnt == 0:
-            cmds.parent(manipJnt, manipJnt+"_offset")
-            ctrlBendyCounter += 1
-            ctrlJntList.append(manipJnt)
-            limbFixList.append(prefix + "deformation_joint_"+str(i))
-        
-        # Manip Joint is a Bendy Joint             
-        else:
-            cmds.group(em=True, n=manipJnt+"_aim")
-            cmds.matchTransform(manipJnt+"_aim", manipJnt)
-            cmds.parent(manipJnt+"_aim", manipJnt+"_offset")
-            cmds.parent(manipJnt, manipJnt+"_aim")
-            bendyJntList.append(manipJnt)
-            
-            # Iterate or reset counter.
-            if ctrlBendyCounter == bendyPerJnt:
-                ctrlBendyCounter = 0
-            else:            
-                ctrlBendyCounter += 1
+    # Joint layout is planned in pure Python (rig_plans.py), then applied to the scene in one pass.
+    if manipPlan is None:
+        plan, manipJntList, ctrlJntList, bendyJntList, limbFixList = rig_plans.planManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix)
+    else:
+        planData, manipJntList, ctrlJntList, bendyJntList, limbFixList = manipPlan
+        plan = build_plan.BuildPlan.fromDict(planData)
+    build_plan.executePlan(plan)
                
     return manipJntList, ctrlJntList, bendyJntList, limbFixList
             
@@ -528,14 +545,14 @@ def setupConstraints(bendyPerJnt, manipJntList, skelJntList, ctrlJntList, bendyJ
     #for i in range(len(aimVec)):
         #aimVec[0] = float(aimVec[i])
             
-    # Create aimTarget groups on Control Joints EXCEPT the last.
+    # Create aimTarget groups on Control Joints EXCEPT the last. All are created in one pass, beneath their Control Joint.
+    aimJnts = ctrlJntList[:len(skelJntList)-1]
+    aimTargets = createMatchedNodes([(jnt, str(jnt)+"_aimTarget") for jnt in aimJnts], "transform", parents=aimJnts)
+    
     for i in range(len(skelJntList)-1):
         firstJnt = ctrlJntList[i]
         secondJnt = ctrlJntList[i+1]
-        
-        aimTarget = cmds.group(n=str(firstJnt)+"_aimTarget", em=True)
-        cmds.parent(aimTarget, firstJnt)
-        cmds.makeIdentity()
+        aimTarget = aimTargets[i]
 
         # Point Constrain each Bendy Joint to the Control Joints it's between.
         # Aim Constrain each Bendy Joint to the Control Joint "before" it.
@@ -756,53 +773,68 @@ def fixConstraintWeights(orderedBendyJntList):
             cmds.setAttr(str(orderedBendyJntList[m][k][0]) + "_pointConstraint1." + str(pntCnstAttrs[-1]), weight[1])
 
                  
-def addDeformers(twistOn, sineOn, prefix):
+def addDeformers(twistOn, sineOn, prefix, deformerMode="blendShape"):
     ''' Creates blendShapes of the ribbon with twist and/or sine deformers for use.
         
-        twistOn   : bool, switch to enable whether twist deformer blendShape created
-        sineOn    : bool, switch to enable whether sine deformer blendShape created
-        prefix    : string, identifier prefix for ribbon system being constructed.
+        twistOn       : bool, switch to enable whether twist deformer blendShape created
+        sineOn        : bool, switch to enable whether sine deformer blendShape created
+        prefix        : string, identifier prefix for ribbon system being constructed.
+        deformerMode  : string, "blendShape" (default) or "direct".
         
         On Exit:
-        Creates duplicates of ribbon's nurbsPlane, applying twist/sine deformers to them
+        "blendShape": Creates duplicates of ribbon's nurbsPlane, applying twist/sine deformers to them
         and orienting handles accordingly. BlendShape is established between ribbon and
         deformer ribbons. Deformer ribbons remain at origin.
+        "direct": Twist/sine deformers are applied to the ribbon itself, ahead of its skinCluster. No duplicate
+        surfaces or blendShape are evaluated, so it is cheaper per frame. Deformers are toggled with their envelope
+        instead of blendShape weights, and twist and sine stack rather than add when both are used.
+        Either way the deformers start switched off: blendShape weights at 0, or envelopes at 0.
         '''
         
     # Initialize variables; empty list and concatenated string for clarity.
     ribbon = prefix + "ribbon" 
     deformList = []
     
+    # Direct mode deforms the ribbon itself.
+    if deformerMode == "direct":
+        twistRib = [ribbon]
+        sineRib = [ribbon]
+
     # Same processes for twist and sine. Duplicates the ribbon, renames and adds to list of deformers.
-    if twistOn == True:
-        twistRib = cmds.duplicate(ribbon, n=ribbon + "_twist")
-        deformList.append(twistRib)
-        
-    if sineOn == True:
-        sineRib = cmds.duplicate(ribbon, n=ribbon + "_curve")
-        deformList.append(sineRib)
-        
-    # Select all deformers that were created and the ribbon, create blendShape.
-    cmds.select(cl=True)
-    if deformList:
-        for i in range(len(deformList)):
-            cmds.select(deformList[i], add=True)
-            
-        cmds.select(ribbon, add=True)
-        cmds.blendShape()
-    cmds.select(cl=True)
+    else:
+        if twistOn == True:
+            twistRib = cmds.duplicate(ribbon, n=ribbon + "_twist")
+            deformList.append(twistRib)
+
+        if sineOn == True:
+            sineRib = cmds.duplicate(ribbon, n=ribbon + "_curve")
+            deformList.append(sineRib)
+
+        # Select all deformers that were created and the ribbon, create blendShape.
+        cmds.select(cl=True)
+        if deformList:
+            for i in range(len(deformList)):
+                cmds.select(deformList[i], add=True)
+
+            cmds.select(ribbon, add=True)
+            cmds.blendShape()
+        cmds.select(cl=True)
 
     # Apply twist/sine deformers, orient handles to ribbons, and add handles to deformList.
     if twistOn == True:
         cmds.select(twistRib)
-        twistDef = cmds.nonLinear(typ="twist", n=twistRib[0])
+        twistDef = cmds.nonLinear(typ="twist", n=ribbon + "_twist")
         deformList.append(twistDef[1])
+        if deformerMode == "direct":
+            cmds.setAttr("%s.envelope" % twistDef[0], 0)
         cmds.rotate(0,0,"-90deg", r=True) 
         
     if sineOn == True:
         cmds.select(sineRib)
-        sineDef = cmds.nonLinear(type="sine", n=sineRib[0])
+        sineDef = cmds.nonLinear(type="sine", n=ribbon + "_curve")
         deformList.append(sineDef[1])
+        if deformerMode == "direct":
+            cmds.setAttr("%s.envelope" % sineDef[0], 0)
         cmds.rotate(0,0,"-90deg", r=True)
 
     # If any deformers were created, put all nodes into single group and hide.
@@ -813,7 +845,7 @@ def addDeformers(twistOn, sineOn, prefix):
         cmds.hide(deformGrp)
 
 
-def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, skelJntList):
+def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, skelJntList, numSpans=None, validate=False):
     ''' Creates additional systems to enable ribbon system to deform like limbs.
         
         limbFixList          : list, list of all follicles that align with Control Joints.
@@ -822,6 +854,8 @@ def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, sk
         bendyPerJnt          : int, number of Bendy Joints created per (non-terminating) Skeleton Joints.
         deformersPerManip    : int, number of Deformation Joints between all Manipulator Joints.
         skelJntList          : list, root-end list of all Skeleton Joints in desired chain.
+        numSpans             : int, number of spans on the (creased) ribbon. Queried from the ribbon if not given.
+        validate             : bool, check the written weights afterwards. Differences are printed as warnings.
         
         On Exit:
         Ribbon is supplemented with additional joint chains running "up" the ribbon, from Control Joint
@@ -836,14 +870,18 @@ def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, sk
     
     # Get name of ribbon's SkinCluster.
     skinClust = cmds.listConnections(prefix + "ribbonShape", t="skinCluster")
-    
-    # Shorten long concatenated string into variable.
-    ribString = prefix + "ribbon.cv["
-    
-    # Establish variables. NumCreases is number of times isoCrease was performed.
-    # CreaseCVFactor is how many CV's "across" from start of ribbon to the middle of first crease. Multipliable to find next creases.
-    numCreases = len(skelJntList) - 2
-    creaseCVFactor = 2 + (deformersPerManip + (bendyPerJnt * deformersPerManip))  
+    ribbon = prefix + "ribbon"
+    
+    # CV rows and weights of every fix joint are calculated up front (see rig_plans.py) and checked against the ribbon.
+    # The CV row 1 before each crease's middle (and the end of the ribbon) is weighted fully to the fix joint, the row 2 before by half.
+    fixWeights = rig_plans.calcLimbFixWeights(len(limbFixList) - 1, bendyPerJnt, deformersPerManip)
+    if numSpans is None:
+        numSpans = cmds.getAttr(ribbon + "Shape.spansU")
+    problems = rig_plans.validateLimbFixWeights(fixWeights, numSpans + 3)
+    if problems:
+        cmds.error("Limb fix weights do not fit ribbon " + ribbon + ": " + " ".join(problems))
+    
+    fixJnts = []
       
     # Main loop, performs once per non-terminating Skeleton Joint (ctrlJntList is equivelant.)    
     for i in range(len(limbFixList) - 1):
@@ -853,6 +891,7 @@ def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, sk
         # Fix Joints created that aim 'up' the ribbon. 
         endJnt = cmds.duplicate(limbFixList[i], n= prefix + "fix_end_" + str(i+1), po=True)
         startJnt = cmds.duplicate(limbFixList[i+1], n= prefix + "fix_start_" + str(i+1), po=True)
+        fixJnts.append(startJnt[0])
        
         cmds.parent(endJnt, startJnt)
         cmds.parent(startJnt, w=True)
@@ -862,40 +901,12 @@ def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, sk
         cmds.skinCluster(skinClust[0], e=True, ai = startJnt[0], lw=True, wt=0.0)
         cmds.setAttr(str(startJnt[0]) + ".liw", 0)
         
-        # Per iteration, calculate target area via CV's U value. Middle of isoparm creases is target area.
-        creaseCVIndex = creaseCVFactor + (creaseCVFactor * i)
+        # Weight CV rows to startJnt, one skinPercent per weight value.
+        writeRowWeights(skinClust[0], ribbon, startJnt[0], fixWeights[i]["rows"], fixWeights[i]["weights"])
         
-        # Select CV's 1 BEFORE iso crease. Used for isoparm creases.
-        if i != numCreases:
-            for j in range(0,4):
-                cmds.select(ribString + str(creaseCVIndex-1) + "][" + str(j) + "]", add=True)
-                
-        # Select CV's at the end of the ribbon and 1 before end. Used for end of ribbon, not isoparm crease.
-        else:
-            for j in range(0,4):
-                cmds.select(ribString + str(creaseCVIndex-1) + "][" + str(j) + "]", add=True)
-                cmds.select(ribString + str(creaseCVIndex) + "][" + str(j) + "]", add=True)
-            
-        # Weight selected CV's to 1 for startJnt.
-        cmds.skinPercent(skinClust[0], transformValue=[(startJnt[0], 1.0)])
-        cmds.select(cl=True)
-            
-        # Select CV's 2 crease OR end of rbbon, and weight startJnt to 0.5
-        for k in range(0,4):
-            cmds.select(ribString + str(creaseCVIndex-2) + "][" + str(k) + "]", add=True)
-        cmds.skinPercent(skinClust[0], transformValue=[(startJnt[0], 0.5)])
-        cmds.select(cl=True)
-        
-        # If still working on iso creases and not end of ribbon.
-        if i != numCreases:
-            # Scale up number of iterations for more dense ribbons.
-            for j in range(deformersPerManip):
-                # Select CV's 2 + j before iso crease.
-                for m in range(0,4):
-                    cmds.select(ribString + str(creaseCVIndex - (2 + j)) + "][" + str(m) + "]", add=True)
-                    
-            # Transfer influence old Control Joint (at StartJnt pos) has in unwanted area to fix joint.
-            cmds.skinPercent(skinClust[0], transformMoveWeights=(str(ctrlJntList[i+1]), str(startJnt[0])))
+        # If still working on iso creases and not end of ribbon, transfer influence old Control Joint (at StartJnt pos) has in unwanted area to fix joint.
+        if len(fixWeights[i]["moveRows"]):
+            cmds.skinPercent(skinClust[0], cvRows(ribbon, fixWeights[i]["moveRows"]), transformMoveWeights=(str(ctrlJntList[i+1]), str(startJnt[0])))
             
         # Turn envelope back on and ikHandle parented to control above endJnt
         cmds.setAttr(str(skinClust[0]) + ".envelope", 1)
@@ -911,6 +922,46 @@ def limbFix(limbFixList, ctrlJntList, prefix, bendyPerJnt, deformersPerManip, sk
         cmds.parent(startJnt, newParent[0])
         cmds.matchTransform(startJnt, ctrlJntList[i+1])
         cmds.matchTransform(endJnt, ctrlJntList[i])
+    
+    if validate:
+        for problem in checkRowWeights(skinClust[0], ribbon, fixJnts, fixWeights):
+            cmds.warning(problem)
+    
+    
+def cvRows(ribbon, rows):
+    ''' On Exit: Returns list of components covering whole CV rows (every V) of ribbon, for each U index in rows.'''
+    
+    return ["%s.cv[%i][*]" % (ribbon, row) for row in rows]
+    
+    
+def writeRowWeights(skinClust, ribbon, influence, rows, weights):
+    ''' Sets the weight of influence on each CV row of ribbon, without selecting. Rows sharing a weight are set together.'''
+    
+    for weight in sorted(set([float(weight) for weight in weights]), reverse=True):
+        weightRows = [rows[j] for j in range(len(rows)) if float(weights[j]) == weight]
+        cmds.skinPercent(skinClust, cvRows(ribbon, weightRows), transformValue=[(influence, weight)])
+    
+    
+def checkRowWeights(skinClust, ribbon, influences, fixWeights, tolerance=0.001):
+    ''' Validation pass for limbFix. Compares the weight of each fix joint on its CV rows with rig_plans.calcLimbFixWeights.
+    
+        On Exit: Returns list of differences found. Rows that also had Control Joint weight moved onto them are only
+        checked to hold at least their target weight.'''
+    
+    problems = []
+    for i in range(len(influences)):
+        rows = fixWeights[i]["rows"]
+        moveRows = [int(row) for row in fixWeights[i]["moveRows"]]
+        for j in range(len(rows)):
+            target = float(fixWeights[i]["weights"][j])
+            for component in cmds.ls(cvRows(ribbon, [rows[j]]), flatten=True):
+                weight = cmds.skinPercent(skinClust, component, transform=influences[i], q=True)
+                if int(rows[j]) in moveRows:
+                    if weight < target - tolerance:
+                        problems.append("%s: %s weight %f, expected at least %f." % (component, influences[i], weight, target))
+                elif abs(weight - target) > tolerance:
+                    problems.append("%s: %s weight %f, expected %f." % (component, influences[i], weight, target))
+    return problems
         
 def putInGroup(prefix):
     ''' Groups all created nodes under single group.
@@ -943,4 +994,5 @@ def putInGroup(prefix):
     cmds.setAttr(prefix + "follicle_grp.inheritsTransform", 0)
     
   
-bendyGUI()
\ No newline at end of file
+if __name__ == "__main__":
+    bendyGUI()
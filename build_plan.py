@@ -0,0 +1,252 @@
+import json
+
+from lazy_modules import cmds
+import build_trace
+
+# Two-phase building. Planners (see rig_plans.py) are pure Python and only record the operations a build needs
+# into a BuildPlan. executePlan() then applies a plan to the scene. Plans can be inspected, sized with summary(),
+# saved as JSON and cached, without Maya being available.
+
+# Order operations are applied in. Anything an operation refers to is created in an earlier phase, so a plan is
+# always applied in dependency order. Within a phase, operations keep the order they were planned in.
+OP_PHASES = {"delete": 0,
+             "createNode": 1, "duplicate": 1,
+             "deleteAttr": 2, "addAttr": 2,
+             "parent": 3, "matchTransform": 3, "makeIdentity": 3, "xform": 3,
+             "setAttr": 4,
+             "connectAttr": 5}
+
+
+class BuildPlan(object):
+    ''' Ordered list of scene operations making up a build, recorded without touching the scene.
+
+        name  : string, label for the plan. Used as the undo chunk and trace stage name.'''
+
+    def __init__(self, name="plan", ops=None):
+        self.name = name
+        self.ops = ops or []
+
+    def __len__(self):
+        return len(self.ops)
+
+    def extend(self, otherPlan):
+        ''' Appends every operation of otherPlan to this plan.'''
+        self.ops.extend(otherPlan.ops)
+
+    def createNode(self, nodeType, name, parent=None):
+        self.ops.append({"op": "createNode", "type": nodeType, "node": name, "parent": parent})
+        return name
+
+    def duplicate(self, source, name, parentOnly=False):
+        self.ops.append({"op": "duplicate", "source": source, "node": name, "parentOnly": parentOnly})
+        return name
+
+    def delete(self, node, ifExists=False):
+        self.ops.append({"op": "delete", "node": node, "ifExists": ifExists})
+
+    def parent(self, child, parent=None):
+        ''' Parents child under parent, or to the world if parent is None.'''
+        self.ops.append({"op": "parent", "child": child, "parent": parent})
+
+    def matchTransform(self, node, target, **flags):
+        self.ops.append({"op": "matchTransform", "node": node, "target": target, "flags": flags})
+
+    def makeIdentity(self, node, **flags):
+        self.ops.append({"op": "makeIdentity", "node": node, "flags": flags})
+
+    def xform(self, node, **flags):
+        self.ops.append({"op": "xform", "node": node, "flags": flags})
+
+    def addAttr(self, node, longName, **flags):
+        self.ops.append({"op": "addAttr", "node": node, "longName": longName, "flags": flags})
+
+    def deleteAttr(self, plug):
+        self.ops.append({"op": "deleteAttr", "plug": plug})
+
+    def setAttr(self, plug, value, attrType=None):
+        ''' value may be a single value or a list, for compound attributes.'''
+        self.ops.append({"op": "setAttr", "plug": plug, "value": value, "attrType": attrType})
+
+    def connectAttr(self, sourcePlug, destPlug, force=False):
+        self.ops.append({"op": "connectAttr", "sourcePlug": sourcePlug, "destPlug": destPlug, "force": force})
+
+    def createdNodes(self):
+        ''' On Exit: Returns list of names of all nodes the plan creates, in the order they're planned.'''
+        return [op["node"] for op in self.ops if op["op"] in ("createNode", "duplicate")]
+
+    def requiredNodes(self, availableNodes=()):
+        ''' Nodes the plan refers to but doesn't create, so they have to be in the scene before it's applied.
+
+            availableNodes  : list, nodes that will exist anyway. (e.g created by a plan applied before this one)
+
+            On Exit: Returns sorted list of node names.'''
+
+        created = set(self.createdNodes()) | set(availableNodes)
+        referenced = set()
+        for op in self.ops:
+            kind = op["op"]
+            if kind == "duplicate":
+                referenced.add(op["source"])
+            elif kind == "delete" and not op["ifExists"]:
+                referenced.add(op["node"])
+            elif kind == "parent":
+                referenced.update([op["child"], op["parent"]])
+            elif kind == "createNode":
+                referenced.add(op["parent"])
+            elif kind == "matchTransform":
+                referenced.update([op["node"], op["target"]])
+            elif kind in ("makeIdentity", "xform", "addAttr"):
+                referenced.add(op["node"])
+            elif kind in ("deleteAttr", "setAttr"):
+                referenced.add(op["plug"].partition(".")[0])
+            elif kind == "connectAttr":
+                referenced.update([op["sourcePlug"].partition(".")[0], op["destPlug"].partition(".")[0]])
+
+        return sorted(node for node in referenced if node is not None and node not in created)
+
+    def summary(self):
+        ''' Dry-run sizing of the plan.
+
+            On Exit:
+            Returns dictionary with the number of operations of each kind ("ops"), the number of nodes created
+            of each type ("nodes", duplicates counted as "duplicate") and the total operation count ("total").'''
+
+        opCounts = {}
+        nodeCounts = {}
+        for op in self.ops:
+            opCounts[op["op"]] = opCounts.get(op["op"], 0) + 1
+            if op["op"] == "createNode":
+                nodeCounts[op["type"]] = nodeCounts.get(op["type"], 0) + 1
+            elif op["op"] == "duplicate":
+                nodeCounts["duplicate"] = nodeCounts.get("duplicate", 0) + 1
+
+        return {"ops": opCounts, "nodes": nodeCounts, "total": len(self.ops)}
+
+    def orderedOps(self):
+        ''' On Exit: Returns the operations in the order they will be applied. (Stable sort by phase)'''
+        return sorted(self.ops, key=lambda op: OP_PHASES[op["op"]])
+
+    def toDict(self):
+        return {"name": self.name, "ops": self.ops}
+
+    def toJson(self):
+        return json.dumps(self.toDict(), sort_keys=True)
+
+    @classmethod
+    def fromDict(cls, data):
+        for op in data["ops"]:
+            if op["op"] not in OP_PHASES:
+                raise ValueError("Unknown build plan operation '%s'." % op["op"])
+        return cls(data.get("name", "plan"), list(data["ops"]))
+
+    @classmethod
+    def fromJson(cls, text):
+        return cls.fromDict(json.loads(text))
+
+
+def resolveNode(name, nameMap):
+    ''' On Exit: Returns the real scene name of a planned node name.'''
+
+    if name is None:
+        return None
+    return nameMap.get(name, name)
+
+
+def resolvePlug(plug, nameMap):
+    ''' On Exit: Returns "node.attribute" with the node part swapped for its real scene name.'''
+
+    node, dot, attr = plug.partition(".")
+    return nameMap.get(node, node) + dot + attr
+
+
+def executePlan(plan, undoChunk=True):
+    ''' Applies a build plan to the scene.
+
+        plan       : BuildPlan, the plan to apply.
+        undoChunk  : bool, wrap the whole plan in a single undo chunk.
+
+        On Exit:
+        All operations are applied in dependency order. Consecutive parent operations to the same parent, and
+        consecutive deletes, are issued as single commands. If Maya has to rename a created node (name clash),
+        later operations use the new name. Returns dictionary of planned node name -> real node name.'''
+
+    nameMap = {}
+    ops = plan.orderedOps()
+
+    if undoChunk:
+        cmds.undoInfo(openChunk=True, chunkName=plan.name)
+    try:
+        with build_trace.stage("executePlan:" + plan.name):
+            i = 0
+            while i < len(ops):
+                op = ops[i]
+                kind = op["op"]
+
+                if kind == "delete":
+                    # Batch a run of deletes into one command.
+                    nodes = []
+                    while i < len(ops) and ops[i]["op"] == "delete":
+                        node = resolveNode(ops[i]["node"], nameMap)
+                        if not ops[i]["ifExists"] or cmds.objExists(node):
+                            nodes.append(node)
+                        i += 1
+                    if nodes:
+                        cmds.delete(nodes)
+                    continue
+
+                if kind == "parent":
+                    # Batch a run of children being parented to the same parent into one command.
+                    children = []
+                    while i < len(ops) and ops[i]["op"] == "parent" and ops[i]["parent"] == op["parent"]:
+                        children.append(resolveNode(ops[i]["child"], nameMap))
+                        i += 1
+                    if op["parent"] is None:
+                        cmds.parent(children, world=True)
+                    else:
+                        cmds.parent(children, resolveNode(op["parent"], nameMap))
+                    continue
+
+                if kind == "createNode":
+                    if op["parent"] is None:
+                        newNode = cmds.createNode(op["type"], name=op["node"], skipSelect=True)
+                    else:
+                        newNode = cmds.createNode(op["type"], name=op["node"], parent=resolveNode(op["parent"], nameMap), skipSelect=True)
+                    nameMap[op["node"]] = newNode
+
+                elif kind == "duplicate":
+                    newNode = cmds.duplicate(resolveNode(op["source"], nameMap), name=op["node"], parentOnly=op["parentOnly"])[0]
+                    nameMap[op["node"]] = newNode
+
+                elif kind == "matchTransform":
+                    cmds.matchTransform(resolveNode(op["node"], nameMap), resolveNode(op["target"], nameMap), **op["flags"])
+
+                elif kind == "makeIdentity":
+                    cmds.makeIdentity(resolveNode(op["node"], nameMap), **op["flags"])
+
+                elif kind == "xform":
+                    cmds.xform(resolveNode(op["node"], nameMap), **op["flags"])
+
+                elif kind == "addAttr":
+                    cmds.addAttr(resolveNode(op["node"], nameMap), longName=op["longName"], **op["flags"])
+
+                elif kind == "deleteAttr":
+                    cmds.deleteAttr(resolvePlug(op["plug"], nameMap))
+
+                elif kind == "setAttr":
+                    value = op["value"]
+                    if not isinstance(value, (list, tuple)):
+                        value = [value]
+                    if op["attrType"]:
+                        cmds.setAttr(resolvePlug(op["plug"], nameMap), *value, type=op["attrType"])
+                    else:
+                        cmds.setAttr(resolvePlug(op["plug"], nameMap), *value)
+
+                elif kind == "connectAttr":
+                    cmds.connectAttr(resolvePlug(op["sourcePlug"], nameMap), resolvePlug(op["destPlug"], nameMap), force=op["force"])
+
+                i += 1
+    finally:
+        if undoChunk:
+            cmds.undoInfo(closeChunk=True)
+
+    return nameMap
@@ -0,0 +1,195 @@
+import json
+import time
+from contextlib import contextmanager
+
+# Opt-in build instrumentation. Nothing here is active until startTrace() is called, so builders can
+# wrap their stages in build_trace.stage() at no real cost during normal use.
+#
+# Example, from the Maya script editor:
+#     import build_trace, build_plan, bendy
+#     build_trace.startTrace([bendy, build_plan], name="l_arm_ribbon")    # build_plan counts the commands of applied plans.
+#     bendy.bendyMain("l_arm_", "l_shoulder", "l_wrist", 2, 2, 1.0, True, True, True, True)
+#     build_trace.stopTrace("C:/temp/l_arm_ribbon.json")      # Open in chrome://tracing or Perfetto.
+
+activeTrace = None           # BuildTrace currently recording, if any.
+
+
+class BuildTrace(object):
+    ''' Holds the stage timings and command histogram of a single traced build.
+
+        name  : string, label for the build. Used as the process name in the trace file.'''
+
+    def __init__(self, name="build"):
+        self.name = name
+        self.events = []                 # Finished stages, in the order they were closed.
+        self.commandCounts = {}          # Command name -> number of calls during the whole trace.
+        self.stageStack = []             # Stages currently open. Allows stages to be nested.
+        self.patched = []                # (module, attribute, original) tuples to restore on stop.
+        self.startTime = time.time()
+
+    def countCommand(self, commandName):
+        ''' Adds a single call of commandName to the histogram, and to every open stage.'''
+
+        self.commandCounts[commandName] = self.commandCounts.get(commandName, 0) + 1
+        for openStage in self.stageStack:
+            openStage["commands"] += 1
+
+    def openStage(self, name):
+        self.stageStack.append({"name": name, "start": time.time(), "commands": 0})
+
+    def closeStage(self):
+        openStage = self.stageStack.pop()
+        openStage["duration"] = time.time() - openStage["start"]
+        openStage["depth"] = len(self.stageStack)
+        self.events.append(openStage)
+
+    def stageTotals(self):
+        ''' On Exit: Returns list of (stage name, seconds, command count), summed over every time a stage ran,
+            slowest first.'''
+
+        totals = {}
+        for event in self.events:
+            seconds, commands = totals.get(event["name"], (0.0, 0))
+            totals[event["name"]] = (seconds + event["duration"], commands + event["commands"])
+
+        return sorted([(name, totals[name][0], totals[name][1]) for name in totals], key=lambda item: -item[1])
+
+    def toChromeTrace(self):
+        ''' On Exit: Returns the trace as a dictionary in Chrome trace event format. Stages are complete ("X") events
+            in microseconds, the command histogram is stored under otherData.'''
+
+        traceEvents = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": self.name}}]
+        for event in self.events:
+            traceEvents.append({"name": event["name"],
+                                "cat": "stage",
+                                "ph": "X",
+                                "ts": (event["start"] - self.startTime) * 1000000.0,
+                                "dur": event["duration"] * 1000000.0,
+                                "pid": 1,
+                                "tid": 1,
+                                "args": {"commands": event["commands"]}})
+
+        return {"traceEvents": traceEvents,
+                "displayTimeUnit": "ms",
+                "otherData": {"build": self.name, "commandHistogram": self.commandCounts}}
+
+    def report(self):
+        ''' On Exit: Returns a readable summary of stage timings and the most called commands.'''
+
+        lines = ["Build trace: %s" % self.name]
+        for name, seconds, commands in self.stageTotals():
+            lines.append("    %-28s %9.2f ms  %6i commands" % (name, seconds * 1000.0, commands))
+
+        lines.append("Command histogram:")
+        for name in sorted(self.commandCounts, key=lambda key: -self.commandCounts[key]):
+            lines.append("    %-28s %6i" % (name, self.commandCounts[name]))
+
+        return "\n".join(lines)
+
+
+class CommandCounter(object):
+    ''' Stand-in for maya.cmds / maya.mel on an instrumented module. Every callable looked up through it is
+        wrapped so the call is added to the trace's command histogram before being passed on.
+
+        module  : module, the real maya.cmds or maya.mel module.
+        label   : string, prefix used in the histogram. ("cmds" or "mel")
+        trace   : BuildTrace, trace receiving the counts.'''
+
+    def __init__(self, module, label, trace):
+        self.module = module
+        self.label = label
+        self.trace = trace
+
+    def __getattr__(self, attrName):
+        attr = getattr(self.module, attrName)
+        if not callable(attr):
+            return attr
+
+        label = self.label
+        trace = self.trace
+
+        def countedCall(*args, **kwargs):
+            # mel.eval calls are counted by the MEL procedure they run, e.g "mel.createHair".
+            if label == "mel" and attrName == "eval" and args:
+                commandName = "mel." + str(args[0]).strip().split(" ")[0].rstrip(";")
+            else:
+                commandName = label + "." + attrName
+            trace.countCommand(commandName)
+            return attr(*args, **kwargs)
+
+        return countedCall
+
+
+def startTrace(modules=(), name="build"):
+    ''' Starts recording stage timings, and counting cmds/mel calls made from the given modules.
+
+        modules  : list, modules whose 'cmds' and 'mel' attributes should be counted. (e.g [bendy, build_plan])
+        name     : string, label for the build.
+
+        On Exit:
+        A new BuildTrace is active and returned. Any trace already running is stopped and discarded.'''
+
+    global activeTrace
+    if activeTrace is not None:
+        stopTrace()
+
+    trace = BuildTrace(name)
+    for module in modules:
+        for attrName in ("cmds", "mel"):
+            original = getattr(module, attrName, None)
+            if original is None or isinstance(original, CommandCounter):
+                continue
+            setattr(module, attrName, CommandCounter(original, attrName, trace))
+            trace.patched.append((module, attrName, original))
+
+    activeTrace = trace
+    return trace
+
+
+def stopTrace(path=None):
+    ''' Stops the active trace and restores all instrumented modules.
+
+        path  : string, optional file path to write the Chrome trace JSON to.
+
+        On Exit:
+        Returns the finished BuildTrace, or None if no trace was running.'''
+
+    global activeTrace
+    trace = activeTrace
+    if trace is None:
+        return None
+
+    activeTrace = None
+    for module, attrName, original in trace.patched:
+        setattr(module, attrName, original)
+    trace.patched = []
+
+    # Close anything left open by an exception mid-build so its time is still recorded.
+    while trace.stageStack:
+        trace.closeStage()
+
+    if path:
+        with open(path, "w") as traceFile:
+            json.dump(trace.toChromeTrace(), traceFile, indent=1)
+
+    return trace
+
+
+@contextmanager
+def stage(name):
+    ''' Times the enclosed block as a named stage of the active trace. Does nothing when no trace is running.
+
+        name  : string, name of the stage (normally the builder function being called).'''
+
+    trace = activeTrace
+    if trace is None:
+        yield
+        return
+
+    trace.openStage(name)
+    try:
+        yield
+    finally:
+        # Trace may have been stopped inside the block.
+        if trace.stageStack:
+            trace.closeStage()
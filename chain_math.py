@@ -0,0 +1,82 @@
+from lazy_modules import optionalModule
+
+# Pure joint chain maths. Nothing here touches Maya; positions are [x, y, z] lists in world space.
+# NumPy is used when it's installed, with plain Python fallbacks giving the same results.
+
+
+def splitFractions(numSegments, start=0.0, end=1.0):
+    ''' On Exit: Returns list of numSegments + 1 evenly spaced fractions from start to end, both included.'''
+
+    if numSegments < 1:
+        raise ValueError("A chain needs at least 1 segment, got %i." % numSegments)
+
+    step = (end - start) / float(numSegments)
+    return [start + (step * i) for i in range(numSegments)] + [end]
+
+
+def lerpPositions(startPos, endPos, fractions):
+    ''' Positions along the straight line between two points.
+
+        startPos   : list, [x, y, z] at fraction 0.
+        endPos     : list, [x, y, z] at fraction 1.
+        fractions  : list, fractions along the line to return positions for.
+
+        On Exit: Returns list of [x, y, z] positions, one per fraction.'''
+
+    numpy = optionalModule("numpy")
+    if numpy is not None:
+        startPos = numpy.asarray(startPos, dtype=float)
+        endPos = numpy.asarray(endPos, dtype=float)
+        fractions = numpy.asarray(fractions, dtype=float)[:, None]
+        return (startPos + (endPos - startPos) * fractions).tolist()
+
+    return [[startPos[axis] + (endPos[axis] - startPos[axis]) * fraction for axis in range(3)] for fraction in fractions]
+
+
+def arcLengths(points):
+    ''' On Exit: Returns list of the distance along the polyline through points to each point. The first is 0.'''
+
+    numpy = optionalModule("numpy")
+    if numpy is not None:
+        points = numpy.asarray(points, dtype=float)
+        segments = numpy.sqrt(((points[1:] - points[:-1]) ** 2).sum(axis=1))
+        return numpy.concatenate([[0.0], numpy.cumsum(segments)]).tolist()
+
+    lengths = [0.0]
+    for i in range(1, len(points)):
+        segment = sum([(points[i][axis] - points[i - 1][axis]) ** 2 for axis in range(3)]) ** 0.5
+        lengths.append(lengths[-1] + segment)
+    return lengths
+
+
+def polylinePositions(points, fractions):
+    ''' Positions along a polyline by arc length, so they follow a curved chain instead of cutting across it.
+
+        points     : list, [x, y, z] of each point of the polyline. (e.g the joints of a spine, root first)
+        fractions  : list, fractions of the total polyline length to return positions at. 0 is the first point, 1 the last.
+
+        On Exit: Returns list of [x, y, z] positions, one per fraction.'''
+
+    if len(points) < 2:
+        raise ValueError("A polyline needs at least 2 points, got %i." % len(points))
+
+    lengths = arcLengths(points)
+    targets = [fraction * lengths[-1] for fraction in fractions]
+
+    numpy = optionalModule("numpy")
+    if numpy is not None:
+        points = numpy.asarray(points, dtype=float)
+        return numpy.stack([numpy.interp(targets, lengths, points[:, axis]) for axis in range(3)], axis=1).tolist()
+
+    positions = []
+    segment = 1
+    for target in sorted(range(len(targets)), key=lambda i: targets[i]):
+        # Fractions are walked in order so each segment is only passed once.
+        while segment < len(lengths) - 1 and lengths[segment] < targets[target]:
+            segment += 1
+        span = lengths[segment] - lengths[segment - 1]
+        weight = 0.0 if span == 0 else min(max((targets[target] - lengths[segment - 1]) / span, 0.0), 1.0)
+        positions.append((target, lerpPositions(points[segment - 1], points[segment], [weight])[0]))
+
+    positions.sort()
+    return [position for i, position in positions]
@@ -1,4 +1,6 @@
-import maya.cmds as cmds
+from lazy_modules import cmds
+import build_plan
+import rig_plans
 
 
 def makeGrpFunc(*pArgs):
@@ -43,4 +45,89 @@ def makeGrpFunc(*pArgs):
         cmds.parent(grp, "%s" % returnLoc[0])
 
     # And give the group a rename to "[selected_obj]_offsetGrp"
-    cmds.rename(grp, "%s" % selected[0] +"_offsetGrp")
\ No newline at end of file
+    cmds.rename(grp, "%s" % selected[0] +"_offsetGrp")
+
+
+def makeOffsetGrps(nodes, *pArgs):
+
+    '''create parent groups to offset trans/rot/scale values of many objects at once. Same result as makeGrpFunc on each object,
+    without using the selection.
+
+        nodes : list, names of objects to give offset groups.
+
+        On Exit:
+        Every parent, world matrix and pivot is read first, then all groups are created, placed and parented in one pass.
+        Returns list of the "[node]_offsetGrp" groups, in the same order as nodes.'''
+
+    parents = []
+    matrices = []
+    pivots = []
+    for node in nodes:
+        parent = cmds.listRelatives(node, p=True)
+        parents.append(parent[0] if parent else None)
+        matrices.append(cmds.xform(node, q=True, ws=True, m=True))
+        pivots.append((cmds.xform(node, q=True, ws=True, rp=True), cmds.xform(node, q=True, ws=True, sp=True)))
+
+    plan = rig_plans.planOffsetGrps(nodes, parents, matrices, pivots)
+    nameMap = build_plan.executePlan(plan)
+    return [nameMap[grp] for grp in plan.createdNodes()]
+
+
+def createMatchedNodes(pairs, nodeType="locator", parents=None, matchPivots=True, replace=False, *pArgs):
+
+    '''create many new nodes, each matching the transforms of an existing one. Used for the helper locators and groups of the builders.
+
+        pairs       : list, (source, name) pairs. Each new node is called name and placed to match source.
+        nodeType    : string, "locator", or a transform node type such as "transform" for empty groups.
+        parents     : list, parent of each new node, or None to create them all at the world.
+        matchPivots : bool, also match the rotate and scale pivots of each source.
+        replace     : bool, delete existing nodes called name (and their children) first, as dupeLocator used to.
+
+        On Exit:
+        Every source's world matrix and pivots are read first, then all nodes are created and placed in one pass.
+        Nodes created beneath their own source are left with identity transforms. Without replace, an existing node called name
+        that is already the source's parent (e.g an offsetGrp from an earlier run) is reused as it is.
+        Returns list of the new or reused nodes, in the same order as pairs.
+        Raises RuntimeError before creating anything if a node called name exists and can't be reused.'''
+
+    if parents is None:
+        parents = [None] * len(pairs)
+
+    # Existing nodes are never deleted unless asked to, as they may hold the user's nodes. (e.g a control under its offsetGrp)
+    results = {}
+    if not replace:
+        for source, name in pairs:
+            if not cmds.objExists(name):
+                continue
+            sourceParent = cmds.listRelatives(source, p=True, f=True)
+            if sourceParent and cmds.ls(name, long=True) == sourceParent:
+                results[name] = name
+            else:
+                raise RuntimeError("%s already exists and isn't the parent of %s." % (name, source))
+
+    names = []
+    nodeParents = []
+    matrices = []
+    pivots = []
+    for i in range(len(pairs)):
+        source, name = pairs[i]
+        if name in results:
+            continue
+        names.append(name)
+        nodeParents.append(parents[i])
+
+        if parents[i] == source:
+            matrices.append(None)
+            pivots.append(None)
+            continue
+
+        matrices.append(cmds.xform(source, q=True, ws=True, m=True))
+        if matchPivots:
+            pivots.append((cmds.xform(source, q=True, ws=True, rp=True), cmds.xform(source, q=True, ws=True, sp=True)))
+        else:
+            pivots.append(None)
+
+    if names:
+        plan = rig_plans.planMatchedNodes(names, nodeType, nodeParents, matrices, pivots, replace)
+        results.update(build_plan.executePlan(plan))
+    return [results[name] for source, name in pairs]
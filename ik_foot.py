@@ -1,6 +1,8 @@
-import maya.cmds as cmds
+from lazy_modules import cmds
 import functools
-from create_group import makeGrpFunc
+from create_group import makeOffsetGrps, createMatchedNodes
+import build_plan
+import rig_plans
 
 # create_group is NOT a lecturer script, and is also available in this repository. This script should work with both downloaded. :)
 
@@ -137,26 +139,54 @@ def createIKFoot(ankleJoint, ballJoint, toeJoint, heelLoc, ballLoc, toeLoc, insi
     ikCheckState = cmds.checkBox("ikHandleCheckbox", q=True, value=True)
     kneeCheckState = cmds.checkBox("kneeCheckbox", q=True, value=True)
     
+    buildIKFoot(ankleJString, ballJString, toeJString, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc,
+                footCtrl, legIK, kneeCtrl, leftright, ikCheckState, kneeCheckState)
+    
+    
+def buildIKFoot(ankleJString, ballJString, toeJString, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc,
+                footCtrl, legIK="", kneeCtrl="", leftright="", ikCheckState=False, kneeCheckState=False, packedScale=False, incrementalAttrs=False, *pArgs):
+    
+    ''' Builds the IK footroll from plain values. Called by createIKFoot with the GUI values, and usable without the GUI.
+        Arguments are the values of the createIKFoot arguments of the same order, with the two checkboxes as bools.
+        packedScale shares each slider multiplyDivide between three sliders (4 nodes per foot instead of 11). Useful for crowds.
+        incrementalAttrs keeps the sliders already on footCtrl (and their animation), only adding/rewiring what differs. See setupAttrs.
+        On a foot that's already built, it also keeps the helper locators, ikHandles and footRoll/sideSide networks, only creating
+        or reconnecting what's missing, so it can be re-run any number of times.
+        
+        On Exit:
+            Node-based IK Footroll is setup on specified controls. The 5 locators are renamed to "[leftright][heel/ball/toe/inside/outside]_attr_loc".
+            '''
+    
+    # On an incremental re-run of a built foot, the helper locators and their offsetGrps are reused as they are.
+    helperNames = [leftright + name for name in ("ball_pivot_loc", "toe_wiggle_loc", "heel_footRoll_loc", "ball_footRoll_loc", "toe_footRoll_loc")]
+    reuseLocs = incrementalAttrs and all([cmds.objExists(name + "_offsetGrp|" + name) for name in helperNames])
+    
     # Remove children from foot control, change it's pivot to match the ankle joint, return the children afterwards.  
     # PERSONAL NOTE: Disable the children removal and returning steps when adapting the human footroll for animal paws.
-    childList = cmds.listRelatives(footCtrl, type="transform")
-    if cmds.listRelatives(footCtrl, p=True) != None:
-        for i in range(len(childList)):
-            
-            cmds.parent(childList[0], world=True)
-    cmds.matchTransform(footCtrl, ankleJString, piv=True, pos=False, rot=False, scl=False)
-    
-    if cmds.listRelatives(footCtrl, p=True) != None:
-        for i in range(len(childList)):
-            cmds.parent(childList[i], footCtrl)                            
+    if not reuseLocs:
+        childList = cmds.listRelatives(footCtrl, type="transform")
+        if cmds.listRelatives(footCtrl, p=True) != None:
+            for i in range(len(childList)):
+                
+                cmds.parent(childList[0], world=True)
+        cmds.matchTransform(footCtrl, ankleJString, piv=True, pos=False, rot=False, scl=False)
+        
+        if cmds.listRelatives(footCtrl, p=True) != None:
+            for i in range(len(childList)):
+                cmds.parent(childList[i], footCtrl)                            
     
     # For the various IK Foot sliders, we need specific duplicates of the 5 specified locators.
     # Create and format those specific duplicates.
-    ballPivotLoc = dupeLocator(leftright, ballAttrLoc, "ball_pivot_loc")
-    toeWiggleLoc = dupeLocator(leftright, ballAttrLoc, "toe_wiggle_loc")
-    heelFootRollLoc = dupeLocator(leftright, heelAttrLoc, "heel_footRoll_loc")
-    ballFootRollLoc = dupeLocator(leftright, ballAttrLoc, "ball_footRoll_loc")
-    toeFootRollLoc = dupeLocator(leftright, toeAttrLoc, "toe_footRoll_loc")
+    # All five are created in one pass.
+    if reuseLocs:
+        dupeList = helperNames
+    else:
+        dupeList = createMatchedNodes([(ballAttrLoc, helperNames[0]),
+                                       (ballAttrLoc, helperNames[1]),
+                                       (heelAttrLoc, helperNames[2]),
+                                       (ballAttrLoc, helperNames[3]),
+                                       (toeAttrLoc, helperNames[4])], replace=True)
+    ballPivotLoc, toeWiggleLoc, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc = dupeList
 
     heelAttrLoc = cmds.rename(heelAttrLoc, "%sheel_attr_loc" % leftright)
     ballAttrLoc = cmds.rename(ballAttrLoc, "%sball_attr_loc" % leftright)
@@ -168,50 +198,80 @@ def createIKFoot(ankleJoint, ballJoint, toeJoint, heelLoc, ballLoc, toeLoc, insi
     locList = [heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, ballPivotLoc, toeWiggleLoc, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc]
     
     # Assemble locators into a specific hierarchy to create the IK Foot behaviour we're aiming for.
-    setupParent(ballFootRollLoc, ballAttrLoc)    
-    setupParent(ballAttrLoc, insideAttrLoc)
-    setupParent(toeWiggleLoc, insideAttrLoc)
-   
-    setupParent(insideAttrLoc, outsideAttrLoc)
-    setupParent(outsideAttrLoc, ballPivotLoc)
-    setupParent(ballPivotLoc, toeFootRollLoc)
-    setupParent(toeFootRollLoc, toeAttrLoc)
-    setupParent(toeAttrLoc, heelFootRollLoc)
-    setupParent(heelFootRollLoc, heelAttrLoc)
-    setupParent(heelAttrLoc, footCtrl)
-    
-    # For each locator, create an offsetGrp.
-    for i in range(len(locList)):
-        cmds.select(locList[i])
-        makeGrpFunc()
+    # A reused foot already has this hierarchy, offsetGrps and frozen locators.
+    if not reuseLocs:
+        setupParent(ballFootRollLoc, ballAttrLoc)    
+        setupParent(ballAttrLoc, insideAttrLoc)
+        setupParent(toeWiggleLoc, insideAttrLoc)
+       
+        setupParent(insideAttrLoc, outsideAttrLoc)
+        setupParent(outsideAttrLoc, ballPivotLoc)
+        setupParent(ballPivotLoc, toeFootRollLoc)
+        setupParent(toeFootRollLoc, toeAttrLoc)
+        setupParent(toeAttrLoc, heelFootRollLoc)
+        setupParent(heelFootRollLoc, heelAttrLoc)
+        setupParent(heelAttrLoc, footCtrl)
+        
+        # For each locator, create an offsetGrp. All ten are created in one pass.
+        makeOffsetGrps(locList)
+        
+        # PERSONAL NOTE: freezeLocs caused issues when reusing this script to adapt human footroll setup for animal paws. Disable if needed.
+        # Calling processing functions.   
+        freezeLocs(heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc)   
     
-    # PERSONAL NOTE: freezeLocs caused issues when reusing this script to adapt human footroll setup for animal paws. Disable if needed.
-    # Calling processing functions.   
-    freezeLocs(heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc)   
-    setupAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, ballPivotLoc)
+    # Slider, footRoll and side-to-side networks are planned up front. They only depend on names, so planning them is cheaper
+    # than caching them would be.
+    userAttrs = cmds.listAttr(footCtrl, ud=True) or []
+    footPlans = calcFootPlans(footCtrl, leftright, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc,
+                              toeWiggleLoc, ballPivotLoc, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc, userAttrs, packedScale)
     
-    footRollNodes(footCtrl, leftright, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc)
-    sideSideNodes(footCtrl, leftright, outsideAttrLoc, insideAttrLoc)
+    if incrementalAttrs:
+        setupAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, ballPivotLoc, packedScale=packedScale, incremental=True)
+    else:
+        setupAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, ballPivotLoc, footPlans["attrs"])
+    
+    footRollNodes(footCtrl, leftright, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc, footPlans["footRoll"], incremental=incrementalAttrs)
+    sideSideNodes(footCtrl, leftright, outsideAttrLoc, insideAttrLoc, footPlans["sideSide"], incremental=incrementalAttrs)
     
     # If option to have the pole-vector knee control follow the IK Foot control is enabled, create the constraint.
-    if kneeCheckState == 1:
+    if kneeCheckState == 1 and not (reuseLocs and cmds.listRelatives(kneeCtrl, type="parentConstraint")):
         cmds.parentConstraint(footCtrl, kneeCtrl, maintainOffset = True)
     
 
     # IK Handles are added last to the setup due to issues occurring if added earlier.
-    setupIKHandles(ankleJString, ballJString, toeJString, leftright)         # If ikHandles are parented before attr/roll/sideside setup, they tend to be offset.
+    # A reused foot keeps its ikHandles if both are still in place.
+    if not (reuseLocs and cmds.objExists(toeWiggleLoc + "|" + leftright + "ballToe_ikHandle")
+            and cmds.objExists(insideAttrLoc + "|" + leftright + "ankleBall_ikHandle")):
+        setupIKHandles(ankleJString, ballJString, toeJString, leftright)     # If ikHandles are parented before attr/roll/sideside setup, they tend to be offset.
                                                                              # So will handle ikHandles last of all things.
-    setupParent("%s" % leftright + "ballToe_ikHandle", toeWiggleLoc)         # Direct naming needs to be used or ikHandles will not parent.
-    setupParent("%s" % leftright + "ankleBall_ikHandle", insideAttrLoc)      # Can't abstract to "ballToe" for this, for example.
+        setupParent("%s" % leftright + "ballToe_ikHandle", toeWiggleLoc)     # Direct naming needs to be used or ikHandles will not parent.
+        setupParent("%s" % leftright + "ankleBall_ikHandle", insideAttrLoc)  # Can't abstract to "ballToe" for this, for example.
     
     # If option to have existing IK leg affected by the IK Foot enabled, create the connection.
-    if ikCheckState == 1:
+    if ikCheckState == 1 and (cmds.listRelatives(legIK, p=True) or [None])[0] != ballFootRollLoc:
         setupParent(legIK, ballFootRollLoc)
         
     cmds.select(footCtrl) 
     
      
-def setupAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, ballPivotLoc, *pArgs):
+def calcFootPlans(footCtrl, leftright, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, ballPivotLoc,
+                  heelFootRollLoc, ballFootRollLoc, toeFootRollLoc, userAttrs, packedScale=False):
+    
+    ''' Plans the slider, footRoll and side-to-side networks of the IK Foot without touching the scene.
+    
+        Arguments are the locators/controls of the same name in buildIKFoot. userAttrs is the list of custom attributes already on footCtrl.
+        packedScale packs the slider multipliers three to a multiplyDivide node.
+        
+        On Exit:
+            Returns dictionary of plan dictionaries (BuildPlan.toDict) under "attrs", "footRoll" and "sideSide".
+            '''
+    
+    return {"attrs": rig_plans.planFootAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, userAttrs, packedScale).toDict(),
+            "footRoll": rig_plans.planFootRoll(footCtrl, leftright, heelFootRollLoc, ballFootRollLoc, toeFootRollLoc).toDict(),
+            "sideSide": rig_plans.planSideSide(footCtrl, leftright, outsideAttrLoc, insideAttrLoc).toDict()}
+    
+    
+def setupAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrLoc, toeWiggleLoc, ballPivotLoc, planData=None, packedScale=False, incremental=False, *pArgs):
     
     ''' The IK Foot has various sliders ('attrs') for manipulating the foot. Wiggle, side-to-side, etc. This function sets those up on the foot control and connects
         them to the relevant locators.
@@ -224,76 +284,100 @@ def setupAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, ou
         outsideAttrLoc     : string, name of locator used for side-to-side sliders.
         toeWiggleLoc       : string, name of separate locator used for toe wiggling sliders. 
         ballPivotLoc       : string, name of locator marking the position of the ball's pivot point.
-        
+        planData           : dict, optional pre-computed plan dictionary from calcFootPlans.
+        packedScale        : bool, share each multiplyDivide between three sliders, using its X, Y and Z channels.
+        incremental        : bool, only add/remove/rewire what differs from the existing sliders and nodes. Keeps animation on the sliders.
         
         On Exit:
             Foot control has attributes/sliders for all supported foot transformations, which have been connected to the relevant locators and the required transformation channels.
             '''
+    if incremental:
+        state = footAttrState(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, packedScale)
+        plan = rig_plans.planFootAttrsDiff(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, state, packedScale)
+        if len(plan):
+            build_plan.executePlan(plan)
+        return
+    
+    if planData is not None:
+        build_plan.executePlan(build_plan.BuildPlan.fromDict(planData))
+        return
+    
     # If any custom attributes have been added to the footControl - remove them. Prevents duplicates.
-    cmds.select(footCtrl)
-    userAttrs = cmds.listAttr(ud=True)
-    if userAttrs != None:
-        for i in range(len(userAttrs)):
-            cmds.deleteAttr("%s" % footCtrl + ".%s" % userAttrs[i])
-
-    # Create attributes on the footcontrol.. Multiplier amplifies the strength of all other sliders.
-    cmds.addAttr(footCtrl, longName = "Multiplier", attributeType = "float", keyable=True, defaultValue = 3, niceName = " Multiplier") 
-     
-    cmds.addAttr(footCtrl, longName = "ROLL", attributeType = "enum", enumName = "---", keyable=True) 
-    cmds.addAttr(footCtrl, longName = "Roll", attributeType = "float", keyable=True)
-    cmds.addAttr(footCtrl, longName = "BreakLimit", attributeType = "float", keyable=True, defaultValue = 30)
-    cmds.addAttr(footCtrl, longName = "StraightenLimit", attributeType = "float", keyable=True, defaultValue = 50)
-    
-    cmds.addAttr(footCtrl, longName = "FOOT", attributeType = "enum", enumName = "---", keyable=True) 
-    cmds.addAttr(footCtrl, longName = "H_FootSwivel", attributeType = "float", keyable=True, niceName = "Heel Foot Swivel")
-    cmds.addAttr(footCtrl, longName = "B_FootSwivel", attributeType = "float", keyable=True, niceName = "Ball Foot Swivel")
-    cmds.addAttr(footCtrl, longName = "T_FootSwivel", attributeType = "float", keyable=True, niceName = "Toe Foot Swivel")
-    cmds.addAttr(footCtrl, longName = "H_FootLift", attributeType = "float", keyable=True, niceName = "Heel Foot Lift")
-    cmds.addAttr(footCtrl, longName = "T_FootLift", attributeType = "float", keyable=True, niceName = "Toe Foot Lift")
-    cmds.addAttr(footCtrl, longName = "SideSide", attributeType = "float", keyable=True, niceName = "Side to Side")
+    userAttrs = cmds.listAttr(footCtrl, ud=True)
+    
+    # Sliders are added to the foot control and each slider gets a multiplyDivide "_Scale" node, multiplying it by the Multiplier
+    # attribute before driving the relevant locator channel. For example H_FootSwivel * Multiplier drives heelAttrLoc's rotateY channel.
+    # With packedScale, three sliders share a node, one per X/Y/Z channel.
+    # The network is planned in rig_plans.py and applied in one pass.
+    plan = rig_plans.planFootAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, userAttrs or [], packedScale)
+    build_plan.executePlan(plan)
+   
+    
+def footAttrState(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, packedScale=False, *pArgs):
+    
+    ''' Samples the existing sliders and multiplier network of a foot, for rig_plans.planFootAttrsDiff.
+        Arguments are the same as setupAttrs.
         
-    cmds.addAttr(footCtrl, longName = "HEEL", attributeType = "enum", enumName = "---", keyable=True) 
-    cmds.addAttr(footCtrl, longName = "H_Lift", attributeType = "float", keyable=True, niceName = "Lift")
-    cmds.addAttr(footCtrl, longName = "H_Swivel", attributeType = "float", keyable=True, niceName = "Swivel")
-    cmds.addAttr(footCtrl, longName = "H_Lean", attributeType = "float", keyable=True, niceName = "Lean")
-    
-    cmds.addAttr(footCtrl, longName = "TOE", attributeType = "enum", enumName = "---", keyable=True) 
-    cmds.addAttr(footCtrl, longName = "T_Lift", attributeType = "float", keyable=True, niceName = "Lift")
-    cmds.addAttr(footCtrl, longName = "T_Swivel", attributeType = "float", keyable=True, niceName = "Swivel")
-    cmds.addAttr(footCtrl, longName = "T_Lean", attributeType = "float", keyable=True, niceName = "Lean")
-
-    # Create 4 lists, where item [n] in each list are to be connected to item [n] in other lists.   
-    sourceAttrs = ["H_FootSwivel", "B_FootSwivel", "T_FootSwivel", "H_FootLift", "T_FootLift",
-                    "H_Lift", "H_Swivel", "H_Lean",
-                    "T_Lift", "T_Swivel", "T_Lean"]
+        On Exit:
+            Returns dictionary of the slider attribute types ("attrs"), the input ("inputs") or value ("values") of each slider,
+            existing scale nodes of either mode ("scaleNodes") and the current source of every network destination plug ("connections").
+            '''
+    
+    attrs = {}
+    inputs = {}
+    values = {}
+    sliders = [longName for longName, flags in rig_plans.FOOT_ATTRS]
+    for attr in cmds.listAttr(footCtrl, ud=True) or []:
+        attrs[attr] = cmds.attributeQuery(attr, node=footCtrl, attributeType=True)
+        if attr not in sliders:
+            continue
+        
+        # Kept so the slider can be re-added in order without losing its animation or value.
+        source = cmds.listConnections(footCtrl + "." + attr, source=True, destination=False, plugs=True, skipConversionNodes=True)
+        if source:
+            inputs[attr] = source[0]
+        else:
+            values[attr] = cmds.getAttr(footCtrl + "." + attr)
     
-    multiDivs = []
+    scaleNodes = rig_plans.uniqueNodes(rig_plans.footScaleNodes(footCtrl, False) + rig_plans.footScaleNodes(footCtrl, True))
+    scaleNodes = [node for node in scaleNodes if cmds.objExists(node)]
     
-    destinations = [heelAttrLoc, ballPivotLoc, toeAttrLoc, heelAttrLoc, toeAttrLoc,
-                    ballAttrLoc, ballAttrLoc, ballAttrLoc,
-                    toeWiggleLoc, toeWiggleLoc, toeWiggleLoc]
+    connections = {}
+    for sourcePlug, destPlug in rig_plans.footAttrConnections(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, packedScale):
+        if not cmds.objExists(destPlug.split(".")[0]):
+            continue
+        currentSource = cmds.listConnections(destPlug, source=True, destination=False, plugs=True, skipConversionNodes=True)
+        if currentSource:
+            connections[destPlug] = currentSource[0]
     
-    destAttrs = ["rotateY", "rotateY", "rotateY", "rotateX", "rotateX",
-                "rotateX", "rotateY", "rotateZ",
-                "rotateX", "rotateY", "rotateZ"]
+    return {"attrs": attrs, "inputs": inputs, "values": values, "scaleNodes": scaleNodes, "connections": connections}
     
-    # For all the sliders we've created, cleanup any pre-existing scale nodes. (For the multiplier option.
-    for i in range(len(sourceAttrs)):                                                       
-        if cmds.objExists("%s" % footCtrl + "_" + sourceAttrs[i] + "_Scale"):
-            cmds.delete("%s" % footCtrl + "_" + sourceAttrs[i] + "_Scale")
+    
+def networkState(plan, *pArgs):
+    
+    ''' Samples which nodes and connections of a network plan already exist, for rig_plans.planNetworkDiff.
+    
+        plan                : BuildPlan, full plan of the network.
         
-        # Create mutiply/divide nodes to handle the calculation of the multiplier's effect on other attributes/sliders. Append these to the empty multiDiv list.   
-        multiDivs.append(cmds.createNode("multiplyDivide", n = "%s" % footCtrl + "_%s" % sourceAttrs[i] + "_Scale"))
-            
-        # Connect the footCtrl attributes to their individual multiply/divide nodes, connect the multiplier value, and connect the output to the required channel on the 
-        # relevant locator.
-        # For example H_FootSwivel and the Multiplier's values are connected to a H_FootSwivel_Scale multiplyDivide node. The output is connected to heelAttrLoc's rotateY channel.
-        cmds.connectAttr("%s" % footCtrl + ".%s" % sourceAttrs[i], multiDivs[i] + ".input1.input1X")
-        cmds.connectAttr("%s" % footCtrl + ".Multiplier"         , multiDivs[i] + ".input2.input2X")
-        cmds.connectAttr(multiDivs[i] + ".output.outputX"              , destinations[i] + ".%s" % destAttrs[i])
-   
+        On Exit:
+            Returns dictionary of the created or deleted nodes of the plan that exist ("nodes") and the connections of the plan
+            that are already made ("connections").
+            '''
     
-def footRollNodes(footCtrl, leftright, heelLoc, ballLoc, toeLoc, *pArgs):
+    nodes = [op["node"] for op in plan.ops if op["op"] in ("createNode", "delete") and cmds.objExists(op["node"])]
+    
+    connections = []
+    for op in plan.ops:
+        if op["op"] != "connectAttr" or not cmds.objExists(op["sourcePlug"]) or not cmds.objExists(op["destPlug"]):
+            continue
+        # Float outputs drive the locator rotations through unitConversion nodes, which isConnected would otherwise miss.
+        if cmds.isConnected(op["sourcePlug"], op["destPlug"], ignoreUnitConversion=True):
+            connections.append((op["sourcePlug"], op["destPlug"]))
+    
+    return {"nodes": nodes, "connections": connections}
+    
+    
+def footRollNodes(footCtrl, leftright, heelLoc, ballLoc, toeLoc, planData=None, incremental=False, *pArgs):
 
     ''' The expression to control the actual footRoll needs to be created. For performance and evaluation speed - this is created through a node network.
     
@@ -302,92 +386,28 @@ def footRollNodes(footCtrl, leftright, heelLoc, ballLoc, toeLoc, *pArgs):
         heelLoc             : string, name of heel locator in IK footroll setup.
         ballLoc             : string, name of ball locator in IK footroll setup.
         toeLoc              : string, name of toe locator in IK footroll setup.
+        planData            : dict, optional pre-computed plan dictionary from calcFootPlans.
+        incremental         : bool, keep the nodes of an existing network, only creating and connecting what's missing.
 
         On Exit:
             Node equivelant of expression to control footRoll is established with tweakable performance parameters. Foot can be rolled without clipping through the ground plane
             - but an IK leg will not be affected unless the leg ikHandle option was checked.
             '''
          
-    # If expression was created, clean it up.   
-    if cmds.objExists("%s" % leftright + "footik_roll_expr"):
-        cmds.delete("%s" % leftright + "footik_roll_expr")
-        
-    # Holder values for variables we'll need a lot
-    cmds.createNode("floatConstant", n="%sroll_const" % leftright)
-    cmds.createNode("floatConstant", n="%sbreak_const" % leftright)
-    cmds.createNode("floatConstant", n="%sstraighten_const" % leftright)
-    
-    cmds.connectAttr("%s.Roll" % footCtrl, "%sroll_const.inFloat" % leftright)
-    cmds.connectAttr("%s.BreakLimit" % footCtrl, "%sbreak_const.inFloat" % leftright)
-    cmds.connectAttr("%s.StraightenLimit" % footCtrl, "%sstraighten_const.inFloat" % leftright)
-    
-    # Roll setup
-    cmds.createNode("condition", n="%smin_roll" % leftright)
-    cmds.setAttr("%smin_roll.operation" % leftright, 5)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%smin_roll.secondTerm" % leftright)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%smin_roll.colorIfFalse.colorIfFalseR" % leftright)
-    
-    cmds.createNode("floatConstant", n="%sroll_value" % leftright)
-    cmds.connectAttr("%smin_roll.outColor.outColorR" % leftright, "%sroll_value.inFloat" % leftright)
-    
-    # Break setup
-    
-    #Linstep 1
-    cmds.createNode("setRange", n="%sball_linstep_1" % leftright)
-    cmds.setAttr("%sball_linstep_1.maxX" % leftright, 1) 
-    cmds.connectAttr("%sbreak_const.outFloat" % leftright, "%sball_linstep_1.oldMaxX" % leftright)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%sball_linstep_1.valueX" % leftright)
-    
-    #Linstep 2
-    cmds.createNode("setRange", n="%sball_linstep_2" % leftright)
-    cmds.setAttr("%sball_linstep_2.maxX" % leftright, 1) 
-    cmds.connectAttr("%sbreak_const.outFloat" % leftright, "%sball_linstep_2.oldMinX" % leftright)
-    cmds.connectAttr("%sstraighten_const.outFloat" % leftright, "%sball_linstep_2.oldMaxX" % leftright)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%sball_linstep_2.valueX" % leftright)
-    
-    #One minus Linstep 2
-    cmds.createNode("floatMath", n="%sone_minus_ball_linstep_2" % leftright)
-    cmds.setAttr("%sone_minus_ball_linstep_2.operation" % leftright, 1)
-    cmds.setAttr("%sone_minus_ball_linstep_2.floatA" % leftright, 1)
-    cmds.connectAttr("%sball_linstep_2.outValueX" % leftright, "%sone_minus_ball_linstep_2.floatB" % leftright)
-    
-    #Multiply linstep 1 2
-    cmds.createNode("multiplyDivide", n="%smultiply_linstep_1_2" % leftright)
-    cmds.connectAttr("%sball_linstep_1.outValueX" % leftright, "%smultiply_linstep_1_2.input1X" % leftright)
-    cmds.connectAttr("%sone_minus_ball_linstep_2.outFloat" % leftright, "%smultiply_linstep_1_2.input2X" % leftright)
-    
-    
-    #Multiply ball by roll
-    cmds.createNode("multiplyDivide", n="%smultiply_ball_by_roll" % leftright)
-    cmds.connectAttr("%smultiply_linstep_1_2.outputX" % leftright, "%smultiply_ball_by_roll.input1X" % leftright)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%smultiply_ball_by_roll.input2X" % leftright)
-    
-    cmds.createNode("floatConstant", n="%sball_value" % leftright)
-    cmds.connectAttr("%smultiply_ball_by_roll.outputX" % leftright, "%sball_value.inFloat" % leftright)
-    
-    #Straighten Setup
-    #Linstep1
-    cmds.createNode("setRange", n="%stoe_linstep_1" % leftright)
-    cmds.setAttr("%stoe_linstep_1.maxX" % leftright, 1)
-    cmds.connectAttr("%sbreak_const.outFloat" % leftright, "%stoe_linstep_1.oldMinX" % leftright)
-    cmds.connectAttr("%sstraighten_const.outFloat" % leftright, "%stoe_linstep_1.oldMaxX" % leftright)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%stoe_linstep_1.valueX" % leftright)
-    
-    #Multiply toe by roll
-    cmds.createNode("multiplyDivide", n="%smultiply_toe_by_roll" % leftright)
-    cmds.connectAttr("%stoe_linstep_1.outValueX" % leftright, "%smultiply_toe_by_roll.input1X" % leftright)
-    cmds.connectAttr("%sroll_const.outFloat" % leftright, "%smultiply_toe_by_roll.input2X" % leftright)
-    
-    cmds.createNode("floatConstant", n="%stoe_value" % leftright)
-    cmds.connectAttr("%smultiply_toe_by_roll.outputX" % leftright, "%stoe_value.inFloat" % leftright)
-    
-    cmds.connectAttr("%sroll_value.outFloat" % leftright, "%s.rotateX" % heelLoc)
-    cmds.connectAttr("%sball_value.outFloat" % leftright, "%s.rotateX" % ballLoc)
-    cmds.connectAttr("%stoe_value.outFloat" % leftright, "%s.rotateX" % toeLoc)
+    # Network is planned in rig_plans.py; roll, break and straighten limits are fed through setRange "linstep" nodes.
+    if planData is not None:
+        plan = build_plan.BuildPlan.fromDict(planData)
+    else:
+        plan = rig_plans.planFootRoll(footCtrl, leftright, heelLoc, ballLoc, toeLoc)
+    
+    if incremental:
+        plan = rig_plans.planNetworkDiff(plan, networkState(plan))
+    if len(plan):
+        build_plan.executePlan(plan)
 
 
     
-def sideSideNodes(footCtrl, leftright, outsideLoc, insideLoc, *pArgs):
+def sideSideNodes(footCtrl, leftright, outsideLoc, insideLoc, planData=None, incremental=False, *pArgs):
     
     ''' The expression to control the rocking side-to-side roll needs to be created. For performance and evaluation speed - this is created through a node network.
     
@@ -395,55 +415,24 @@ def sideSideNodes(footCtrl, leftright, outsideLoc, insideLoc, *pArgs):
         leftright           : string, custom or pre-set prefixes to label created nodes with. (e.g. l_leg_)
         outsideLoc          : string, name of outside locator in IK footroll setup.
         insideLoc           : string, name of inside locator in IK footroll setup.
+        planData            : dict, optional pre-computed plan dictionary from calcFootPlans.
+        incremental         : bool, keep the nodes of an existing network, only creating and connecting what's missing.
 
         On Exit:
             Node equivelant of expression to control side-to-side roll is established. Foot can be rolled side to side without clipping through the ground plane
             - but an IK leg will not be affected unless the leg ikHandle option was checked.
             '''
     
-    # Cleanup old expression if it's accidentally created.
-    if cmds.objExists("%s" % leftright + "footik_sideside_expr"):
-        cmds.delete("%s" % leftright + "footik_sideside_expr")
-        
-    # Get value from IK foot Ctrl
-    cmds.createNode("floatConstant", n="%sside_const" % leftright)
-    cmds.connectAttr("%s.SideSide" % footCtrl, "%sside_const.inFloat" % leftright)
-    
-    # Min condition
-    cmds.createNode("condition", n="%smin_side" % leftright)
-    cmds.setAttr("%smin_side.operation" % leftright, 5)
-    cmds.setAttr("%smin_side.colorIfFalse.colorIfFalseR" % leftright, 0)
-    cmds.connectAttr("%sside_const.outFloat" % leftright, "%smin_side.firstTerm" % leftright)
-    cmds.connectAttr("%sside_const.outFloat" % leftright, "%smin_side.colorIfTrue.colorIfTrueR" % leftright)
-    
-    # Max condition
-    cmds.createNode("condition", n="%smax_side" % leftright)
-    cmds.setAttr("%smax_side.operation" % leftright, 3)
-    cmds.setAttr("%smax_side.colorIfFalse.colorIfFalseR" % leftright, 0)
-    cmds.connectAttr("%sside_const.outFloat" % leftright, "%smax_side.firstTerm" % leftright)
-    cmds.connectAttr("%sside_const.outFloat" % leftright, "%smax_side.colorIfTrue.colorIfTrueR" % leftright)
-    
-    # Values    
-    cmds.createNode("floatConstant", n="%sside_min_value" % leftright)
-    cmds.connectAttr("%smin_side.outColor.outColorR" % leftright, "%sside_min_value.inFloat" % leftright)
-    
-    cmds.createNode("floatConstant", n="%sside_max_value" % leftright)
-    cmds.connectAttr("%smax_side.outColor.outColorR" % leftright, "%sside_max_value.inFloat" % leftright)
-    
-    #Connect in the scaling node
-    
-    cmds.createNode("multiplyDivide", n="%s_sideside_min_scale_factor" % leftright)
-    cmds.connectAttr("%sside_min_value.outFloat" % leftright, "%s_sideside_min_scale_factor.input1X" % leftright)
-    cmds.connectAttr("%s.Multiplier" % footCtrl, "%s_sideside_min_scale_factor.input2X" % leftright)
-    
-    cmds.createNode("multiplyDivide", n="%s_sideside_max_scale_factor" % leftright)
-    cmds.connectAttr("%sside_max_value.outFloat" % leftright, "%s_sideside_max_scale_factor.input1X" % leftright)
-    cmds.connectAttr("%s.Multiplier" % footCtrl, "%s_sideside_max_scale_factor.input2X" % leftright)
-    
+    # Network is planned in rig_plans.py; min/max conditions split the slider into each side, scaled by the Multiplier.
+    if planData is not None:
+        plan = build_plan.BuildPlan.fromDict(planData)
+    else:
+        plan = rig_plans.planSideSide(footCtrl, leftright, outsideLoc, insideLoc)
     
-    # Connect to destination.
-    cmds.connectAttr("%s_sideside_min_scale_factor.outputX" % leftright, "%s.rotateZ" % outsideLoc)
-    cmds.connectAttr("%s_sideside_max_scale_factor.outputX" % leftright, "%s.rotateZ" % insideLoc)
+    if incremental:
+        plan = rig_plans.planNetworkDiff(plan, networkState(plan))
+    if len(plan):
+        build_plan.executePlan(plan)
     
     
                                         
@@ -468,7 +457,7 @@ def freezeLocs(heelAttrLoc, ballAttrLoc, toeAttrLoc, insideAttrLoc, outsideAttrL
         try:
             cmds.makeIdentity(locList[i], apply=True)
         except RuntimeError:
-            print "Freeze transform for %s skipped because it has incoming connections." % locList[i]
+            print("Freeze transform for %s skipped because it has incoming connections." % locList[i])
             
      
 def dupeLocator(leftright, target, name, *pArgs):
@@ -479,15 +468,8 @@ def dupeLocator(leftright, target, name, *pArgs):
         name             : string, name to be used for the newly created locator.
         '''
 
-    # If locator with the name the locator is trying to use exists, delete it.   
-    if cmds.objExists("%s" % leftright + "%s" % name):
-        cmds.delete("%s" % leftright + "%s" % name)
-    
-    # Create locator with new name and prefix. Match it's transformations to that of the target, and return it.
-    cmds.spaceLocator(name = "%s" % leftright + "%s" % name)
-    newLoc = "%s" % leftright + "%s" % name
-    cmds.matchTransform(newLoc, target, piv=True, pos=True, rot=True, scl=True)
-    return newLoc
+    # Replaces any existing locator of the same name. See create_group.createMatchedNodes for creating several at once.
+    return createMatchedNodes([(target, "%s" % leftright + "%s" % name)], replace=True)[0]
                  
 
 def setupIKHandles(ankle, ball, toe, leftright, *pArgs):
@@ -534,7 +516,7 @@ def updateTexField(currentTextField, *pArgs):
     # If nothing currently selected, do nothing. Otherwise, edit text field with currently selected object's name.
     list = cmds.ls(selection = True)
     if len(list) == 0:
-        print "Error: No object selected"
+        print("Error: No object selected")
     else:    
         cmds.textField("%s" % currentTextField, edit=True, tx="%s" % list[0])
         
@@ -555,4 +537,5 @@ def copyDropDown(dropdown, *pArgs):
     # When an option from the dropdown menu is selected, fill the leftrightprefix text field. (This is the only dropdown in the GUI, it only affects this field).
     cmds.textField("leftrightPrefix", edit=True, tx="%s" % dropdown)
     
-footGUI()
\ No newline at end of file
+if __name__ == "__main__":
+    footGUI()
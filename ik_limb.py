@@ -1,8 +1,12 @@
-import maya.cmds as cmds
+from lazy_modules import cmds
 import functools
-import ik_limb_ari_code as sj          # Script written by Anargyros Sarafopoulos.
+import time
+import build_plan
+import rig_plans
+import stretch
 
-# Script below is an interface and extension to lecturer's script above. Without access to ik_limb_ari_code, this will not work.
+# Script below is an interface and extension to lecturer's script ik_limb_ari_code, written by Anargyros Sarafopoulos.
+# Without access to ik_limb_ari_code, this will not work unless buildLimb is given nativeStretch=True. It is only imported once a limb is built.
 def limbGUI():
     '''GUI window for limb setup.'''
 
@@ -77,24 +81,136 @@ def toolFunction(*pArgs):
     limbSetString = cmds.textField("limbSettingsCtrl", q=True, text=True)
     resultString = cmds.textField("resultJoint", q=True, text=True)
 
-    cmds.ikHandle(sj = sjString, ee = ejString, n=ikhString)
+    buildLimb(sjString, ejString, kejString, gsoString + "." + gsnString, ikhString, limbSetString, resultString)
+    
+    # Re-select what was originally selected.
+    cmds.select(currentlySelected)
+    
+    
+def buildLimb(startJoint, endJoint, kneeElbowCtrl, globalScale, ikHandleName, limbSettingsCtrl, resultJoint, nativeStretch=False, packedSwitch=False, *pArgs):
 
-    # Lecturer script creates the ik setup for the limb, including elbow/knee lock.
-    stretchIK = sj.stretchy_ik(ikhString, global_scale = gsoString + "." + gsnString, axis = "x")
-    stretchIK.lock_joint(kejString)
+    ''' Builds the stretchy IK limb from plain values. Called by toolFunction with the GUI values, and usable without the GUI.
+    
+        startJoint        : string, name of the start joint of the IK chain.
+        endJoint          : string, name of the end joint of the IK chain.
+        kneeElbowCtrl     : string, name of the knee/elbow (pole vector) control.
+        globalScale       : string, global scale plug. (e.g "global_ctrl.globalScale")
+        ikHandleName      : string, name of the ikHandle to be created.
+        limbSettingsCtrl  : string, name of the control to hold the IK stretch toggle.
+        resultJoint       : string, name of the result chain joint corresponding to the end of the IK chain.
+        nativeStretch     : bool, build the stretch with the shared network in stretch.py, and the pole vector and knee/elbow lock
+                            natively (see limbLock), instead of with the lecturer script. Needs no external script.
+        packedSwitch      : bool, toggle up to three joints with each blendColors. See stretchSwitch.
+        
+        On Exit:
+            3-joint stretchy pole vector IK setup created, with stretch toggle on limbSettingsCtrl.'''
+
+    cmds.ikHandle(sj = startJoint, ee = endJoint, n=ikHandleName)
+
+    if nativeStretch == True:
+        stretch.createLimbStretch(ikHandleName + "_", startJoint, endJoint, ikHandleName, globalScale)
+        cmds.poleVectorConstraint(kneeElbowCtrl, ikHandleName)
+        limbLock(ikHandleName + "_", startJoint, endJoint, kneeElbowCtrl, ikHandleName, globalScale)
+    else:
+        # Lecturer script creates the ik setup for the limb, including elbow/knee lock.
+        import ik_limb_ari_code as sj          # Script written by Anargyros Sarafopoulos.
+        stretchIK = sj.stretchy_ik(ikHandleName, global_scale = globalScale, axis = "x")
+        stretchIK.lock_joint(kneeElbowCtrl)
     
     # Additional functionality added by me to add toggle to turn off ik stretching.
-    stretchSwitch(resultString, limbSetString)
+    stretchSwitch(resultJoint, limbSettingsCtrl, packedSwitch)
     
-    # Re-select what was originally selected.
-    cmds.select(currentlySelected)
+
+# Arguments every spec given to buildLimbs must have. The rest are optional.
+SPEC_REQUIRED = ["startJoint", "endJoint", "kneeElbowCtrl", "globalScale", "limbSettingsCtrl", "resultJoint", "prefix"]
+SPEC_OPTIONAL = ["nativeStretch", "packedSwitch"]
+
+
+def buildLimbs(specs):
+
+    ''' Builds several stretchy IK limbs from data, in one undo chunk. No GUI is needed.
+    
+        specs : list, dictionaries with the buildLimb arguments in SPEC_REQUIRED, one per limb. "prefix" replaces ikHandleName;
+                the ikHandle is named prefix + "ikHandle", as the GUI does. They may also have those in SPEC_OPTIONAL and a
+                "name" for the report (defaults to the prefix).
+        
+        On Exit:
+            Every limb is built as buildLimb would. The selection is left as it was.
+            Returns a report dictionary with "built" holding the name of every limb and "timings" holding (name, seconds) for each.
+            Raises ValueError before building anything if a spec is missing arguments, has unknown ones, or reuses a prefix.'''
+
+    prefixes = set()
+    for spec in specs:
+        name = spec.get("name", spec.get("prefix"))
+        missing = [arg for arg in SPEC_REQUIRED if arg not in spec]
+        if missing:
+            raise ValueError("Limb spec '%s' is missing: %s" % (name, ", ".join(missing)))
+        unknown = set(spec) - set(SPEC_REQUIRED) - set(SPEC_OPTIONAL) - set(["name"])
+        if unknown:
+            raise ValueError("Limb spec '%s' has unknown settings: %s" % (name, ", ".join(sorted(unknown))))
+        # ikHandle and stretch node names are built from the prefix, so limbs sharing one would clash.
+        if spec["prefix"] in prefixes:
+            raise ValueError("Limb prefix '%s' is used more than once." % spec["prefix"])
+        prefixes.add(spec["prefix"])
+    
+    report = {"built": [], "timings": []}
+    currentlySelected = cmds.ls(selection=True)
+    
+    cmds.undoInfo(openChunk=True, chunkName="buildLimbs")
+    try:
+        for spec in specs:
+            name = spec.get("name", spec["prefix"])
+            
+            startTime = time.time()
+            buildLimb(spec["startJoint"], spec["endJoint"], spec["kneeElbowCtrl"], spec["globalScale"], spec["prefix"] + "ikHandle",
+                      spec["limbSettingsCtrl"], spec["resultJoint"], spec.get("nativeStretch", False), spec.get("packedSwitch", False))
+            
+            report["built"].append(name)
+            report["timings"].append((name, time.time() - startTime))
+    finally:
+        cmds.undoInfo(closeChunk=True)
+        if currentlySelected:
+            cmds.select(currentlySelected, replace=True)
+        else:
+            cmds.select(clear=True)
+    
+    return report
     
-def stretchSwitch(jointName, IKSettingCtrl, *pArgs):
+
+def limbLock(prefix, startJoint, endJoint, kneeElbowCtrl, ikHandleName, globalScale=None, *pArgs):
+
+    ''' Native knee/elbow lock for a limb stretched by stretch.createLimbStretch, in place of the lecturer's lock_joint.
+    
+        prefix            : string, user-defined prefix for created nodes. Replaces an existing lock of the same prefix.
+        startJoint        : string, name of the start joint of the IK chain.
+        endJoint          : string, name of the end joint of the IK chain.
+        kneeElbowCtrl     : string, name of the knee/elbow (pole vector) control.
+        ikHandleName      : string, name of the ikHandle of the chain.
+        globalScale       : string, optional global scale plug.
+        
+        On Exit:
+            kneeElbowCtrl gains a "kneeElbowLock" attribute. At 1, the two lower joints reach the control exactly, however far
+            it is moved. Raises RuntimeError if the chain isn't 3 joints.'''
+
+    joints = stretch.chainJoints(startJoint, endJoint)
+    if len(joints) != 2:
+        raise RuntimeError("Knee/elbow lock needs a 3 joint chain, %s to %s has %i." % (startJoint, endJoint, len(joints) + 1))
+    
+    stretchPlugs = [stretchPlug(joint) for joint in joints]
+    restLengths = [cmds.getAttr("%s.translateX" % joint) for joint in joints]
+    
+    addLock = not cmds.attributeQuery("kneeElbowLock", node=kneeElbowCtrl, exists=True)
+    plan = rig_plans.planLimbLock(prefix, startJoint, kneeElbowCtrl, ikHandleName, joints, restLengths, stretchPlugs, globalScale, addLock)
+    build_plan.executePlan(plan)
+    
+
+def stretchSwitch(jointName, IKSettingCtrl, packed=False, *pArgs):
 
     ''' In a stretchy IK limb setup, establish attribute to limit stretch function on IK control
     
         jointname : name of the end joint of the result chain that corresponds to the end of the IK chain.
         IKSettingCtrl : nurbsShape/Geometry used to hold IK toggle settings.
+        packed : bool, use each blendColors node's R, G and B for three joints rather than one blendColors per joint.
         
         On Exit:
             Additional attribute on IKSettingCtrl which allows toggling IK stretch on/off.'''
@@ -102,36 +218,51 @@ def stretchSwitch(jointName, IKSettingCtrl, *pArgs):
     # Stretch achieved with translation of latter 2 ik joints in 3 joint ik chain. 
     # To establish toggle, the corresponding joints in the result chain are needed.
     # Blend colour nodes used to hold the stretched and default lengths to swap between.     
-    cmds.select("%s" % jointName)
-    cmds.select(cmds.listRelatives(type="joint", parent=True), add=True)
-    jList = cmds.ls(selection=True)                                            
-    
-    cmds.addAttr(IKSettingCtrl, longName = "ikStretchToggle", niceName = "IK Stretch Toggle", attributeType = "float", min = 0, max = 1, dv = 0, keyable=True)
+    # Chain is resolved from the joint itself, not the selection: [jointName, its parent joint].
+    parentJoint = cmds.listRelatives(jointName, type="joint", parent=True)
+    if not parentJoint:
+        raise RuntimeError("%s has no parent joint to toggle stretch on." % jointName)
+    jList = [jointName, parentJoint[0]]
     
+    # Plug driving each joint's stretched translate X, found from the translateX connection itself.
+    stretchPlugs = []
+    restLengths = []
     for i in range(len(jList)):
+        stretchPlugs.append(stretchPlug(jList[i]))
         
-        # Cleanup if already exists
-        if cmds.objExists("%s" % jList[i] + "_stretchToggle_blendColors"):            
-            cmds.delete("%s" % jList[i] + "_stretchToggle_blendColors")
-            
-
-        # First 3 unitConversion nodes will be the translate X, Y, Z attrs. Next 3 are the rotate X, Y, Z. Only after Translate X.
-        cmds.select(jList[i])
-        connectList = cmds.listConnections(destination=False, plugs=True, type = "unitConversion")
-
-        # Creating BlendColour node for the limb stretch toggle
-        colourNode = cmds.createNode("blendColors", n="%s" % jList[i] + "_stretchToggle_blendColors") 
-
         # Get length of joint at resting position
-        jLength = cmds.getAttr("%s.translateX" % jList[i])                                                    
-        
-        # Setup and connect stretch and non-stretch values to blend node, and connect the toggle to the blendColour node.
-        cmds.setAttr("%s" % colourNode + ".color1R", jLength)                                                        
-        cmds.connectAttr("%s" % connectList[0] , "%s" %  colourNode + ".color2.color2R", force=True)
-        cmds.connectAttr("%s" % IKSettingCtrl + ".ikStretchToggle", "%s" % colourNode + ".blender", force=True)
-        cmds.connectAttr("%s" % colourNode + ".output.outputR", jList[i] + ".translate.translateX", force=True)
+        restLengths.append(cmds.getAttr("%s.translateX" % jList[i]))
+    
+    # Blend nodes, toggle attribute and connections are planned in rig_plans.py. Existing blend nodes are cleaned up by the plan.
+    addToggle = not cmds.attributeQuery("ikStretchToggle", node=IKSettingCtrl, exists=True)
+    plan = rig_plans.planStretchSwitch(IKSettingCtrl, jList, restLengths, stretchPlugs, addToggle, packed)
+    build_plan.executePlan(plan)
         
           
+def stretchPlug(joint, *pArgs):
+    ''' Finds the plug driving a joint's stretched translate X.
+    
+        joint : name of a joint whose translateX is driven by a stretch network.
+        
+        On Exit:
+            Returns the source plug of joint.translateX. If a previous stretch toggle sits in between, the plug feeding that
+            toggle's channel is returned instead, so stretchSwitch can be re-run. Raises RuntimeError if translateX isn't driven.'''
+
+    source = cmds.listConnections("%s.translateX" % joint, source=True, destination=False, plugs=True, skipConversionNodes=False)
+    if not source:
+        raise RuntimeError("%s.translateX has no incoming stretch connection." % joint)
+    
+    node, dot, attr = source[0].partition(".")
+    if cmds.nodeType(node) == "blendColors" and "_stretchToggle" in node:
+        # Channel of the toggle this joint uses. (outputR -> color2R)
+        channel = attr[-1]
+        source = cmds.listConnections("%s.color2%s" % (node, channel), source=True, destination=False, plugs=True, skipConversionNodes=False)
+        if not source:
+            raise RuntimeError("%s.color2%s has no incoming stretch connection." % (node, channel))
+    
+    return source[0]
+    
+    
 def closeWindow(myWin, *pArgs ):
     ''' Close gui window
     
@@ -148,7 +279,7 @@ def updateTexField(currentTextField, *pArgs):
 
     list = cmds.ls(selection = True)
     if len(list) == 0:
-        print "Error: No object selected"
+        print("Error: No object selected")
     else:    
         cmds.textField("%s" % currentTextField, edit=True, tx="%s" % list[0])
         
@@ -179,11 +310,12 @@ def updateDropDown(gScaleObj, dropdown, *pArgs):
     userAttrs = cmds.listAttr(ud=True)
 
     if userAttrs == None:
-        print "No user defined attributes."
+        print("No user defined attributes.")
     else:
-        print "User defined attributes detected."
+        print("User defined attributes detected.")
         for i in range(len(userAttrs)):
             cmds.menuItem( label="%s" % userAttrs[i], p = dropdown)
         
 
-limbGUI()
\ No newline at end of file
+if __name__ == "__main__":
+    limbGUI()
@@ -1,8 +1,14 @@
-import maya.cmds as cmds
+from lazy_modules import cmds, api
 import functools
-from splitJoint import splitJoints
+import time
+import build_plan
+import rig_plans
+import plan_cache
+import chain_math
+import stretch
+from create_group import createMatchedNodes
 
-# splitJoint is a script written by lecturer, Ari Sarafopoulos. It is not uploaded, so the FK creation options will not work.
+# FK joint chains used to be made by splitJoint, a script written by lecturer, Ari Sarafopoulos. They are now built natively, see chain_math.py.
 
 def spineGUI():
     '''GUI window for spine setup.'''
@@ -84,6 +90,23 @@ def mainFunc(spine_root_joint, spine_end_joint, spine_root_ctrl, spine_end_ctrl,
     fk_limit         = cmds.checkBox("fk_limit", q=True, value=True)
     fk_ctrls_num     = cmds.intField("num_fk_ctrls", q=True, value=True)
 
+    buildSpine(spine_root_joint, spine_end_joint, spine_root_ctrl, spine_end_ctrl, stretch_enabled, fk_enabled, fk_limit, fk_ctrls_num, prefix)
+
+
+def buildSpine(spine_root_joint, spine_end_joint, spine_root_ctrl, spine_end_ctrl, stretch_enabled=True, fk_enabled=True, fk_limit=False, fk_ctrls_num=2, prefix="ik_spine_", fk_on_curve=False, global_scale=None, planCache=None, ctrl_template=None):
+
+    ''' Builds the hybrid IK/FK spine from plain values. Called by mainFunc with the GUI values, and usable without the GUI.
+    
+        Arguments are the same as mainFunc, with stretch_enabled taking the place of stretch_checkbox.
+        fk_on_curve        : bool, space FK controls along the spline IK curve instead of the joint chain.
+        global_scale       : string, optional global scale plug the stretch is normalized by. (e.g "global_ctrl.globalScale")
+        planCache          : PlanCache, optional cache of the FK placement and stretch chain data. See plan_cache.py. Uses the default cache if set.
+        ctrl_template      : string, optional curve to copy the FK controls from. See fkCtrlFunc.
+    
+        On Exit:
+            Hybrid IK/FK spine created from chain of joints.
+            '''
+
     # Ensure final joint in chain is alligned w/ rest of chain.
     cmds.setAttr("%s.jointOrientX" % spine_end_joint, 0)        
     cmds.setAttr("%s.jointOrientY" % spine_end_joint, 0)
@@ -94,11 +117,69 @@ def mainFunc(spine_root_joint, spine_end_joint, spine_root_ctrl, spine_end_ctrl,
     
     # If FK controls desired and number specified is above 0, call FK creation function.
     if (fk_enabled == True) and (fk_ctrls_num > 0):
-        fkCtrlFunc(spine_root_joint, spine_end_joint, spine_end_ctrl, fk_ctrls_num, fk_limit, prefix)
+        fkCtrlFunc(spine_root_joint, spine_end_joint, spine_end_ctrl, fk_ctrls_num, fk_limit, prefix, ik_curve if fk_on_curve else None, planCache, ctrl_template)
     
     # Call stretch function if setting enabled.
     if stretch_enabled == True:
-        createStretch(spine_root_joint, spine_end_joint, ik_curve, prefix)
+        createStretch(spine_root_joint, spine_end_joint, ik_curve, prefix, planCache, global_scale)
+    
+    
+# buildSpine arguments every spec given to buildSpines must have. The rest are optional.
+SPEC_REQUIRED = ["spine_root_joint", "spine_end_joint", "spine_root_ctrl", "spine_end_ctrl", "prefix"]
+SPEC_OPTIONAL = ["stretch_enabled", "fk_enabled", "fk_limit", "fk_ctrls_num", "fk_on_curve", "global_scale"]
+
+
+def buildSpines(specs, planCache=None):
+
+    ''' Builds several spline chains (spine, neck, tail, tentacles...) from data, in one undo chunk.
+    
+        specs              : list, dictionaries of buildSpine arguments, one per chain. Each needs the arguments in SPEC_REQUIRED,
+                            and may have those in SPEC_OPTIONAL and a "name" for the report (defaults to its prefix).
+        planCache          : PlanCache, optional cache shared by every chain. See plan_cache.py. Uses the default cache if set.
+        
+        On Exit:
+            Every chain is built as buildSpine would, sharing one FK control template and cache.
+            Returns a report dictionary with "built" holding the name of every chain and "timings" holding (name, seconds) for each.
+            Raises ValueError before building anything if a spec is missing arguments, has unknown ones, or reuses a prefix.
+            '''
+    
+    prefixes = set()
+    for spec in specs:
+        name = spec.get("name", spec.get("prefix"))
+        missing = [arg for arg in SPEC_REQUIRED if arg not in spec]
+        if missing:
+            raise ValueError("Spine spec '%s' is missing: %s" % (name, ", ".join(missing)))
+        unknown = set(spec) - set(SPEC_REQUIRED) - set(SPEC_OPTIONAL) - set(["name"])
+        if unknown:
+            raise ValueError("Spine spec '%s' has unknown settings: %s" % (name, ", ".join(sorted(unknown))))
+        # Node names are built from the prefix, so chains sharing one would clash.
+        if spec["prefix"] in prefixes:
+            raise ValueError("Spine prefix '%s' is used more than once." % spec["prefix"])
+        prefixes.add(spec["prefix"])
+    
+    report = {"built": [], "timings": []}
+    
+    cmds.undoInfo(openChunk=True, chunkName="buildSpines")
+    template = None
+    created = False
+    try:
+        template, created = getCtrlTemplate("spines_fk_ctrl_template")
+        for spec in specs:
+            name = spec.get("name", spec["prefix"])
+            kwargs = dict([(arg, spec[arg]) for arg in SPEC_REQUIRED + SPEC_OPTIONAL if arg in spec])
+            
+            startTime = time.time()
+            buildSpine(planCache=planCache, ctrl_template=template, **kwargs)
+            
+            report["built"].append(name)
+            report["timings"].append((name, time.time() - startTime))
+    finally:
+        # Template is removed even if a chain fails to build. One that was already in the scene is left alone.
+        if created and cmds.objExists(template):
+            cmds.delete(template)
+        cmds.undoInfo(closeChunk=True)
+    
+    return report
     
     
 def spineIKFunc(spine_root, spine_end, spine_root_ctrl, spine_end_ctrl, prefix, *pArgs):
@@ -135,7 +216,7 @@ def spineIKFunc(spine_root, spine_end, spine_root_ctrl, spine_end_ctrl, prefix,
     return newCurve
     
     
-def fkCtrlFunc(spine_root_joint, spine_end_joint, spine_end_ctrl, fk_ctrls_num, fk_limit, prefix, *pArgs):
+def fkCtrlFunc(spine_root_joint, spine_end_joint, spine_end_ctrl, fk_ctrls_num, fk_limit, prefix, ik_curve=None, planCache=None, ctrl_template=None, *pArgs):
     
     ''' Creates FK controls for a hybrid setup if settings enabled.
     
@@ -145,64 +226,135 @@ def fkCtrlFunc(spine_root_joint, spine_end_joint, spine_end_ctrl, fk_ctrls_num,
         fk_ctrls_num       : int, number of desired fk controls. Default 2.
         fk_limit           : bool, option to restrict fk controls to only the "lower" 50% of spine - avoids having FK controls in the chest area.
         prefix             : string, user-defined prefix for created nodes. Defaults to 'ik_spine_'
+        ik_curve           : string, optional spline IK curve to space the controls along. The joint chain is used if None.
+        planCache          : PlanCache, optional cache of the FK joint positions. See plan_cache.py.
+        ctrl_template      : string, optional curve to copy the FK controls from. If None, a circle is made (or an existing one reused)
+                            and removed again only if it was made here.
         
         On Exit:
             Basic IK Spine has FK controls based on the number and positioning desired by the user.'''
 
-    segment_num = (fk_ctrls_num + 1)
     fk_prefix = prefix + "fk_"
     
+    # FK joints are spaced by arc length along the spine, so they stay on it when it is curved.
+    chain = getJointList(spine_root_joint, spine_end_joint)
+    settings = {"fk_ctrls_num": fk_ctrls_num, "fk_limit": fk_limit, "on_curve": ik_curve is not None}
+    fkData = plan_cache.cachedBuildData(planCache, "spineFK", chain, settings,
+                                        lambda: calcFKPositions(chain, fk_ctrls_num, fk_limit, ik_curve))
+    fk_joints = createJointChain(fkData["positions"], fk_prefix)
+    
     # Build FK controls restricted to lower half of the joint chain
     if fk_limit == True:
-        # splitJoints script creates a chain of joints between two specified joints. Used to "split" chains into more/less joints.
-        # Used here to find the halfway point between the spine_root_joint and spine_end_joint by creating a 3 joint chain.
-        temp_joints = splitJoints(spine_root_joint, spine_end_joint, 2, "construct_joint_01", 2, 0.5)
-        
-        # FK joint chain created between root and half-point of chain, with mid-chain joints equal to number of desired controls.
-        fk_joints = splitJoints(temp_joints[0], temp_joints[1], fk_ctrls_num, fk_prefix, 2, 0.5)
-        
-        # Find end joint of FK chain, and extend to original spine_end_joint position, and parent to preceding FK chain joint.
-        fk_end_joint = cmds.joint(n="%send" % fk_prefix)
-        cmds.matchTransform(fk_end_joint, spine_end_joint)
-        cmds.FreezeTransformations(fk_end_joint)
-        cmds.parent(fk_end_joint, fk_joints[-1])
-        
-        # Cleanup
-        cmds.delete(temp_joints)
-    
-    # Build FK controls distributed equally across the joint chain  
-    else:
-        # Creates a chain of joints between two specified joints. Lecturer script.
-        fk_joints = splitJoints(spine_root_joint, spine_end_joint, segment_num, fk_prefix, 2, 0.5)
+        # End joint of FK chain extends to original spine_end_joint position, parented to preceding FK chain joint.
+        cmds.select(fk_joints[-1])
+        fk_end_joint = cmds.joint(n="%send" % fk_prefix, p=fkData["endPosition"])
+        cmds.select(clear=True)
     
     # Set orientation of FK joints.
     cmds.joint("%s" % fk_joints[0], edit=True, oj="xyz", sao= "yup" , zso=True, ch=True)
     
-    # Create and orient FK controls. Setup of offsetGroups.
-    for i in range(fk_ctrls_num):
-        circleCtrl = cmds.circle()
-        cmds.matchTransform(circleCtrl, fk_joints[i+1])
-        
-        cmds.select("%s.cv[0:7]" % circleCtrl[0])        # Orient assuming X axis is the primary.
-        cmds.rotate(0,90,0)
-        cmds.FreezeTransformations(circleCtrl)
-        
-        newGrp = cmds.group(n="%s_offsetGrp" % circleCtrl[0], w=True, em=True)
-        cmds.matchTransform(newGrp, circleCtrl[0])
-        cmds.parent(circleCtrl[0], newGrp)
-        
-        cmds.parent(newGrp, fk_joints[i])
-        cmds.parent(fk_joints[i+1], circleCtrl[0])
+    # Create FK controls with offsetGroups, copied from a circle already facing down the joints' X axis.
+    # The whole chain of controls is placed from the joints' matrices in one plan. See rig_plans.py.
+    if ctrl_template:
+        template, created = ctrl_template, False
+    else:
+        template, created = getCtrlTemplate("%sctrl_template" % fk_prefix)
+    ctrl_names = ["%sctrl%02d" % (fk_prefix, i + 1) for i in range(fk_ctrls_num)]
+    matrices = [cmds.xform(joint, q=True, ws=True, m=True) for joint in fk_joints[1:fk_ctrls_num + 1]]
+    build_plan.executePlan(rig_plans.planFKCtrls(template, ctrl_names, fk_joints, matrices))
+    if created:
+        cmds.delete(template)
         
     # Create offset group for spine_end_ctrl, constrain to penultimate FK joint. (Last one with a control).    
-    newGrp = cmds.group(n="%s_offsetGrp" % spine_end_ctrl, w=True, em=True)
-    cmds.matchTransform(newGrp, spine_end_ctrl)
-    cmds.parent(spine_end_ctrl, newGrp)
+    # The group of an earlier run is reused, with its constraint to the old FK joints replaced.
+    newGrp = createMatchedNodes([(spine_end_ctrl, "%s_offsetGrp" % spine_end_ctrl)], "transform", matchPivots=False)[0]
+    if cmds.listRelatives(spine_end_ctrl, p=True) != [newGrp.split("|")[-1]]:
+        cmds.parent(spine_end_ctrl, newGrp)
+    oldConstraints = cmds.listRelatives(newGrp, type="parentConstraint", fullPath=True)
+    if oldConstraints:
+        cmds.delete(oldConstraints)
     cmds.parentConstraint(fk_joints[-1], newGrp, maintainOffset=True)
             
    
 
-def createStretch(spine_root_joint, spine_end_joint, ik_curve, prefix, *pArgs):
+def getCtrlTemplate(name, *pArgs):
+
+    ''' On Exit: Returns (template, created). template is a hidden circle at the origin facing along X, for FK controls to be copied from.
+                An existing curve called name is reused, so several spines can share one template. created is False then, so
+                callers only delete a template they made. A node called name that isn't a curve is left alone and a new one made.'''
+    
+    if cmds.objExists(name) and cmds.listRelatives(name, shapes=True, type="nurbsCurve"):
+        return name, False
+    
+    # Maya gives the circle a free name if another node already uses name.
+    template = cmds.circle(n=name, nr=(1, 0, 0), ch=False)[0]
+    cmds.setAttr("%s.visibility" % template, 0)
+    return template, True
+    
+    
+def calcFKPositions(chain, fk_ctrls_num, fk_limit, ik_curve=None):
+
+    ''' Calculates world positions of the FK joints.
+    
+        chain              : list, joints of the spine, root first.
+        fk_ctrls_num       : int, number of fk controls.
+        fk_limit           : bool, restrict the FK joints to the first half of the spine's length.
+        ik_curve           : string, optional spline IK curve to measure along instead of the joint chain.
+        
+        On Exit: Returns dictionary of FK joint positions ("positions") and the position of the spine's end ("endPosition").
+                With fk_limit there are fk_ctrls_num + 1 positions over half the spine, otherwise fk_ctrls_num + 2 over all of it.
+        '''
+    
+    if fk_limit == True:
+        fractions = chain_math.splitFractions(fk_ctrls_num, 0.0, 0.5)
+    else:
+        fractions = chain_math.splitFractions(fk_ctrls_num + 1)
+    
+    if ik_curve is not None:
+        positions = curvePositions(ik_curve, fractions)
+    else:
+        points = [cmds.xform(joint, q=True, ws=True, t=True) for joint in chain]
+        positions = chain_math.polylinePositions(points, fractions)
+        
+    end_position = cmds.xform(chain[-1], q=True, ws=True, t=True)
+    return {"positions": positions, "endPosition": end_position}
+    
+    
+def curvePositions(curve, fractions):
+
+    ''' On Exit: Returns list of world [x, y, z] positions at the given fractions of the curve's arc length.'''
+    
+    selection = api.MSelectionList()
+    selection.add(curve)
+    curve_fn = api.MFnNurbsCurve(selection.getDagPath(0))
+    length = curve_fn.length()
+    
+    positions = []
+    for fraction in fractions:
+        point = curve_fn.getPointAtParam(curve_fn.findParamFromLength(fraction * length), api.MSpace.kWorld)
+        positions.append([point.x, point.y, point.z])
+    return positions
+    
+    
+def createJointChain(positions, name_prefix, *pArgs):
+    
+    ''' Creates a joint chain directly from world positions. Replaces the lecturer's splitJoints.
+    
+        positions          : list, [x, y, z] world position of each joint, root first.
+        name_prefix        : string, joints are named name_prefix + 01, 02 etc.
+        
+        On Exit: Returns list of the joints, root first. Each joint is parented to the previous one.
+        '''
+    
+    cmds.select(clear=True)
+    joints = []
+    for i in range(len(positions)):
+        joints.append(cmds.joint(n="%s%02d" % (name_prefix, i + 1), p=positions[i]))
+    cmds.select(clear=True)
+    return joints
+    
+    
+def createStretch(spine_root_joint, spine_end_joint, ik_curve, prefix, planCache=None, global_scale=None, *pArgs):
 
     ''' Build the systems to allow spine to stretch beyond default length.
     
@@ -210,43 +362,44 @@ def createStretch(spine_root_joint, spine_end_joint, ik_curve, prefix, *pArgs):
         spine_end_joint    : string, name of joint to use as end of spine
         ik_curve           : string, name of ik curve of the spine
         prefix             : string, user-defined prefix for created nodes. Defaults to 'ik_spine_'
+        planCache          : PlanCache, optional cache of the stretch chain data. See plan_cache.py.
+        global_scale       : string, optional global scale plug, so scaling the rig doesn't stretch the spine. (e.g "global_ctrl.globalScale")
         
         On Exit: Node-based stretch/scaling applied to spine's ik joints, if setting enabled.
         '''
     
-    # Get list of all IK joints in the spine from start to end. Function further down.        
-    joint_list = getJointList(spine_root_joint, spine_end_joint)
-    stretch_list = joint_list
-    # Remove root joint from list, as it doesn't need stretch applied to it.
-    stretch_list.pop(0)
-    
-    # Create info node and get resting length of curve (curve_length).
+    # Create info node. Its name is only known once created, so only the chain data is cached, not the plan.
     curve_info_node = cmds.arclen(ik_curve, ch=True)
-    curve_length = cmds.getAttr("%s.arcLength" % curve_info_node)
     
-    # Clear previous stretch nodes using the same prefix.
-    if cmds.objExists("%sstretch_multiDiv" % prefix) == True:
-        multiDivList = cmds.listConnections("%sstretch_multiDiv" % prefix, type="multiplyDivide")
-        if multiDivList != None:
-            for i in range(len(multiDivList)):
-                cmds.delete("%s" % multiDivList[i])
-        cmds.delete("%sstretch_multiDiv" % prefix, hierarchy="below")
-
-    # Create node to calculate stretch multipliation factor; (current curve length / resting curve length)
-    cmds.createNode("multiplyDivide", n="%sstretch_multiDiv" % prefix)
-    cmds.setAttr("%sstretch_multiDiv.operation" % prefix, 2)
-    cmds.setAttr("%sstretch_multiDiv.input2X" % prefix, curve_length)
-    cmds.connectAttr("%s.arcLength" % curve_info_node, "%sstretch_multiDiv.input1X" % prefix)
-    
-    # Connect each joint's x translation value to the scale factor.
-    for i in range(len(stretch_list)):
-        cmds.createNode("multiplyDivide", n="%s_stretch_multiDiv" % stretch_list[i])        # Create multidiv for each joint
-        xTranslate = cmds.getAttr("%s.translateX" % stretch_list[i])                        # Get resting length of joint
-        cmds.setAttr("%s_stretch_multiDiv.input1X" % stretch_list[i], xTranslate)           # Set 1x of joint multidiv to default
-        cmds.connectAttr("%sstretch_multiDiv.outputX" % prefix, "%s_stretch_multiDiv.input2X" % stretch_list[i]) # Connect scale to multiDiv node.
-        cmds.connectAttr("%s_stretch_multiDiv.outputX" % stretch_list[i], "%s.translateX" % stretch_list[i])
+    # Joints to stretch, root excluded. Always read from the scene; only their lengths are cached, keyed on the whole chain.
+    chain = getJointList(spine_root_joint, spine_end_joint)
+    stretch_joints = chain[1:]
+    stretchData = plan_cache.cachedBuildData(planCache, "spineStretch", chain, {},
+                                             lambda: calcStretchData(stretch_joints, curve_info_node))
+    
+    # Shared stretch network, see stretch.py. One node divides the curve length by global scale, and each joint's x translation
+    # is its share of the resting curve length scaled by that. Previous stretch nodes using the same prefix are cleared first.
+    stretch.createChainStretch(prefix, curve_info_node + ".arcLength", stretchData["curveLength"], stretch_joints,
+                               global_scale, restLengths=stretchData["restLengths"])
         
 
+def calcStretchData(stretch_joints, curve_info_node):
+
+    ''' Gathers the chain data the stretch network is planned from.
+    
+        stretch_joints     : list, IK joints of the spine to stretch, root excluded.
+        curve_info_node    : string, name of curveInfo node of the ik curve
+        
+        On Exit: Returns dictionary of the joints' resting x translation ("restLengths") and the resting length of the curve
+                ("curveLength"). No node names are returned, so the data can be cached and reused by any spine of the same shape.
+        '''
+    
+    rest_lengths = [cmds.getAttr("%s.translateX" % joint) for joint in stretch_joints]
+    curve_length = cmds.getAttr("%s.arcLength" % curve_info_node)
+    
+    return {"restLengths": rest_lengths, "curveLength": curve_length}
+    
+    
 def getJointList(start_joint, end_joint, *pArgs):
 
     ''' Get list of all joints in chain from end to start joint.
@@ -321,9 +474,10 @@ def updateTexField(currentTextField, *pArgs):
     # If nothing currently selected, do nothing. Otherwise, edit text field with currently selected object's name.  
     list = cmds.ls(selection = True)
     if len(list) == 0:
-        print "Error: No object selected"
+        print("Error: No object selected")
     else:    
         cmds.textField("%s" % currentTextField, edit=True, tx="%s" % list[0])
 
 
-spineGUI()
\ No newline at end of file
+if __name__ == "__main__":
+    spineGUI()
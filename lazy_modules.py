@@ -0,0 +1,50 @@
+import importlib
+
+# Lazily imported modules. The tools import Maya through here, so importing a tool (e.g. for a batch job on the farm)
+# costs nothing until it first calls Maya, and works outside Maya as long as nothing is called:
+#     from lazy_modules import cmds, mel, api
+#
+# Optional dependencies are loaded with optionalModule(), which returns None if they aren't installed.
+
+
+class LazyModule(object):
+    ''' Stands in for a module, importing it on first attribute access.
+
+        name  : string, full name of the module. (e.g "maya.cmds")'''
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return "<lazy module '%s' (%s)>" % (self._name, state)
+
+
+cmds = LazyModule("maya.cmds")
+mel = LazyModule("maya.mel")
+api = LazyModule("maya.api.OpenMaya")
+
+optionalModules = {}         # Module name -> module, or None if it could not be imported.
+
+
+def optionalModule(name):
+    ''' On Exit: Returns the named module, imported on first use, or None if it isn't installed. Later calls are free.'''
+
+    if name not in optionalModules:
+        try:
+            optionalModules[name] = importlib.import_module(name)
+        except ImportError:
+            optionalModules[name] = None
+    return optionalModules[name]
@@ -1,4 +1,4 @@
-import maya.cmds as cmds
+from lazy_modules import cmds
 
 def toggleLRA(*pArgs):
     list = cmds.ls(selection = True)                        # Get a list of selected objs.
@@ -1,4 +1,4 @@
-import maya.cmds as cmds
+from lazy_modules import cmds
 import functools
 
 # This script simply wraps Maya's default transformation/pivot matching functions into a single window.
@@ -70,4 +70,5 @@ def createMatchGUI():
     cmds.showWindow(myWin)
     
     
-createMatchGUI()
\ No newline at end of file
+if __name__ == "__main__":
+    createMatchGUI()
@@ -1,5 +1,29 @@
-import maya.cmds as cmds
+from lazy_modules import cmds, api
 from functools import partial
+import fnmatch
+import json
+import os
+import shape_library
+import build_plan
+import rig_plans
+
+# Override colour index of controls on each side, by name prefix. Used by colourBySide.
+SIDE_COLOURS = {"l_": 6,        # Blue
+                "r_": 13,       # Red
+                "c_": 17}       # Yellow
+
+# File path needs to be updated to wherever the Shapes folder has been saved!
+SHAPES_DIR = "D:/Important Documents/Maya/My Scripts/Shapes/"
+SHAPE_LIBRARY = SHAPES_DIR + "shapes.rmsl"     # Binary library of every shape, see shape_library.py. .ma files are the fallback.
+
+# Drawing override attributes of a shape, carried over when replaceShape swaps a control's shapes.
+OVERRIDE_ATTRS = ["overrideEnabled", "overrideRGBColors", "overrideColor", "overrideColorRGB"]
+
+STYLE_ATTR = "ctrlStyle"        # String attribute recording the shape and colour restyleRig last gave a control.
+
+shapeCache = {}                 # Shape name (e.g "Circle") -> list of curve data dictionaries. See readCurveData.
+libraryLoaded = False           # SHAPE_LIBRARY has been read into shapeCache.
+controlIndex = {}               # Control long name -> {"name", "tokens", "shapes"}. See indexControls.
 
 
 def createCtrlGUI():
@@ -63,8 +87,15 @@ def createCtrlGUI():
 
 
 def importShape(shapeFile, *pArgs):
-    # File path needs to be updated to wherever the Shapes folder has been saved!
-    filepath = "D:/Important Documents/Maya/My Scripts/Shapes/" + shapeFile
+    ''' Creates a control from the shape library, or by importing its .ma file if the library doesn't have it.
+    
+        shapeFile : string, shape file name. (e.g "Circle.ma")'''
+    
+    shapeName = os.path.splitext(shapeFile)[0]
+    if shapeName in loadShapeLibrary():
+        return createShapeControl(shapeName)
+    
+    filepath = SHAPES_DIR + shapeFile
     cmds.file("%s" % filepath, i=True, dns=True) 
 
     
@@ -92,50 +123,312 @@ def colUpdate(*pArgs):
         All curves of selected shapes are updated to the selected colour.'''
 
     tracker = cmds.optionMenu("colDropdown", q=True, value=True) 
-    shapeList = cmds.ls(sl=True)
     
-
-    for i in range(len(shapeList)):
-        # Enable colour override for selected options if not enabled already.
-        cmds.setAttr("%s.overrideEnabled" % shapeList[i], 1)
+    # Query the colour provided by the index/rgb slider once, and apply it to the shapes of everything selected.
+    if tracker == "Index":
+        index = cmds.colorIndexSliderGrp("index", q=True, value=True)
+        setControlColours(cmds.ls(sl=True), index=index-1)
         
-        # Query the colour provided by the index/rgb slider, set the RGB/Index mode in the shape's attributes to match
-        # the one used in the GUI, and apply the colour appropriately.
- 
-        if tracker == "Index":
-            index = cmds.colorIndexSliderGrp("index", q=True, value=True)
-            cmds.setAttr("%s.overrideRGBColors" % shapeList[i], 0)
-            cmds.setAttr("%s.overrideColor" % shapeList[i], index-1)
-            
-        if tracker == "RGB":
-            rgb = cmds.colorSliderGrp("rgb", q=True, rgbValue=True)
-            cmds.setAttr("%s.overrideRGBColors" % shapeList[i], 1)
-            
-            cmds.setAttr("%s.overrideColorRGB" % shapeList[i], rgb[0], rgb[1], rgb[2])
+    if tracker == "RGB":
+        rgb = cmds.colorSliderGrp("rgb", q=True, rgbValue=True)
+        setControlColours(cmds.ls(sl=True), rgb=rgb)
+        
+        
+def controlShapes(controls, *pArgs):
+    ''' On Exit: Returns long names of the curve shapes of controls, in one query. Shapes given directly are kept.'''
+    
+    if not controls:
+        return []
+    shapes = cmds.ls(controls, type="nurbsCurve", long=True) or []
+    shapes += cmds.listRelatives(controls, shapes=True, noIntermediate=True, type="nurbsCurve", fullPath=True) or []
+    return shapes
+    
+    
+def findControls(pattern="*", side=None, *pArgs):
+    ''' Finds controls (transforms with curve shapes) in the scene by name.
+    
+        pattern : string, wildcard pattern control names must match. (e.g "*_ctrl")
+        side : string, optional name prefix the controls must start with. (e.g "l_")
+        
+        On Exit: Returns list of long names of the matching controls, so equal short names in different hierarchies stay distinct.'''
+    
+    shapes = cmds.ls(type="nurbsCurve", noIntermediate=True, long=True) or []
+    controls = cmds.listRelatives(shapes, parent=True, fullPath=True) if shapes else []
+    
+    found = []
+    for control in sorted(set(controls or [])):
+        name = control.split("|")[-1]
+        if side and not name.startswith(side):
+            continue
+        if fnmatch.fnmatchcase(name, pattern):
+            found.append(control)
+    return found
+    
+    
+def setControlColours(controls, index=None, rgb=None, *pArgs):
+    ''' Sets the colour of many controls at once. Overrides are set on their shapes, not the transforms.
+    
+        controls : list, controls (or curve shapes) to colour.
+        index : int, override colour index (0-31). Used when rgb is None.
+        rgb : list, [r, g, b] colour, 0-1.
+        
+        On Exit: Shapes are resolved in one query and coloured by a single plan, as one undo step. Returns the shapes coloured.'''
+    
+    shapes = controlShapes(controls)
+    if shapes:
+        build_plan.executePlan(rig_plans.planColourOverrides(shapes, index, rgb))
+    return shapes
+    
+    
+def colourBySide(pattern="*", sideColours=None, *pArgs):
+    ''' Colours every control in the scene by its side prefix.
+    
+        pattern : string, wildcard pattern control names must match.
+        sideColours : dict, name prefix -> colour index. Defaults to SIDE_COLOURS.
+        
+        On Exit: Returns dictionary of side prefix -> number of shapes coloured. All sides are one undo step.'''
+    
+    if sideColours is None:
+        sideColours = SIDE_COLOURS
+    
+    controls = findControls(pattern)
+    plan = build_plan.BuildPlan("colourBySide")
+    counts = {}
+    for side in sideColours:
+        shapes = controlShapes([control for control in controls if control.split("|")[-1].startswith(side)])
+        plan.extend(rig_plans.planColourOverrides(shapes, sideColours[side]))
+        counts[side] = len(shapes)
+    
+    build_plan.executePlan(plan)
+    return counts
         
         
 def cvSelect(*pArgs):
-    ''' Allows selection of all of first input nurbsShape's CVs
+    ''' Allows selection of all CVs of the selected nurbs controls
     
-        On Exit: All CVs of first given shape are selected and active.'''
-
-    # Get list of all selected objs, and clear selection 
-    selected = cmds.ls(sl=True)
-    cmds.select(clear=True)
+        On Exit: All CVs of every shape of the selected controls are selected and active, in one select call.
+                cv[*] lets Maya resolve the CV range itself, so periodic and open curves both get exactly their own CVs
+                without querying spans/degree per shape.'''
 
-    # Gets list of shapes in first nurb object
-    for i in range(len(selected)):
-        shapes = cmds.listRelatives(selected[0], s=True) 
-
-        for i in range(len(shapes)):
-            # Get spans and degrees of each shape to calculate num of CVs, and select them additively.
-
-            spans = cmds.getAttr("%s.spans" % shapes[i])
-            degree = cmds.getAttr("%s.degree" % shapes[i])
-            numCVs = (spans+degree) - 1
+    shapes = controlShapes(cmds.ls(sl=True))
+    if shapes:
+        cmds.select(["%s.cv[*]" % shape for shape in shapes], replace=True)
+    else:
+        cmds.select(clear=True)
+        
+        
+def readCurveData(shape, *pArgs):
+    ''' On Exit: Returns dictionary of a curve shape's "degree", "periodic", object space "cvs" and "knots", enough to rebuild it.'''
+    
+    selection = api.MSelectionList()
+    selection.add(shape)
+    curve_fn = api.MFnNurbsCurve(selection.getDagPath(0))
+    
+    return {"degree": curve_fn.degree,
+            "periodic": curve_fn.form == api.MFnNurbsCurve.kPeriodic,
+            "cvs": [[point.x, point.y, point.z] for point in curve_fn.cvPositions(api.MSpace.kObject)],
+            "knots": list(curve_fn.knots())}
+    
+    
+def loadShapeLibrary(reload=False, *pArgs):
+    ''' On Exit: Returns shapeCache, with every shape of SHAPE_LIBRARY read into it by one memory-mapped read on first use.
+                If the library can't be read, a warning is given and shapes are imported from their .ma files instead.'''
+    
+    global libraryLoaded
+    if reload or not libraryLoaded:
+        if os.path.isfile(SHAPE_LIBRARY):
+            try:
+                shapeCache.update(shape_library.readLibrary(SHAPE_LIBRARY))
+            except (ValueError, IOError, OSError) as error:
+                cmds.warning("Shape library %s could not be read, using the .ma files instead. (%s)" % (SHAPE_LIBRARY, error))
+        libraryLoaded = True
+    return shapeCache
+    
+    
+def exportShapeLibrary(controls, path=None, merge=True, *pArgs):
+    ''' Captures the curve shapes of controls into the binary shape library.
+    
+        controls : list, controls to export. Each is stored under its name. (e.g a control called "Circle" as "Circle")
+        path : string, library file to write. Defaults to SHAPE_LIBRARY.
+        merge : bool, keep the shapes already in the library, replacing only those exported again.
+        
+        On Exit: Returns list of the shape names in the written library.'''
+    
+    if path is None:
+        path = SHAPE_LIBRARY
+    
+    shapes = {}
+    if merge and os.path.isfile(path):
+        shapes = shape_library.readLibrary(path)
+    for control in controls:
+        shapes[control.split("|")[-1]] = [readCurveData(shape) for shape in controlShapes([control])]
+    
+    shape_library.writeLibrary(path, shapes)
+    if path == SHAPE_LIBRARY:
+        shapeCache.update(shapes)
+    return sorted(shapes)
+    
+    
+def createShapeControl(shapeName, name=None, *pArgs):
+    ''' Creates a control straight from cached shape data, without importing a file. Works in a headless session.
+    
+        shapeName : string, shape to create. (e.g "Circle")
+        name : string, name of the new control. Defaults to shapeName.
+        
+        On Exit: Returns the new control at the origin.'''
+    
+    control = cmds.createNode("transform", name=name or shapeName, skipSelect=True)
+    replaceShape(control, loadShape(shapeName))
+    return control
+    
+    
+def loadShape(shapeName, *pArgs):
+    ''' Reads the curves of a control shape from the shape library, or the Shapes folder. (e.g "Circle" for Circle.ma)
+    
+        On Exit: Returns list of curve data dictionaries, one per curve of the shape. Shapes missing from the library are
+                imported from their .ma file once per session; the imported nodes are deleted again and the data is kept in shapeCache.'''
+    
+    loadShapeLibrary()
+    if shapeName not in shapeCache:
+        newNodes = cmds.file(SHAPES_DIR + shapeName + ".ma", i=True, dns=True, returnNewNodes=True) or []
+        curves = cmds.ls(newNodes, type="nurbsCurve", noIntermediate=True, long=True)
+        shapeCache[shapeName] = [readCurveData(curve) for curve in curves]
+        cmds.delete([node for node in cmds.ls(newNodes, long=True) if cmds.objExists(node)])
+    return shapeCache[shapeName]
+    
+    
+def replaceShape(control, curves, *pArgs):
+    ''' Swaps the curve shapes of a control for new ones built from curve data.
+    
+        control : string, control transform.
+        curves : list, curve data dictionaries. See readCurveData.
+        
+        On Exit: Returns long names of the new shapes, named [control]Shape, [control]Shape1...
+                The colour override of the old shapes is carried over to the new ones.'''
+    
+    oldShapes = cmds.listRelatives(control, shapes=True, type="nurbsCurve", fullPath=True) or []
+    name = control.split("|")[-1]
+    
+    # Old shapes go first, so the new ones can take their names. Their override is kept to colour the new shapes.
+    override = None
+    if oldShapes:
+        override = dict([(attr, cmds.getAttr("%s.%s" % (oldShapes[0], attr))) for attr in OVERRIDE_ATTRS])
+        cmds.delete(oldShapes)
+    
+    newShapes = []
+    for i in range(len(curves)):
+        curve = curves[i]
+        temp = cmds.curve(d=curve["degree"], p=curve["cvs"], k=curve["knots"], per=curve["periodic"])
+        shape = cmds.listRelatives(temp, shapes=True, fullPath=True)[0]
+        shape = cmds.parent(shape, control, relative=True, shape=True)[0]
+        shape = cmds.rename(shape, "%sShape%s" % (name, i if i else ""))
+        cmds.delete(temp)
+        newShapes.append(shape)
+    
+    newShapes = cmds.ls(newShapes, long=True)
+    if override and override["overrideEnabled"]:
+        rgb = override["overrideColorRGB"][0] if override["overrideRGBColors"] else None
+        build_plan.executePlan(rig_plans.planColourOverrides(newShapes, override["overrideColor"], rgb), undoChunk=False)
+    return newShapes
+    
+    
+def indexControls(pattern="*", *pArgs):
+    ''' Builds the control index used by restyleRig, in one traversal of the scene's curves.
+    
+        pattern : string, wildcard pattern control names must match.
+        
+        On Exit: Returns controlIndex, refilled with every matching control. Each entry holds its short "name", the "tokens"
+                of that name split on "_" (e.g "l", "arm", "fk", "ctrl"), and its curve "shapes".'''
+    
+    controlIndex.clear()
+    for shape in cmds.ls(type="nurbsCurve", noIntermediate=True, long=True) or []:
+        # Parent comes from the long name, so no query is needed per shape.
+        control = shape.rsplit("|", 1)[0]
+        name = control.split("|")[-1]
+        if not fnmatch.fnmatchcase(name, pattern):
+            continue
+        if control not in controlIndex:
+            controlIndex[control] = {"name": name, "tokens": set(name.split("_")), "shapes": []}
+        controlIndex[control]["shapes"].append(shape)
+    return controlIndex
+    
+    
+def ruleMatches(rule, entry, *pArgs):
+    ''' On Exit: Returns True if a control index entry matches every condition of a restyle rule. See restyleRig.'''
+    
+    if "pattern" in rule and not fnmatch.fnmatchcase(entry["name"], rule["pattern"]):
+        return False
+    if "side" in rule and not entry["name"].startswith(rule["side"]):
+        return False
+    if "type" in rule and rule["type"] not in entry["tokens"]:
+        return False
+    return True
+    
+    
+def restyleRig(rules, pattern="*", refreshIndex=True, *pArgs):
+    ''' Applies shapes and colours to every control of a rig from rules, without the GUI.
+    
+        rules : list, rule dictionaries applied in order, later rules overriding earlier ones. Conditions, all optional:
+                "pattern" (wildcard on the name), "side" (name prefix, e.g "l_") and "type" (a "_" separated token of the name,
+                e.g "fk"). Results: "shape" (file in the Shapes folder, e.g "Circle"), "colour" (override index) or "rgb".
+                e.g [{"side": "l_", "colour": 6}, {"side": "r_", "colour": 13}, {"type": "fk", "shape": "Circle"}]
+        pattern : string, wildcard pattern control names must match.
+        refreshIndex : bool, rebuild the control index first. False reuses the index of the last pass.
+        
+        On Exit:
+            Controls whose style differs from the one recorded on them are reshaped and recoloured, in one undo chunk.
+            Returns dictionary with the number of "controls" matched and "changed", "reshaped" and "recoloured".'''
+    
+    if refreshIndex or not controlIndex:
+        indexControls(pattern)
+    
+    # Style each control was last given, from one listing of the attribute instead of a query per control.
+    # Searched recursively, so controls of referenced or namespaced rigs are found too.
+    styled = set([plug.rsplit(".", 1)[0] for plug in cmds.ls("*." + STYLE_ATTR, long=True, recursive=True) or []])
+    
+    report = {"controls": 0, "changed": 0, "reshaped": 0, "recoloured": 0}
+    plan = build_plan.BuildPlan("restyleRig")
+    
+    cmds.undoInfo(openChunk=True, chunkName="restyleRig")
+    try:
+        for control in sorted(controlIndex):
+            entry = controlIndex[control]
+            if not fnmatch.fnmatchcase(entry["name"], pattern):
+                continue
+            report["controls"] += 1
+            
+            style = {}
+            for rule in rules:
+                if ruleMatches(rule, entry):
+                    style.update([(key, rule[key]) for key in ("shape", "colour", "rgb") if key in rule])
+            if not style:
+                continue
+            
+            styleString = json.dumps(style, sort_keys=True)
+            previous = cmds.getAttr("%s.%s" % (control, STYLE_ATTR)) if control in styled else None
+            if previous == styleString:
+                continue
+            report["changed"] += 1
             
-            cmds.select("%s.cv[0:%i]" % (shapes[i], numCVs), add=True)
+            if "shape" in style and (previous is None or json.loads(previous).get("shape") != style["shape"]):
+                entry["shapes"] = replaceShape(control, loadShape(style["shape"]))
+                report["reshaped"] += 1
+            
+            if "colour" in style or "rgb" in style:
+                plan.extend(rig_plans.planColourOverrides(entry["shapes"], style.get("colour"), style.get("rgb")))
+                report["recoloured"] += 1
+            
+            if control not in styled:
+                plan.addAttr(control, STYLE_ATTR, dataType="string")
+            plan.setAttr("%s.%s" % (control, STYLE_ATTR), styleString, "string")
         
+        build_plan.executePlan(plan, undoChunk=False)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+    
+    return report
+    
+    
 def closeWindow(myWin, *pArgs ):
 
     ''' Close gui window
@@ -145,4 +438,5 @@ def closeWindow(myWin, *pArgs ):
     if cmds.window(myWin, exists=True):
         cmds.deleteUI(myWin) 
         
-createCtrlGUI()
\ No newline at end of file
+if __name__ == "__main__":
+    createCtrlGUI()
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+
+
+# On-disk cache of computed build data, keyed by a fingerprint of the input skeleton.
+# Characters sharing skeleton proportions (and build settings) share an entry, so a rebuild can skip straight from
+# the cached orientation/length/placement data and plans to execution.
+#
+# Caching is off until a cache is given to a builder, or set as the default:
+#     import plan_cache
+#     plan_cache.setDefaultCache(plan_cache.PlanCache("D:/rig_cache", maxBytes=32 * 1024 * 1024))
+
+defaultCache = None          # PlanCache used by the builders when one isn't passed in.
+
+MATRIX_PRECISION = 5         # Decimal places world matrices are rounded to before fingerprinting.
+
+
+class PlanCache(object):
+    ''' Directory of JSON entries with least-recently-used eviction.
+
+        directory   : string, folder to hold the cache. Created if it doesn't exist.
+        maxBytes    : int, total size the cache is trimmed to after every write.
+        maxEntries  : int, number of entries the cache is trimmed to after every write.'''
+
+    def __init__(self, directory, maxBytes=64 * 1024 * 1024, maxEntries=1000):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        ''' On Exit: Returns the data stored under key, or None. A hit marks the entry as most recently used.'''
+
+        path = self.entryPath(key)
+        try:
+            with open(path, "r") as entryFile:
+                data = json.load(entryFile)
+        except (IOError, OSError, ValueError):
+            # Missing, or half-written by a crashed session. Either way treat it as a miss.
+            self.misses += 1
+            return None
+
+        # Modification time is used as the "last used" time for eviction.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        ''' Stores JSON-serializable data under key, then evicts least recently used entries over the caps.'''
+
+        path = self.entryPath(key)
+        tempPath = "%s.%i.tmp" % (path, os.getpid())
+        with open(tempPath, "w") as entryFile:
+            json.dump(data, entryFile)
+
+        # Written to a temporary file first so other sessions never read a partial entry.
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(tempPath, path)
+
+        self.evict()
+
+    def fetch(self, key, computeFunc):
+        ''' On Exit: Returns the data stored under key. On a miss computeFunc() is called and its result stored.'''
+
+        data = self.get(key)
+        if data is None:
+            data = computeFunc()
+            self.put(key, data)
+        return data
+
+    def entries(self):
+        ''' On Exit: Returns list of (last used time, size in bytes, path) of every entry, least recently used first.'''
+
+        entries = []
+        for fileName in os.listdir(self.directory):
+            if not fileName.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, fileName)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+
+        entries.sort()
+        return entries
+
+    def evict(self):
+        ''' Removes least recently used entries until the cache is within maxBytes and maxEntries.
+
+            On Exit: Returns number of entries removed.'''
+
+        entries = self.entries()
+        totalBytes = sum([entry[1] for entry in entries])
+        removed = 0
+
+        while entries and (totalBytes > self.maxBytes or len(entries) > self.maxEntries):
+            lastUsed, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            totalBytes -= size
+            removed += 1
+
+        return removed
+
+    def clear(self):
+        for lastUsed, size, path in self.entries():
+            os.remove(path)
+
+
+def setDefaultCache(cache):
+    ''' Sets the cache used by builders when none is passed in. None turns default caching off.'''
+
+    global defaultCache
+    defaultCache = cache
+
+
+def fingerprint(kind, matrices, settings):
+    ''' Builds a cache key from the input skeleton and build settings.
+
+        kind      : string, which builder the data is for. (e.g "ribbon")
+        matrices  : list, world matrices (16 floats each) of the input joints/locators, in a fixed order.
+        settings  : dict or list, every other setting that changes the computed data.
+
+        On Exit:
+        Returns hex digest. Matrices are rounded to MATRIX_PRECISION decimals so float noise doesn't cause misses.'''
+
+    rounded = [[round(value, MATRIX_PRECISION) + 0.0 for value in matrix] for matrix in matrices]
+    data = json.dumps([kind, rounded, settings], sort_keys=True)
+    return kind + "_" + hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def sampleMatrices(nodes):
+    ''' On Exit: Returns list of world matrices of the given nodes. Needs Maya.'''
+
+    import maya.cmds as cmds
+
+    return [cmds.xform(node, q=True, m=True, ws=True) for node in nodes]
+
+
+def cachedBuildData(cache, kind, nodes, settings, computeFunc):
+    ''' Shared helper for the builders.
+
+        cache        : PlanCache, or None to use defaultCache.
+        kind         : string, which builder the data is for.
+        nodes        : list, input joints/locators making up the skeleton fingerprint.
+        settings     : dict, build settings making up the rest of the fingerprint.
+        computeFunc  : function, computes the data when it isn't cached. Must return JSON-serializable data.
+
+        On Exit:
+        Returns the computed (or cached) build data. Without any cache, computeFunc is simply called.'''
+
+    if cache is None:
+        cache = defaultCache
+    if cache is None:
+        return computeFunc()
+
+    key = fingerprint(kind, sampleMatrices(nodes), settings)
+    return cache.fetch(key, computeFunc)
@@ -0,0 +1,406 @@
+import random
+import time
+
+import build_plan
+import rig_plans
+
+# Maya-side checks for alternative build methods and node networks. Each benchmark builds the variants it compares in
+# the open scene, checks they give the same results, then times them. Run from the Maya script editor in an empty scene:
+#     import rig_benchmarks
+#     print(rig_benchmarks.benchmarkFootScale(numFeet=400))
+#     print(rig_benchmarks.benchmarkOffsetGrps(numFeet=50))
+#     print(rig_benchmarks.benchmarkRibbonDeformers())
+#     print(rig_benchmarks.benchmarkChainStretch())
+#     print(rig_benchmarks.benchmarkStretchSwitch())
+#
+# Each benchmark returns a report dictionary. Nodes it creates are deleted afterwards unless keep=True.
+
+
+def timeEvaluation(nodes, drivenPlugs, samples):
+    ''' Times evaluation of a network by dirtying its nodes and pulling on the driven plugs.
+
+        nodes        : list, nodes of the network being timed.
+        drivenPlugs  : list, plugs the network drives. Evaluating them forces the network to compute.
+        samples      : int, number of times to dirty and evaluate the network.
+
+        On Exit: Returns seconds taken. Only two commands are issued per sample, so node count dominates the result.'''
+
+    import maya.cmds as cmds
+
+    startTime = time.time()
+    for i in range(samples):
+        cmds.dgdirty(nodes)
+        cmds.dgeval(drivenPlugs)
+    return time.time() - startTime
+
+
+def createFootStandIns(footCtrl):
+    ''' Creates the footCtrl and locators planFootAttrs expects, without building the rest of the foot.
+
+        On Exit: Returns list of every node created, footCtrl first.'''
+
+    import maya.cmds as cmds
+
+    nodes = [cmds.createNode("transform", name=footCtrl, skipSelect=True)]
+    for name in ["heel", "ball", "toe", "toeWiggle", "ballPivot"]:
+        nodes.append(cmds.createNode("transform", name="%s_%s_loc" % (footCtrl, name), skipSelect=True))
+    return nodes
+
+
+def benchmarkFootScale(numFeet=400, samples=100, tolerance=1e-5, keep=False):
+    ''' Compares the per-slider and packed multiplier networks of ik_foot.setupAttrs.
+
+        numFeet    : int, number of feet built with each network.
+        samples    : int, number of evaluations timed.
+        tolerance  : float, largest difference allowed between the networks' driven values.
+        keep       : bool, leave the benchmark nodes in the scene.
+
+        On Exit:
+        Returns dictionary with "nodes" (multiplyDivide count per foot of each network), "seconds" (evaluation time of
+        each network) and "maxDifference" (largest difference between driven channels for the same slider values).
+        Raises RuntimeError if the networks disagree by more than tolerance.'''
+
+    import maya.cmds as cmds
+
+    report = {"nodes": {}, "seconds": {}, "maxDifference": 0.0}
+    created = []
+    variants = {}
+
+    for packed in (False, True):
+        label = "packed" if packed else "perSlider"
+        drivers = []
+        drivenPlugs = []
+        scaleNodes = []
+
+        for i in range(numFeet):
+            footCtrl = "bench_%s_foot%i" % (label, i)
+            nodes = createFootStandIns(footCtrl)
+            created.extend(nodes)
+
+            plan = rig_plans.planFootAttrs(footCtrl, nodes[1], nodes[2], nodes[3], nodes[4], nodes[5], packed=packed)
+            build_plan.executePlan(plan, undoChunk=False)
+            created.extend(plan.createdNodes())
+            scaleNodes.extend(plan.createdNodes())
+            report["nodes"][label] = plan.summary()["nodes"]["multiplyDivide"]
+
+            drivers.extend([footCtrl + "." + slider for slider in rig_plans.FOOT_SLIDERS])
+            drivenPlugs.extend(rig_plans.footSliderTargets(nodes[1], nodes[2], nodes[3], nodes[4], nodes[5]))
+
+        variants[label] = (drivers, drivenPlugs, scaleNodes)
+
+    # Numeric equivalence. Both networks get the same slider and Multiplier values.
+    perSliderDrivers, perSliderDriven, perSliderNodes = variants["perSlider"]
+    packedDrivers, packedDriven, packedNodes = variants["packed"]
+    for i in range(len(perSliderDrivers)):
+        value = random.uniform(-90, 90)
+        cmds.setAttr(perSliderDrivers[i], value)
+        cmds.setAttr(packedDrivers[i], value)
+    for i in range(numFeet):
+        multiplier = random.uniform(0.5, 5)
+        cmds.setAttr("bench_perSlider_foot%i.Multiplier" % i, multiplier)
+        cmds.setAttr("bench_packed_foot%i.Multiplier" % i, multiplier)
+
+    for i in range(len(perSliderDriven)):
+        difference = abs(cmds.getAttr(perSliderDriven[i]) - cmds.getAttr(packedDriven[i]))
+        report["maxDifference"] = max(report["maxDifference"], difference)
+
+    for label in variants:
+        drivers, drivenPlugs, scaleNodes = variants[label]
+        report["seconds"][label] = timeEvaluation(scaleNodes, drivenPlugs, samples)
+
+    if not keep:
+        cmds.delete([node for node in created if cmds.objExists(node)])
+
+    if report["maxDifference"] > tolerance:
+        raise RuntimeError("Packed foot multiplier network differs from the per-slider network by %f." % report["maxDifference"])
+
+    return report
+
+
+def createLocatorChain(name, count):
+    ''' Creates a chain of randomly placed locators, each parented under the last, like the IK Foot locator hierarchy.
+
+        On Exit: Returns list of the locators, root first.'''
+
+    import maya.cmds as cmds
+
+    locators = []
+    for i in range(count):
+        loc = cmds.spaceLocator(name="%s_loc%i" % (name, i))[0]
+        cmds.xform(loc, ws=True, t=[random.uniform(-10, 10) for axis in range(3)], ro=[random.uniform(-90, 90) for axis in range(3)])
+        if locators:
+            cmds.parent(loc, locators[-1])
+        locators.append(loc)
+    return locators
+
+
+def benchmarkOffsetGrps(numFeet=50, locsPerFoot=10, tolerance=1e-5, keep=False):
+    ''' Compares offset group creation by select + makeGrpFunc per locator against create_group.makeOffsetGrps.
+
+        numFeet      : int, number of locator hierarchies built for each method.
+        locsPerFoot  : int, number of locators given offset groups per foot. The IK Foot uses 10.
+        tolerance    : float, largest difference allowed between the world matrices the two methods leave.
+        keep         : bool, leave the benchmark nodes in the scene.
+
+        On Exit:
+        Returns dictionary with "seconds" (total time of each method), "savedPerFoot" (seconds saved per foot by makeOffsetGrps)
+        and "maxDifference" (largest difference between locator and group world matrices of the two methods).
+        Raises RuntimeError if the methods disagree by more than tolerance.'''
+
+    import maya.cmds as cmds
+    from create_group import makeGrpFunc, makeOffsetGrps
+
+    report = {"seconds": {}, "savedPerFoot": 0.0, "maxDifference": 0.0}
+    roots = []
+    feet = {"selection": [], "batched": []}
+
+    for i in range(numFeet):
+        state = random.getstate()
+        for label in feet:
+            # Same random placement for both methods.
+            random.setstate(state)
+            locators = createLocatorChain("bench_%s_foot%i" % (label, i), locsPerFoot)
+            roots.append(locators[0])
+            feet[label].append(locators)
+
+    startTime = time.time()
+    for locators in feet["selection"]:
+        for loc in locators:
+            cmds.select(loc)
+            makeGrpFunc()
+    report["seconds"]["selection"] = time.time() - startTime
+
+    startTime = time.time()
+    for locators in feet["batched"]:
+        makeOffsetGrps(locators)
+    report["seconds"]["batched"] = time.time() - startTime
+
+    report["savedPerFoot"] = (report["seconds"]["selection"] - report["seconds"]["batched"]) / numFeet
+
+    for i in range(numFeet):
+        for j in range(locsPerFoot):
+            for suffix in ["", "_offsetGrp"]:
+                selectionMatrix = cmds.xform(feet["selection"][i][j] + suffix, q=True, ws=True, m=True)
+                batchedMatrix = cmds.xform(feet["batched"][i][j] + suffix, q=True, ws=True, m=True)
+                for k in range(16):
+                    report["maxDifference"] = max(report["maxDifference"], abs(selectionMatrix[k] - batchedMatrix[k]))
+
+    if not keep:
+        cmds.delete([cmds.listRelatives(root, p=True)[0] for root in roots])
+
+    if report["maxDifference"] > tolerance:
+        raise RuntimeError("makeOffsetGrps differs from makeGrpFunc by %f." % report["maxDifference"])
+
+    return report
+
+
+def createBenchChain(name, numJoints=3, length=10.0):
+    ''' Creates a straight joint chain along world X, for building ribbons on.
+
+        On Exit: Returns list of the joints, root first.'''
+
+    import maya.cmds as cmds
+
+    cmds.select(cl=True)
+    joints = [cmds.joint(n="%s_jnt%i" % (name, i), p=(i * length, 0, 0)) for i in range(numJoints)]
+    cmds.select(cl=True)
+    return joints
+
+
+def benchmarkRibbonDeformers(samples=100, tolerance=1e-4, keep=False):
+    ''' Compares the blendShape and direct twist/sine setups of bendy.addDeformers on the same ribbon.
+
+        samples    : int, number of evaluations timed.
+        tolerance  : float, largest difference allowed between ribbon CVs of the two setups, with only twist active.
+        keep       : bool, leave the benchmark ribbons in the scene.
+
+        On Exit:
+        Returns dictionary with "seconds" (evaluation time of each setup with twist and sine active) and "maxDifference"
+        (largest CV difference with only twist active). Raises RuntimeError if that is over tolerance.
+        Both setups are built switched off, so the blendShape weights and direct envelopes are turned on first.
+        Twist and sine add under the blendShape but stack when direct, so they are only compared one at a time.'''
+
+    import maya.cmds as cmds
+    import bendy
+
+    report = {"seconds": {}, "maxDifference": 0.0}
+    ribbons = {}
+    created = []
+
+    for mode in ("blendShape", "direct"):
+        prefix = "bench_%s_" % mode
+        joints = createBenchChain(prefix)
+        created.append(joints[0])
+
+        before = set(cmds.ls(assemblies=True))
+        bendy.bendyMain(prefix, joints[0], joints[-1], 1, 2, 1.0, True, True, True, True, mode)
+        created.extend([node for node in cmds.ls(assemblies=True) if node not in before])
+
+        history = cmds.listHistory(prefix + "ribbon")
+        deformers = cmds.ls(history, type="nonLinear")
+        ribbons[mode] = (prefix + "ribbon", deformers)
+
+        # Switch both setups fully on.
+        for blendShape in cmds.ls(history, type="blendShape"):
+            for i in range(len(cmds.blendShape(blendShape, q=True, weight=True))):
+                cmds.setAttr("%s.weight[%i]" % (blendShape, i), 1)
+        if mode == "direct":
+            for deformer in deformers:
+                cmds.setAttr(deformer + ".envelope", 1)
+
+        for deformer in deformers:
+            if cmds.attributeQuery("startAngle", node=deformer, exists=True):
+                cmds.setAttr(deformer + ".startAngle", 60)
+            else:
+                cmds.setAttr(deformer + ".amplitude", 0)
+
+    cvs = {}
+    for mode in ribbons:
+        cvs[mode] = cmds.xform(ribbons[mode][0] + ".cv[*][*]", q=True, ws=True, t=True)
+    for i in range(len(cvs["direct"])):
+        report["maxDifference"] = max(report["maxDifference"], abs(cvs["direct"][i] - cvs["blendShape"][i]))
+
+    for mode in ribbons:
+        ribbon, deformers = ribbons[mode]
+        for deformer in deformers:
+            if cmds.attributeQuery("amplitude", node=deformer, exists=True):
+                cmds.setAttr(deformer + ".amplitude", 0.3)
+        report["seconds"][mode] = timeEvaluation(deformers, [ribbon + ".worldSpace[0]"], samples)
+
+    if not keep:
+        cmds.delete([node for node in created if cmds.objExists(node)])
+
+    if report["maxDifference"] > tolerance:
+        raise RuntimeError("Direct ribbon deformers differ from the blendShape setup by %f." % report["maxDifference"])
+
+    return report
+
+
+def benchmarkChainStretch(numChains=100, numJoints=12, samples=100, tolerance=1e-5, keep=False):
+    ''' Compares the per-joint multiplyDivide stretch fan-out against the packed, global scale aware network of stretch.py.
+
+        numChains  : int, number of joint chains built with each network.
+        numJoints  : int, joints per chain.
+        samples    : int, number of evaluations timed.
+        tolerance  : float, largest difference allowed between the joints' stretched translateX, at a global scale of 1.
+        keep       : bool, leave the benchmark nodes in the scene.
+
+        On Exit:
+        Returns dictionary with "nodes" (multiplyDivide count per chain of each network), "seconds" (evaluation time of each
+        network) and "maxDifference". The fan-out is planned without global scale, as ik_spine.createStretch used to build it.
+        Raises RuntimeError if the networks disagree by more than tolerance.'''
+
+    import maya.cmds as cmds
+
+    report = {"nodes": {}, "seconds": {}, "maxDifference": 0.0}
+    driver = cmds.createNode("transform", name="bench_stretch_driver", skipSelect=True)
+    created = [driver]
+    variants = {}
+    restLength = 10.0 * (numJoints - 1)
+
+    for packed in (False, True):
+        label = "packed" if packed else "fanOut"
+        stretchNodes = []
+        drivenPlugs = []
+
+        for i in range(numChains):
+            joints = createBenchChain("bench_%s_stretch%i" % (label, i), numJoints)
+            created.append(joints[0])
+
+            globalScalePlug = driver + ".scaleX" if packed else None
+            plan = rig_plans.planChainStretch("bench_%s_stretch%i_" % (label, i), driver + ".translateX", restLength, joints[1:],
+                                              [10.0] * (numJoints - 1), globalScalePlug, packed=packed)
+            build_plan.executePlan(plan, undoChunk=False)
+            created.extend(plan.createdNodes())
+            stretchNodes.extend(plan.createdNodes())
+            report["nodes"][label] = plan.summary()["nodes"]["multiplyDivide"]
+
+            drivenPlugs.extend([joint + ".translateX" for joint in joints[1:]])
+
+        variants[label] = (stretchNodes, drivenPlugs)
+
+    for length in [restLength * 0.5, restLength, restLength * 1.7]:
+        cmds.setAttr(driver + ".translateX", length)
+        for i in range(len(variants["fanOut"][1])):
+            difference = abs(cmds.getAttr(variants["fanOut"][1][i]) - cmds.getAttr(variants["packed"][1][i]))
+            report["maxDifference"] = max(report["maxDifference"], difference)
+
+    for label in variants:
+        stretchNodes, drivenPlugs = variants[label]
+        report["seconds"][label] = timeEvaluation(stretchNodes, drivenPlugs, samples)
+
+    if not keep:
+        cmds.delete([node for node in created if cmds.objExists(node)])
+
+    if report["maxDifference"] > tolerance:
+        raise RuntimeError("Packed stretch network differs from the per-joint fan-out by %f." % report["maxDifference"])
+
+    return report
+
+
+def benchmarkStretchSwitch(numLimbs=100, numJoints=3, samples=100, tolerance=1e-5, keep=False):
+    ''' Compares the per-joint and packed (R/G/B) blendColors layouts of ik_limb.stretchSwitch over a toggle/stretch sweep.
+
+        numLimbs   : int, number of limbs toggled with each layout.
+        numJoints  : int, joints toggled per limb. The IK limb toggles 2.
+        samples    : int, number of evaluations timed.
+        tolerance  : float, largest difference allowed between the layouts' toggled translateX.
+        keep       : bool, leave the benchmark nodes in the scene.
+
+        On Exit:
+        Returns dictionary with "nodes" (blendColors count per limb of each layout), "seconds" (evaluation time of each
+        layout) and "maxDifference" over every toggle and stretch value swept. Raises RuntimeError if over tolerance.'''
+
+    import maya.cmds as cmds
+
+    report = {"nodes": {}, "seconds": {}, "maxDifference": 0.0}
+    # Stand-in for the stretch network. Its translate channels are the stretched lengths being toggled.
+    driver = cmds.createNode("transform", name="bench_switch_driver", skipSelect=True)
+    created = [driver]
+    variants = {}
+
+    for packed in (False, True):
+        label = "packed" if packed else "perJoint"
+        ctrl = cmds.createNode("transform", name="bench_%s_switchCtrl" % label, skipSelect=True)
+        created.append(ctrl)
+        switchNodes = []
+        drivenPlugs = []
+        addToggle = True
+
+        for i in range(numLimbs):
+            joints = createBenchChain("bench_%s_switch%i" % (label, i), numJoints + 1)[1:]
+            created.append(cmds.listRelatives(joints[0], parent=True)[0])
+
+            stretchPlugs = [driver + ".translate" + "XYZ"[j % 3] for j in range(numJoints)]
+            plan = rig_plans.planStretchSwitch(ctrl, joints, [10.0] * numJoints, stretchPlugs, addToggle, packed)
+            build_plan.executePlan(plan, undoChunk=False)
+            addToggle = False
+            created.extend(plan.createdNodes())
+            switchNodes.extend(plan.createdNodes())
+            report["nodes"][label] = plan.summary()["nodes"]["blendColors"]
+
+            drivenPlugs.extend([joint + ".translateX" for joint in joints])
+
+        variants[label] = (ctrl, switchNodes, drivenPlugs)
+
+    for toggle in [0.0, 0.25, 0.5, 1.0]:
+        for stretchValues in [[10.0, 10.0, 10.0], [12.5, 17.0, 30.0], [random.uniform(5, 40) for axis in range(3)]]:
+            cmds.setAttr(driver + ".translate", *stretchValues)
+            for label in variants:
+                cmds.setAttr(variants[label][0] + ".ikStretchToggle", toggle)
+
+            for i in range(len(variants["perJoint"][2])):
+                difference = abs(cmds.getAttr(variants["perJoint"][2][i]) - cmds.getAttr(variants["packed"][2][i]))
+                report["maxDifference"] = max(report["maxDifference"], difference)
+
+    for label in variants:
+        ctrl, switchNodes, drivenPlugs = variants[label]
+        report["seconds"][label] = timeEvaluation(switchNodes, drivenPlugs, samples)
+
+    if not keep:
+        cmds.delete([node for node in created if cmds.objExists(node)])
+
+    if report["maxDifference"] > tolerance:
+        raise RuntimeError("Packed stretch toggle differs from the per-joint toggle by %f." % report["maxDifference"])
+
+    return report
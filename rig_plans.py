@@ -0,0 +1,773 @@
+from build_plan import BuildPlan
+from lazy_modules import optionalModule
+
+# Pure planning functions for the builders. Nothing in this file touches Maya: each planner takes plain values and
+# returns a BuildPlan (see build_plan.py) describing the scene operations, so plans can be computed, inspected and
+# cached anywhere. The builders call these, then apply the result with build_plan.executePlan().
+
+
+def planManipJnts(numIsos, bendyPerJnt, deformersPerManip, prefix):
+    ''' Plans the Manipulator Joints of a ribbon. Planning half of bendy.createManipJnts.
+
+        numIsos            : int, number of isoparms on the ribbon
+        bendyPerJnt        : int, number of Bendy joints desired per Skeleton joint
+        deformersPerManip  : int, the number of deformer joints between manipulator controls.
+        prefix             : string, the identifier prefix for the ribbon system
+
+        On Exit:
+        Returns the plan, followed by the lists createManipJnts returns: every Manipulator Joint, Control Joints only,
+        Bendy Joints only and follicle joints aligned with Control Joints.'''
+
+    plan = BuildPlan(prefix + "manipJnts")
+    manipJntList = []
+    ctrlJntList = []
+    bendyJntList = []
+    limbFixList = []
+    ctrlBendyCounter = 0
+
+    for i in range(1, numIsos+1, deformersPerManip):
+
+        # Manipulator Joint duplicated from the Deformation Joint, moved to world and rotations frozen.
+        manipJnt = prefix + "ribbon_manip_"+str(i)
+        plan.duplicate(prefix + "deformation_joint_"+str(i), manipJnt)
+        plan.parent(manipJnt)
+        plan.makeIdentity(manipJnt, apply=True, r=True)
+        manipJntList.append(manipJnt)
+
+        # OffsetGrp creation
+        plan.createNode("transform", manipJnt+"_offset")
+        plan.matchTransform(manipJnt+"_offset", manipJnt)
+
+        # Manip Joint is a Control Joint - aligns with Skeleton Joint
+        if ctrlBendyCounter == 0 or bendyPerJnt == 0:
+            plan.parent(manipJnt, manipJnt+"_offset")
+            ctrlBendyCounter += 1
+            ctrlJntList.append(manipJnt)
+            limbFixList.append(prefix + "deformation_joint_"+str(i))
+
+        # Manip Joint is a Bendy Joint
+        else:
+            plan.createNode("transform", manipJnt+"_aim")
+            plan.matchTransform(manipJnt+"_aim", manipJnt)
+            plan.parent(manipJnt+"_aim", manipJnt+"_offset")
+            plan.parent(manipJnt, manipJnt+"_aim")
+            bendyJntList.append(manipJnt)
+
+            # Iterate or reset counter.
+            if ctrlBendyCounter == bendyPerJnt:
+                ctrlBendyCounter = 0
+            else:
+                ctrlBendyCounter += 1
+
+    return plan, manipJntList, ctrlJntList, bendyJntList, limbFixList
+
+
+# Attributes setupAttrs adds to the foot control, in order. (longName, addAttr flags)
+FOOT_ATTRS = [("Multiplier",      {"attributeType": "float", "keyable": True, "defaultValue": 3, "niceName": " Multiplier"}),
+              ("ROLL",            {"attributeType": "enum", "enumName": "---", "keyable": True}),
+              ("Roll",            {"attributeType": "float", "keyable": True}),
+              ("BreakLimit",      {"attributeType": "float", "keyable": True, "defaultValue": 30}),
+              ("StraightenLimit", {"attributeType": "float", "keyable": True, "defaultValue": 50}),
+              ("FOOT",            {"attributeType": "enum", "enumName": "---", "keyable": True}),
+              ("H_FootSwivel",    {"attributeType": "float", "keyable": True, "niceName": "Heel Foot Swivel"}),
+              ("B_FootSwivel",    {"attributeType": "float", "keyable": True, "niceName": "Ball Foot Swivel"}),
+              ("T_FootSwivel",    {"attributeType": "float", "keyable": True, "niceName": "Toe Foot Swivel"}),
+              ("H_FootLift",      {"attributeType": "float", "keyable": True, "niceName": "Heel Foot Lift"}),
+              ("T_FootLift",      {"attributeType": "float", "keyable": True, "niceName": "Toe Foot Lift"}),
+              ("SideSide",        {"attributeType": "float", "keyable": True, "niceName": "Side to Side"}),
+              ("HEEL",            {"attributeType": "enum", "enumName": "---", "keyable": True}),
+              ("H_Lift",          {"attributeType": "float", "keyable": True, "niceName": "Lift"}),
+              ("H_Swivel",        {"attributeType": "float", "keyable": True, "niceName": "Swivel"}),
+              ("H_Lean",          {"attributeType": "float", "keyable": True, "niceName": "Lean"}),
+              ("TOE",             {"attributeType": "enum", "enumName": "---", "keyable": True}),
+              ("T_Lift",          {"attributeType": "float", "keyable": True, "niceName": "Lift"}),
+              ("T_Swivel",        {"attributeType": "float", "keyable": True, "niceName": "Swivel"}),
+              ("T_Lean",          {"attributeType": "float", "keyable": True, "niceName": "Lean"})]
+
+# Sliders scaled by the Multiplier attribute, in order.
+FOOT_SLIDERS = ["H_FootSwivel", "B_FootSwivel", "T_FootSwivel", "H_FootLift", "T_FootLift",
+                "H_Lift", "H_Swivel", "H_Lean",
+                "T_Lift", "T_Swivel", "T_Lean"]
+
+
+def footSliderTargets(heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc):
+    ''' On Exit: Returns list of the destination plug of each slider in FOOT_SLIDERS.'''
+
+    destinations = [heelAttrLoc, ballPivotLoc, toeAttrLoc, heelAttrLoc, toeAttrLoc,
+                    ballAttrLoc, ballAttrLoc, ballAttrLoc,
+                    toeWiggleLoc, toeWiggleLoc, toeWiggleLoc]
+
+    destAttrs = ["rotateY", "rotateY", "rotateY", "rotateX", "rotateX",
+                 "rotateX", "rotateY", "rotateZ",
+                 "rotateX", "rotateY", "rotateZ"]
+
+    return [destinations[i] + "." + destAttrs[i] for i in range(len(FOOT_SLIDERS))]
+
+
+def footScaleNodes(footCtrl, packed=False):
+    ''' On Exit: Returns list of (multiplyDivide node, channel) scaling each slider in FOOT_SLIDERS.
+        Unpacked, every slider has its own "_Scale" node using the X channel. Packed, sliders share
+        "_FootScale" nodes three at a time, using the X, Y and Z channels.'''
+
+    if not packed:
+        return [(footCtrl + "_" + slider + "_Scale", "X") for slider in FOOT_SLIDERS]
+
+    return [(footCtrl + "_FootScale%i" % (i // 3 + 1), "XYZ"[i % 3]) for i in range(len(FOOT_SLIDERS))]
+
+
+def planFootAttrs(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, existingAttrs=(), packed=False):
+    ''' Plans the foot control sliders and their multiplier network. Planning half of ik_foot.setupAttrs.
+
+        footCtrl       : string, name of control intended to control the IK foot.
+        heelAttrLoc    : string, name of locator used for heel-positioned sliders.
+        ballAttrLoc    : string, name of locator used for ball-positioned sliders.
+        toeAttrLoc     : string, name of locator used for toe-positioned sliders.
+        toeWiggleLoc   : string, name of separate locator used for toe wiggling sliders.
+        ballPivotLoc   : string, name of locator marking the position of the ball's pivot point.
+        existingAttrs  : list, user defined attributes already on footCtrl. These are deleted to prevent duplicates.
+        packed         : bool, share each multiplyDivide between three sliders. 4 nodes per foot instead of 11.
+
+        On Exit:
+        Returns plan adding every slider to footCtrl, with multiplyDivide nodes multiplying each slider by Multiplier
+        before driving the relevant locator channel. Scale nodes of the other mode are removed, so a foot can be
+        rebuilt in either mode.'''
+
+    plan = BuildPlan(footCtrl + "_attrs")
+
+    for attr in existingAttrs:
+        plan.deleteAttr(footCtrl + "." + attr)
+
+    for longName, flags in FOOT_ATTRS:
+        plan.addAttr(footCtrl, longName, **flags)
+
+    scaleNodes = footScaleNodes(footCtrl, packed)
+    for node in uniqueNodes(footScaleNodes(footCtrl, not packed) + scaleNodes):
+        plan.delete(node, ifExists=True)
+    for node in uniqueNodes(scaleNodes):
+        plan.createNode("multiplyDivide", node)
+
+    for sourcePlug, destPlug in footAttrConnections(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, packed):
+        plan.connectAttr(sourcePlug, destPlug)
+
+    return plan
+
+
+def footAttrConnections(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, packed=False):
+    ''' On Exit: Returns list of (source plug, destination plug) of every connection in the foot multiplier network.
+        Plugs are named the way listConnections reports them, so they can be compared with the scene.'''
+
+    scaleNodes = footScaleNodes(footCtrl, packed)
+    targets = footSliderTargets(heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc)
+
+    connections = []
+    for i in range(len(FOOT_SLIDERS)):
+        scaleNode, channel = scaleNodes[i]
+        connections.append((footCtrl + "." + FOOT_SLIDERS[i], scaleNode + ".input1" + channel))
+        connections.append((footCtrl + ".Multiplier", scaleNode + ".input2" + channel))
+        connections.append((scaleNode + ".output" + channel, targets[i]))
+    return connections
+
+
+def planFootAttrsDiff(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, state, packed=False):
+    ''' Plans only the changes needed to bring an existing foot's sliders and multiplier network up to date.
+        Incremental version of planFootAttrs, for re-running setupAttrs on a foot that is already animated.
+
+        footCtrl .. ballPivotLoc  : string, as in planFootAttrs.
+        state                     : dict, what the scene holds now. Sampled by ik_foot.footAttrState:
+                                      "attrs"       - dictionary of user defined attribute on footCtrl -> attribute type.
+                                      "inputs"      - dictionary of FOOT_ATTRS slider -> source plug driving it. (e.g its animCurve)
+                                      "values"      - dictionary of FOOT_ATTRS slider -> value, for sliders with no input.
+                                      "scaleNodes"  - list of scale nodes (of either mode) that exist.
+                                      "connections" - dictionary of destination plug -> connected source plug, for every
+                                                      destination plug of footAttrConnections whose node exists.
+        packed                    : bool, as in planFootAttrs.
+
+        On Exit:
+        Returns plan adding missing sliders, creating missing scale nodes, deleting scale nodes of the other mode and
+        connecting any plug not already driven by the right source. Added attributes always go to the end of the channel box,
+        so sliders following a missing one (or one of the wrong attribute type) are deleted and re-added in FOOT_ATTRS order,
+        with their value or input (animation curve) restored. Other user defined attributes are left alone.
+        An up to date foot gives an empty plan.'''
+
+    plan = BuildPlan(footCtrl + "_attrsDiff")
+
+    # Sliders recreated here lose their outgoing connections, so those are always reconnected.
+    recreated = []
+    for longName, flags in FOOT_ATTRS:
+        plug = footCtrl + "." + longName
+        sameType = state["attrs"].get(longName) == flags["attributeType"]
+        if sameType and not recreated:
+            continue
+
+        if longName in state["attrs"]:
+            plan.deleteAttr(plug)
+        plan.addAttr(footCtrl, longName, **flags)
+        recreated.append(plug)
+
+        if sameType and longName in state["inputs"]:
+            plan.connectAttr(state["inputs"][longName], plug, force=True)
+        elif sameType and longName in state["values"]:
+            plan.setAttr(plug, state["values"][longName])
+
+    scaleNodes = uniqueNodes(footScaleNodes(footCtrl, packed))
+    for node in state["scaleNodes"]:
+        if node not in scaleNodes:
+            plan.delete(node)
+    for node in scaleNodes:
+        if node not in state["scaleNodes"]:
+            plan.createNode("multiplyDivide", node)
+
+    for sourcePlug, destPlug in footAttrConnections(footCtrl, heelAttrLoc, ballAttrLoc, toeAttrLoc, toeWiggleLoc, ballPivotLoc, packed):
+        if sourcePlug in recreated or state["connections"].get(destPlug) != sourcePlug:
+            plan.connectAttr(sourcePlug, destPlug, force=True)
+
+    return plan
+
+
+def planNetworkDiff(plan, state):
+    ''' Cuts a network plan down to what is missing from the scene, so the network can be planned again over an existing one.
+
+        plan   : BuildPlan, full plan of the network. (e.g planFootRoll)
+        state  : dict, what the scene holds now. Sampled by ik_foot.networkState:
+                   "nodes"       - list of the nodes the plan creates or deletes that exist.
+                   "connections" - list of (source plug, destination plug) of the plan that are already connected.
+
+        On Exit:
+        Returns plan creating only the missing nodes and making only the missing connections, forced so they replace
+        whatever drives the destination now. Existing nodes are kept and setAttr operations are only kept for created nodes.
+        An up to date network gives an empty plan.'''
+
+    diff = BuildPlan(plan.name + "Diff")
+    created = [node for node in plan.createdNodes() if node not in state["nodes"]]
+    connected = set([tuple(connection) for connection in state["connections"]])
+
+    for op in plan.ops:
+        kind = op["op"]
+        if kind == "createNode" and op["node"] not in created:
+            continue
+        if kind == "delete" and op["node"] not in state["nodes"]:
+            continue
+        if kind == "setAttr" and op["plug"].split(".")[0] not in created:
+            continue
+        if kind == "connectAttr":
+            if (op["sourcePlug"], op["destPlug"]) not in connected:
+                diff.connectAttr(op["sourcePlug"], op["destPlug"], force=True)
+            continue
+        diff.ops.append(op)
+
+    return diff
+
+
+def uniqueNodes(scaleNodes):
+    ''' On Exit: Returns node names of a footScaleNodes list, without repeats, in order.'''
+
+    nodes = []
+    for node, channel in scaleNodes:
+        if node not in nodes:
+            nodes.append(node)
+    return nodes
+
+
+def planFootRoll(footCtrl, leftright, heelLoc, ballLoc, toeLoc):
+    ''' Plans the node network driving the foot roll. Planning half of ik_foot.footRollNodes, see there for details.
+
+        On Exit: Returns the plan.'''
+
+    plan = BuildPlan(leftright + "footRoll")
+    plan.delete(leftright + "footik_roll_expr", ifExists=True)
+
+    # Holder values for variables we'll need a lot
+    for const, attr in (("roll_const", "Roll"), ("break_const", "BreakLimit"), ("straighten_const", "StraightenLimit")):
+        plan.createNode("floatConstant", leftright + const)
+        plan.connectAttr(footCtrl + "." + attr, leftright + const + ".inFloat")
+
+    # Roll setup
+    plan.createNode("condition", leftright + "min_roll")
+    plan.setAttr(leftright + "min_roll.operation", 5)
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "min_roll.secondTerm")
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "min_roll.colorIfFalse.colorIfFalseR")
+
+    plan.createNode("floatConstant", leftright + "roll_value")
+    plan.connectAttr(leftright + "min_roll.outColor.outColorR", leftright + "roll_value.inFloat")
+
+    # Break setup - Linstep 1
+    plan.createNode("setRange", leftright + "ball_linstep_1")
+    plan.setAttr(leftright + "ball_linstep_1.maxX", 1)
+    plan.connectAttr(leftright + "break_const.outFloat", leftright + "ball_linstep_1.oldMaxX")
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "ball_linstep_1.valueX")
+
+    # Linstep 2
+    plan.createNode("setRange", leftright + "ball_linstep_2")
+    plan.setAttr(leftright + "ball_linstep_2.maxX", 1)
+    plan.connectAttr(leftright + "break_const.outFloat", leftright + "ball_linstep_2.oldMinX")
+    plan.connectAttr(leftright + "straighten_const.outFloat", leftright + "ball_linstep_2.oldMaxX")
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "ball_linstep_2.valueX")
+
+    # One minus Linstep 2
+    plan.createNode("floatMath", leftright + "one_minus_ball_linstep_2")
+    plan.setAttr(leftright + "one_minus_ball_linstep_2.operation", 1)
+    plan.setAttr(leftright + "one_minus_ball_linstep_2.floatA", 1)
+    plan.connectAttr(leftright + "ball_linstep_2.outValueX", leftright + "one_minus_ball_linstep_2.floatB")
+
+    # Multiply linstep 1 2
+    plan.createNode("multiplyDivide", leftright + "multiply_linstep_1_2")
+    plan.connectAttr(leftright + "ball_linstep_1.outValueX", leftright + "multiply_linstep_1_2.input1X")
+    plan.connectAttr(leftright + "one_minus_ball_linstep_2.outFloat", leftright + "multiply_linstep_1_2.input2X")
+
+    # Multiply ball by roll
+    plan.createNode("multiplyDivide", leftright + "multiply_ball_by_roll")
+    plan.connectAttr(leftright + "multiply_linstep_1_2.outputX", leftright + "multiply_ball_by_roll.input1X")
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "multiply_ball_by_roll.input2X")
+
+    plan.createNode("floatConstant", leftright + "ball_value")
+    plan.connectAttr(leftright + "multiply_ball_by_roll.outputX", leftright + "ball_value.inFloat")
+
+    # Straighten Setup - Linstep 1
+    plan.createNode("setRange", leftright + "toe_linstep_1")
+    plan.setAttr(leftright + "toe_linstep_1.maxX", 1)
+    plan.connectAttr(leftright + "break_const.outFloat", leftright + "toe_linstep_1.oldMinX")
+    plan.connectAttr(leftright + "straighten_const.outFloat", leftright + "toe_linstep_1.oldMaxX")
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "toe_linstep_1.valueX")
+
+    # Multiply toe by roll
+    plan.createNode("multiplyDivide", leftright + "multiply_toe_by_roll")
+    plan.connectAttr(leftright + "toe_linstep_1.outValueX", leftright + "multiply_toe_by_roll.input1X")
+    plan.connectAttr(leftright + "roll_const.outFloat", leftright + "multiply_toe_by_roll.input2X")
+
+    plan.createNode("floatConstant", leftright + "toe_value")
+    plan.connectAttr(leftright + "multiply_toe_by_roll.outputX", leftright + "toe_value.inFloat")
+
+    plan.connectAttr(leftright + "roll_value.outFloat", heelLoc + ".rotateX")
+    plan.connectAttr(leftright + "ball_value.outFloat", ballLoc + ".rotateX")
+    plan.connectAttr(leftright + "toe_value.outFloat", toeLoc + ".rotateX")
+
+    return plan
+
+
+def planSideSide(footCtrl, leftright, outsideLoc, insideLoc):
+    ''' Plans the node network driving the side-to-side roll. Planning half of ik_foot.sideSideNodes, see there for details.
+
+        On Exit: Returns the plan.'''
+
+    plan = BuildPlan(leftright + "sideSide")
+    plan.delete(leftright + "footik_sideside_expr", ifExists=True)
+
+    # Get value from IK foot Ctrl
+    plan.createNode("floatConstant", leftright + "side_const")
+    plan.connectAttr(footCtrl + ".SideSide", leftright + "side_const.inFloat")
+
+    # Min (operation 5) and Max (operation 3) conditions, each feeding a value holder.
+    for side, operation in (("min", 5), ("max", 3)):
+        condition = leftright + side + "_side"
+        plan.createNode("condition", condition)
+        plan.setAttr(condition + ".operation", operation)
+        plan.setAttr(condition + ".colorIfFalse.colorIfFalseR", 0)
+        plan.connectAttr(leftright + "side_const.outFloat", condition + ".firstTerm")
+        plan.connectAttr(leftright + "side_const.outFloat", condition + ".colorIfTrue.colorIfTrueR")
+
+        plan.createNode("floatConstant", leftright + "side_" + side + "_value")
+        plan.connectAttr(condition + ".outColor.outColorR", leftright + "side_" + side + "_value.inFloat")
+
+        # Scaling node
+        scaleNode = leftright + "_sideside_" + side + "_scale_factor"
+        plan.createNode("multiplyDivide", scaleNode)
+        plan.connectAttr(leftright + "side_" + side + "_value.outFloat", scaleNode + ".input1X")
+        plan.connectAttr(footCtrl + ".Multiplier", scaleNode + ".input2X")
+
+    # Connect to destination.
+    plan.connectAttr(leftright + "_sideside_min_scale_factor.outputX", outsideLoc + ".rotateZ")
+    plan.connectAttr(leftright + "_sideside_max_scale_factor.outputX", insideLoc + ".rotateZ")
+
+    return plan
+
+
+def ribbonSpans(numCtrlJnts, bendyPerJnt, deformersPerManip):
+    ''' On Exit: Returns (numSpans, numIsos) of a ribbon with numCtrlJnts segments, before any isoparm creasing.'''
+
+    numSpans = (deformersPerManip + (bendyPerJnt * deformersPerManip)) * numCtrlJnts
+    return numSpans, numSpans + 1
+
+
+def calcCreaseParams(numCtrlJnts, numSpans, offset=0.01):
+    ''' On Exit: Returns sorted list of the U parameters of every isoparm bendy.creaseRibbon inserts. Each Skeleton Joint
+        isoparm (except the ends) is creased by an isoparm offset either side of it. Parameters are 0-1 along the ribbon.'''
+
+    spansPerJnt = numSpans // numCtrlJnts
+    creasePercent = float(spansPerJnt) / numSpans
+
+    params = []
+    for i in range(1, numCtrlJnts):
+        targetIso = creasePercent * i
+        params.extend([targetIso - offset, targetIso + offset])
+    return params
+
+
+def calcLimbFixWeights(numFixes, bendyPerJnt, deformersPerManip):
+    ''' Calculates the ribbon CV rows bendy.limbFix weights to each fix joint.
+
+        numFixes           : int, number of fix joint chains. (Number of Control Joints minus one)
+        bendyPerJnt        : int, number of Bendy Joints per Skeleton Joint.
+        deformersPerManip  : int, number of Deformation Joints between Manipulator Joints.
+
+        On Exit:
+        Returns list with a dictionary per fix joint chain, holding "rows" (U indices of CV rows to weight to the fix joint),
+        "weights" (target weight of each of those rows) and "moveRows" (rows whose Control Joint weight is moved to the
+        fix joint. Empty for the last chain, at the end of the ribbon). Each value is a NumPy array if NumPy is available.'''
+
+    # CV rows from the start of the ribbon to the middle of the first crease. Multiples of it find the next creases.
+    creaseCVFactor = 2 + (deformersPerManip + (bendyPerJnt * deformersPerManip))
+
+    # NumPy is optional, and only imported the first time it's needed.
+    numpy = optionalModule("numpy")
+    if numpy is not None:
+        creaseIndices = creaseCVFactor * numpy.arange(1, numFixes + 1)
+        moveRows = creaseIndices[:, None] - (2 + numpy.arange(deformersPerManip))[None, :]
+
+        fixWeights = []
+        for i in range(numFixes):
+            index = creaseIndices[i]
+            if i != numFixes - 1:
+                fixWeights.append({"rows": numpy.array([index - 1, index - 2]), "weights": numpy.array([1.0, 0.5]),
+                                   "moveRows": moveRows[i]})
+            else:
+                fixWeights.append({"rows": numpy.array([index - 1, index, index - 2]), "weights": numpy.array([1.0, 1.0, 0.5]),
+                                   "moveRows": numpy.array([], dtype=int)})
+        return fixWeights
+
+    fixWeights = []
+    for i in range(numFixes):
+        index = creaseCVFactor * (i + 1)
+        if i != numFixes - 1:
+            fixWeights.append({"rows": [index - 1, index - 2], "weights": [1.0, 0.5],
+                               "moveRows": [index - (2 + j) for j in range(deformersPerManip)]})
+        else:
+            fixWeights.append({"rows": [index - 1, index, index - 2], "weights": [1.0, 1.0, 0.5], "moveRows": []})
+    return fixWeights
+
+
+def validateLimbFixWeights(fixWeights, numCVsU):
+    ''' On Exit: Returns list of problems with calcLimbFixWeights results on a ribbon with numCVsU CV rows.
+        Rows must exist, not be weighted twice and not be moved from the Control Joint as well as fully weighted.'''
+
+    problems = []
+    weighted = set()
+    for i in range(len(fixWeights)):
+        rows = [int(row) for row in fixWeights[i]["rows"]]
+        moveRows = [int(row) for row in fixWeights[i]["moveRows"]]
+
+        for row in rows + moveRows:
+            if row < 0 or row >= numCVsU:
+                problems.append("Fix %i: CV row %i is outside the ribbon (%i rows)." % (i + 1, row, numCVsU))
+        for row in rows:
+            if row in weighted:
+                problems.append("Fix %i: CV row %i is weighted by more than one fix joint." % (i + 1, row))
+            weighted.add(row)
+        for j in range(len(rows)):
+            if rows[j] in moveRows and fixWeights[i]["weights"][j] == 1.0:
+                problems.append("Fix %i: CV row %i is fully weighted and moved." % (i + 1, rows[j]))
+
+    return problems
+
+
+STRETCH_AXES = "XYZ"
+
+
+def planChainStretch(prefix, lengthPlug, restLength, joints, restLengths, globalScalePlug=None, minLength=None, packed=True):
+    ''' Plans the stretch network shared by the spine and limb builders. Planning half of stretch.createChainStretch.
+
+        prefix           : string, user-defined prefix for created nodes.
+        lengthPlug       : string, plug giving the current world length of the chain. (e.g "curveInfo1.arcLength")
+        restLength       : float, length of the chain at rest, at a global scale of 1.
+        joints           : list, names of the joints to stretch, root excluded.
+        restLengths      : list, resting translateX of each joint in joints.
+        globalScalePlug  : string, optional global scale plug. The length is divided by it, so scaling the rig doesn't stretch the chain.
+        minLength        : float, optional length the chain stops shrinking at. (e.g restLength for a limb that only stretches)
+        packed           : bool, drive three joints from each per-joint multiplyDivide (X, Y, Z) instead of one.
+
+        On Exit:
+        Returns plan for one multiplyDivide dividing the length by global scale ("[prefix]stretch_multiDiv"), an optional clamp
+        at minLength, and multiplyDivides setting each joint's translateX to (rest translateX / restLength) * scaled length.'''
+
+    plan = BuildPlan(prefix + "stretch")
+    scaleNode = prefix + "stretch_multiDiv"
+
+    plan.createNode("multiplyDivide", scaleNode)
+    plan.setAttr(scaleNode + ".operation", 2)
+    plan.connectAttr(lengthPlug, scaleNode + ".input1X")
+    if globalScalePlug:
+        plan.connectAttr(globalScalePlug, scaleNode + ".input2X")
+    else:
+        plan.setAttr(scaleNode + ".input2X", 1.0)
+    lengthOut = scaleNode + ".outputX"
+
+    if minLength is not None:
+        clampNode = plan.createNode("clamp", prefix + "stretch_clamp")
+        plan.setAttr(clampNode + ".minR", minLength)
+        plan.setAttr(clampNode + ".maxR", 1.0e6)
+        plan.connectAttr(lengthOut, clampNode + ".inputR")
+        lengthOut = clampNode + ".outputR"
+
+    for i in range(len(joints)):
+        if packed:
+            jointNode = "%sstretch_jointMultiDiv%02d" % (prefix, (i // 3) + 1)
+            axis = STRETCH_AXES[i % 3]
+            if axis == "X":
+                plan.createNode("multiplyDivide", jointNode)
+        else:
+            jointNode = plan.createNode("multiplyDivide", joints[i] + "_stretch_multiDiv")
+            axis = "X"
+
+        plan.setAttr(jointNode + ".input1" + axis, restLengths[i] / float(restLength))
+        plan.connectAttr(lengthOut, jointNode + ".input2" + axis)
+        plan.connectAttr(jointNode + ".output" + axis, joints[i] + ".translateX", force=True)
+
+    return plan
+
+
+def planLimbStretch(prefix, startJoint, ikHandle, joints, restLengths, globalScalePlug=None, packed=True):
+    ''' Plans a native stretchy IK limb. Planning half of stretch.createLimbStretch.
+
+        prefix           : string, user-defined prefix for created nodes.
+        startJoint       : string, first joint of the IK chain.
+        ikHandle         : string, ikHandle of the chain.
+        joints           : list, joints below startJoint down to the end joint.
+        restLengths      : list, resting translateX of each joint in joints.
+        globalScalePlug  : string, optional global scale plug.
+        packed           : bool, see planChainStretch.
+
+        On Exit:
+        Returns plan measuring startJoint to ikHandle with a distanceBetween ("[prefix]stretch_distance") and stretching the
+        chain once that is longer than the chain. The chain never shrinks below its resting length.'''
+
+    plan = BuildPlan(prefix + "limbStretch")
+    restLength = sum([abs(length) for length in restLengths])
+
+    distanceNode = plan.createNode("distanceBetween", prefix + "stretch_distance")
+    plan.connectAttr(startJoint + ".worldMatrix[0]", distanceNode + ".inMatrix1")
+    plan.connectAttr(ikHandle + ".worldMatrix[0]", distanceNode + ".inMatrix2")
+
+    plan.extend(planChainStretch(prefix, distanceNode + ".distance", restLength, joints, restLengths, globalScalePlug, restLength, packed))
+    return plan
+
+
+def planLimbLock(prefix, startJoint, poleCtrl, ikHandle, joints, restLengths, stretchPlugs, globalScalePlug=None, addLock=True):
+    ''' Plans the knee/elbow lock of a native stretchy IK limb, in place of the lecturer's lock_joint.
+
+        prefix           : string, user-defined prefix for created nodes.
+        startJoint       : string, first joint of the IK chain.
+        poleCtrl         : string, knee/elbow (pole vector) control. Holds the lock attribute.
+        ikHandle         : string, ikHandle of the chain.
+        joints           : list, the two joints below startJoint. (e.g [knee, ankle])
+        restLengths      : list, resting translateX of each joint in joints.
+        stretchPlugs     : list, plug currently driving each joint's translateX.
+        globalScalePlug  : string, optional global scale plug.
+        addLock          : bool, add the kneeElbowLock attribute. False when it already exists.
+
+        On Exit:
+        Returns plan measuring startJoint to poleCtrl and poleCtrl to ikHandle, divided by global scale and given the sign of
+        each joint's rest length, and a blendColors ("[prefix]lock_blendColors", R and G) blending each joint from its stretched
+        length (color2) to the locked length (color1) with poleCtrl.kneeElbowLock. An existing lock of the same prefix is replaced.'''
+
+    plan = BuildPlan(prefix + "limbLock")
+
+    if addLock:
+        plan.addAttr(poleCtrl, "kneeElbowLock", niceName="Knee/Elbow Lock", attributeType="float", min=0, max=1, dv=0, keyable=True)
+
+    lockNodes = [prefix + "lock_upperDistance", prefix + "lock_lowerDistance", prefix + "lock_multiDiv",
+                 prefix + "lock_sign_multiDiv", prefix + "lock_blendColors"]
+    for node in lockNodes:
+        plan.delete(node, ifExists=True)
+    upperNode, lowerNode, scaleNode, signNode, colourNode = lockNodes
+
+    plan.createNode("distanceBetween", upperNode)
+    plan.connectAttr(startJoint + ".worldMatrix[0]", upperNode + ".inMatrix1")
+    plan.connectAttr(poleCtrl + ".worldMatrix[0]", upperNode + ".inMatrix2")
+
+    plan.createNode("distanceBetween", lowerNode)
+    plan.connectAttr(poleCtrl + ".worldMatrix[0]", lowerNode + ".inMatrix1")
+    plan.connectAttr(ikHandle + ".worldMatrix[0]", lowerNode + ".inMatrix2")
+
+    plan.createNode("multiplyDivide", scaleNode)
+    plan.setAttr(scaleNode + ".operation", 2)
+    plan.connectAttr(upperNode + ".distance", scaleNode + ".input1X")
+    plan.connectAttr(lowerNode + ".distance", scaleNode + ".input1Y")
+
+    # Mirrored chains point down negative X.
+    plan.createNode("multiplyDivide", signNode)
+    plan.connectAttr(scaleNode + ".output", signNode + ".input1")
+
+    plan.createNode("blendColors", colourNode)
+    plan.connectAttr(poleCtrl + ".kneeElbowLock", colourNode + ".blender")
+    plan.connectAttr(signNode + ".output", colourNode + ".color1")
+
+    for i in range(len(joints)):
+        axis = STRETCH_AXES[i]
+        if globalScalePlug:
+            plan.connectAttr(globalScalePlug, scaleNode + ".input2" + axis)
+        else:
+            plan.setAttr(scaleNode + ".input2" + axis, 1.0)
+        plan.setAttr(signNode + ".input2" + axis, -1.0 if restLengths[i] < 0 else 1.0)
+
+        channel = SWITCH_CHANNELS[i]
+        plan.connectAttr(stretchPlugs[i], colourNode + ".color2.color2" + channel, force=True)
+        plan.connectAttr(colourNode + ".output.output" + channel, joints[i] + ".translate.translateX", force=True)
+
+    return plan
+
+
+SWITCH_CHANNELS = "RGB"
+
+
+def planStretchSwitch(IKSettingCtrl, joints, restLengths, stretchPlugs, addToggle=True, packed=False):
+    ''' Plans the IK stretch toggle of a limb. Planning half of ik_limb.stretchSwitch.
+
+        IKSettingCtrl  : string, control to hold the ikStretchToggle attribute.
+        joints         : list, names of the result chain joints to toggle.
+        restLengths    : list, resting translateX of each joint.
+        stretchPlugs   : list, plug currently driving each joint's stretched translateX.
+        addToggle      : bool, add the ikStretchToggle attribute. False when it already exists.
+        packed         : bool, toggle three joints with each blendColors (R, G, B) instead of one.
+
+        On Exit:
+        Returns plan for blendColors blending each joint between its resting length (color1) and stretched length (color2)
+        with the toggle. Unpacked, each joint gets "[joint]_stretchToggle_blendColors" using R. Packed, every third joint
+        names a "[joint]_stretchTogglePacked_blendColors" shared with the next two. Nodes of either layout are replaced.'''
+
+    plan = BuildPlan(IKSettingCtrl + "_stretchSwitch")
+
+    if addToggle:
+        plan.addAttr(IKSettingCtrl, "ikStretchToggle", niceName="IK Stretch Toggle", attributeType="float", min=0, max=1, dv=0, keyable=True)
+
+    for i in range(len(joints)):
+        plan.delete(joints[i] + "_stretchToggle_blendColors", ifExists=True)
+        plan.delete(joints[i] + "_stretchTogglePacked_blendColors", ifExists=True)
+
+    for i in range(len(joints)):
+        if packed:
+            colourNode = joints[i - (i % 3)] + "_stretchTogglePacked_blendColors"
+            channel = SWITCH_CHANNELS[i % 3]
+        else:
+            colourNode = joints[i] + "_stretchToggle_blendColors"
+            channel = "R"
+
+        if channel == "R":
+            plan.createNode("blendColors", colourNode)
+            plan.connectAttr(IKSettingCtrl + ".ikStretchToggle", colourNode + ".blender", force=True)
+
+        plan.setAttr(colourNode + ".color1" + channel, restLengths[i])
+        plan.connectAttr(stretchPlugs[i], colourNode + ".color2.color2" + channel, force=True)
+        plan.connectAttr(colourNode + ".output.output" + channel, joints[i] + ".translate.translateX", force=True)
+
+    return plan
+
+
+def planOffsetGrps(nodes, parents, matrices, pivots):
+    ''' Plans offset groups above a list of nodes. Planning half of create_group.makeOffsetGrps.
+
+        nodes     : list, nodes to give offset groups.
+        parents   : list, current parent of each node, or None for the world.
+        matrices  : list, world matrix (16 floats) of each node.
+        pivots    : list, world (rotatePivot, scalePivot) of each node.
+
+        On Exit:
+        Returns plan creating "[node]_offsetGrp" under each node's parent, matching the node's world transform and pivots,
+        with the node parented beneath it. Same result as create_group.makeGrpFunc on each node.'''
+
+    plan = BuildPlan("offsetGrps")
+
+    for i in range(len(nodes)):
+        grp = plan.createNode("transform", nodes[i].split("|")[-1] + "_offsetGrp", parents[i])
+        plan.xform(grp, worldSpace=True, matrix=matrices[i])
+        plan.xform(grp, worldSpace=True, rotatePivot=pivots[i][0], scalePivot=pivots[i][1])
+        plan.parent(nodes[i], grp)
+
+    return plan
+
+
+def planMatchedNodes(names, nodeType, parents, matrices, pivots, replace=False):
+    ''' Plans new nodes placed to match existing ones. Planning half of create_group.createMatchedNodes.
+
+        names     : list, names of the nodes to create.
+        nodeType  : string, "locator" for a locator (transform and locatorShape), or any transform type. (e.g "transform")
+        parents   : list, parent of each new node, or None for the world.
+        matrices  : list, world matrix (16 floats) to give each node, or None to leave it at its parent's transform.
+        pivots    : list, world (rotatePivot, scalePivot) of each node, or None to leave pivots at the origin.
+        replace   : bool, delete existing nodes of the same names first, children included.
+
+        On Exit:
+        Returns plan creating each node beneath its parent, placed at its matrix and pivots.'''
+
+    plan = BuildPlan("matchedNodes")
+
+    for i in range(len(names)):
+        if replace:
+            plan.delete(names[i], ifExists=True)
+
+        if nodeType == "locator":
+            node = plan.createNode("transform", names[i], parents[i])
+            plan.createNode("locator", names[i].split("|")[-1] + "Shape", node)
+        else:
+            node = plan.createNode(nodeType, names[i], parents[i])
+
+        if matrices[i] is not None:
+            plan.xform(node, worldSpace=True, matrix=matrices[i])
+        if pivots[i] is not None:
+            plan.xform(node, worldSpace=True, rotatePivot=pivots[i][0], scalePivot=pivots[i][1])
+
+    return plan
+
+
+IDENTITY_MATRIX = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]
+
+
+def planFKCtrls(ctrlTemplate, ctrlNames, joints, matrices):
+    ''' Plans a chain of FK controls with offset groups, copied from a template curve.
+
+        ctrlTemplate  : string, curve every control is duplicated from. Should sit at the origin, hidden.
+        ctrlNames     : list, name of each control. Offset groups are named "[ctrl]_offsetGrp".
+        joints        : list, FK joints. Needs one more than ctrlNames; control i is placed at joints[i + 1] under joints[i],
+                        and joints[i + 1] is parented beneath it.
+        matrices      : list, world matrix (16 floats) of joints[1:], one per control.
+
+        On Exit:
+        Returns plan building joint > offset group > control > next joint down the chain. Controls are left with zeroed
+        channels, the offset groups carry the joints' transforms.'''
+
+    plan = BuildPlan("fkCtrls")
+
+    for i in range(len(ctrlNames)):
+        grp = plan.createNode("transform", ctrlNames[i] + "_offsetGrp", joints[i])
+        ctrl = plan.duplicate(ctrlTemplate, ctrlNames[i])
+
+        # Control joins its group while both are at the origin, so the group carries it into place.
+        plan.parent(ctrl, grp)
+        plan.xform(ctrl, objectSpace=True, matrix=IDENTITY_MATRIX)
+        plan.xform(grp, worldSpace=True, matrix=matrices[i])
+        plan.parent(joints[i + 1], ctrl)
+        plan.setAttr(ctrl + ".visibility", 1)
+
+    return plan
+
+
+def planColourOverrides(shapes, index=None, rgb=None):
+    ''' Plans drawing override colours for control shapes. Planning half of nurbCtrls.setControlColours.
+
+        shapes  : list, curve shapes to colour.
+        index   : int, override colour index (0-31). Used when rgb is None.
+        rgb     : list, [r, g, b] override colour, 0-1.
+
+        On Exit:
+        Returns plan enabling each shape's drawing override and setting its colour mode and colour.'''
+
+    plan = BuildPlan("colourOverrides")
+
+    for shape in shapes:
+        plan.setAttr(shape + ".overrideEnabled", 1)
+        if rgb is None:
+            plan.setAttr(shape + ".overrideRGBColors", 0)
+            plan.setAttr(shape + ".overrideColor", index)
+        else:
+            plan.setAttr(shape + ".overrideRGBColors", 1)
+            plan.setAttr(shape + ".overrideColorRGB", list(rgb))
+
+    return plan
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import time
+
+# Declarative rig description with incremental rebuild.
+#
+# A rig spec is a dictionary (or a JSON file of one) listing the components of a character:
+#     spec = {"ribbons": [{"name": "l_arm_ribbon", "prefix": "l_arm_", "sJnt": "l_shoulder", "eJnt": "l_wrist", "ctrlSize": 2.0}],
+#             "spines":  [{"name": "spine", "spine_root_joint": "hip_jnt", "spine_end_joint": "chest_jnt",
+#                          "spine_root_ctrl": "hip_ctrl", "spine_end_ctrl": "chest_ctrl"}],
+#             "limbs":   [...],
+#             "feet":    [{"name": "l_foot", "dependsOn": ["l_leg"], ...}]}
+#
+# buildRig(spec) hashes every component's settings and stores the hash on an objectSet holding the nodes the
+# component created. Running buildRig again only tears down and rebuilds the components whose hash changed
+# (or whose dependencies were rebuilt); everything else in the scene is left untouched. Anything the user parented
+# under a rebuilt component's nodes is parented back under the rebuilt nodes of the same name.
+#
+# NOTE: The foot builder renames its 5 input locators. Specify them by their renamed "[prefix]heel_attr_loc" style
+# names, otherwise a rebuild will not be able to find them.
+
+# Argument order and default values of each component's builder. Keys are the names used in the spec.
+COMPONENT_ARGS = {
+    "ribbons": [("prefix", None), ("sJnt", None), ("eJnt", None), ("bendyPerJnt", 1), ("deformersPerManip", 2),
+                ("ctrlSize", 1.0), ("twistOn", True), ("sineOn", True), ("limbMode", True), ("isoCrease", True),
+                ("deformerMode", "blendShape")],
+
+    "spines":  [("spine_root_joint", None), ("spine_end_joint", None), ("spine_root_ctrl", None), ("spine_end_ctrl", None),
+                ("stretch_enabled", True), ("fk_enabled", True), ("fk_limit", False), ("fk_ctrls_num", 2), ("prefix", "ik_spine_"),
+                ("fk_on_curve", False), ("global_scale", "")],
+
+    "limbs":   [("startJoint", None), ("endJoint", None), ("kneeElbowCtrl", None), ("globalScale", None),
+                ("ikHandleName", None), ("limbSettingsCtrl", None), ("resultJoint", None),
+                ("nativeStretch", False), ("packedSwitch", False)],
+
+    "feet":    [("ankleJoint", None), ("ballJoint", None), ("toeJoint", None), ("heelLoc", None), ("ballLoc", None),
+                ("toeLoc", None), ("insideLoc", None), ("outsideLoc", None), ("footCtrl", None), ("legIKLoc", ""),
+                ("kneeCtrl", ""), ("leftrightPrefix", ""), ("ikHandleCheckbox", False), ("kneeCheckbox", False),
+                ("packedScale", False), ("incrementalAttrs", False)]}
+
+# Order components are built in, so feet can rely on limbs etc. dependsOn moves a component after its dependencies.
+COMPONENT_ORDER = ["spines", "limbs", "ribbons", "feet"]
+
+SET_SUFFIX = "_rigSpec_set"
+
+
+def loadSpec(path):
+    ''' Reads a rig spec from a JSON file.
+
+        path  : string, path to the JSON file.
+
+        On Exit: Returns the spec dictionary.'''
+
+    with open(path, "r") as specFile:
+        return json.load(specFile)
+
+
+def resolveComponents(spec):
+    ''' Validates a spec and fills in default values.
+
+        spec  : dict, rig spec. See top of file.
+
+        On Exit:
+        Returns a list of (componentType, name, settings) in build order: COMPONENT_ORDER, with any component moved after
+        the components it dependsOn. settings holds every builder argument, plus "dependsOn". Raises ValueError for unknown
+        component types, missing arguments, duplicate names or circular dependencies.'''
+
+    components = []
+    names = set()
+
+    for componentType in spec:
+        if componentType not in COMPONENT_ARGS:
+            raise ValueError("Unknown rig spec component type '%s'. Expected one of: %s" % (componentType, ", ".join(COMPONENT_ORDER)))
+
+    for componentType in COMPONENT_ORDER:
+        for entry in spec.get(componentType, []):
+            name = entry.get("name")
+            if not name:
+                raise ValueError("Every %s entry in the rig spec needs a 'name'." % componentType)
+            if name in names:
+                raise ValueError("Rig spec component name '%s' is used more than once." % name)
+            names.add(name)
+
+            settings = {"dependsOn": sorted(entry.get("dependsOn", []))}
+            for argName, default in COMPONENT_ARGS[componentType]:
+                value = entry.get(argName, default)
+                if value is None:
+                    raise ValueError("Rig spec component '%s' is missing '%s'." % (name, argName))
+                settings[argName] = value
+
+            unknown = set(entry) - set(settings) - set(["name"])
+            if unknown:
+                raise ValueError("Rig spec component '%s' has unknown settings: %s" % (name, ", ".join(sorted(unknown))))
+
+            components.append((componentType, name, settings))
+
+    for componentType, name, settings in components:
+        for dependency in settings["dependsOn"]:
+            if dependency not in names:
+                raise ValueError("Rig spec component '%s' depends on unknown component '%s'." % (name, dependency))
+
+    # Take the first component whose dependencies are all placed, so the order only changes where dependsOn requires it.
+    ordered = []
+    placed = set()
+    while components:
+        for i in range(len(components)):
+            if set(components[i][2]["dependsOn"]) <= placed:
+                break
+        else:
+            raise ValueError("Rig spec has circular dependencies between: %s"
+                             % ", ".join([name for componentType, name, settings in components]))
+        ordered.append(components.pop(i))
+        placed.add(ordered[-1][1])
+
+    return ordered
+
+
+def componentHash(componentType, settings):
+    ''' On Exit: Returns a hex digest identifying a component's type and settings. Key order does not matter.'''
+
+    data = json.dumps([componentType, settings], sort_keys=True)
+    return hashlib.md5(data.encode("utf-8")).hexdigest()
+
+
+def buildRig(spec, force=False, prune=False):
+    ''' Builds or incrementally rebuilds every component of a rig spec.
+
+        spec   : dict or string, rig spec or path to a JSON rig spec.
+        force  : bool, rebuild every component even if its settings have not changed.
+        prune  : bool, also remove components found in the scene that are no longer in the spec.
+
+        On Exit:
+        Components whose settings changed (or whose dependencies were rebuilt) are torn down and rebuilt, in one undo chunk.
+        Returns a report dictionary with lists of "built", "skipped" and "removed" component names, "timings"
+        holding (name, seconds) for every component built and "orphaned", nodes parented under a torn down component
+        that had no rebuilt node to go back under and were left in the world.'''
+
+    import maya.cmds as cmds
+
+    if not isinstance(spec, dict):
+        spec = loadSpec(spec)
+    components = resolveComponents(spec)
+
+    report = {"built": [], "skipped": [], "removed": [], "timings": [], "orphaned": []}
+
+    cmds.undoInfo(openChunk=True, chunkName="buildRig")
+    try:
+        if prune:
+            specNames = set([name for componentType, name, settings in components])
+            for recordSet in cmds.ls("*" + SET_SUFFIX, type="objectSet") or []:
+                name = recordSet[:-len(SET_SUFFIX)]
+                if name not in specNames:
+                    rescued = teardownComponent(name)
+                    report["orphaned"].extend(cmds.ls([uuid for uuid, parent in rescued], long=True) or [])
+                    report["removed"].append(name)
+
+        for componentType, name, settings in components:
+            newHash = componentHash(componentType, settings)
+            dependencyRebuilt = [dep for dep in settings["dependsOn"] if dep in report["built"]]
+
+            if not force and not dependencyRebuilt and storedHash(name) == newHash:
+                report["skipped"].append(name)
+                continue
+
+            startTime = time.time()
+            rescued = teardownComponent(name)
+            createdNodes = trackCreatedNodes(buildComponent, componentType, settings)
+            recordComponent(name, componentType, newHash, createdNodes)
+            report["orphaned"].extend(reparentRescued(rescued))
+
+            report["built"].append(name)
+            report["timings"].append((name, time.time() - startTime))
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+    return report
+
+
+def buildComponent(componentType, settings):
+    ''' Calls the builder for a single component. Builder modules are imported on first use.'''
+
+    args = [settings[argName] for argName, default in COMPONENT_ARGS[componentType]]
+
+    if componentType == "ribbons":
+        import bendy
+        bendy.bendyMain(*args)
+    elif componentType == "spines":
+        import ik_spine
+        ik_spine.buildSpine(*args)
+    elif componentType == "limbs":
+        import ik_limb
+        ik_limb.buildLimb(*args)
+    else:
+        import ik_foot
+        ik_foot.buildIKFoot(*args)
+
+
+def trackCreatedNodes(func, *args):
+    ''' Calls func and returns the UUIDs of every node that exists afterwards but did not before.
+        UUIDs are used so nodes renamed or reparented by the builder are not mistaken for new ones.'''
+
+    import maya.cmds as cmds
+
+    before = set(cmds.ls(uuid=True) or [])
+    func(*args)
+    after = cmds.ls(uuid=True) or []
+    return [uuid for uuid in after if uuid not in before]
+
+
+def storedHash(name):
+    ''' On Exit: Returns the settings hash recorded for a built component, or None if it has not been built.'''
+
+    import maya.cmds as cmds
+
+    recordSet = name + SET_SUFFIX
+    if not cmds.objExists(recordSet) or not cmds.attributeQuery("rigSpecHash", node=recordSet, exists=True):
+        return None
+    return cmds.getAttr(recordSet + ".rigSpecHash")
+
+
+def recordComponent(name, componentType, specHash, createdUUIDs):
+    ''' Stores the created nodes of a component in an objectSet, tagged with the component type and settings hash.'''
+
+    import maya.cmds as cmds
+
+    createdNodes = cmds.ls(createdUUIDs) or []
+
+    # Created empty and filled after; cmds.sets with no items would otherwise use the current selection.
+    recordSet = cmds.sets(name=name + SET_SUFFIX, empty=True)
+    if createdNodes:
+        cmds.sets(createdNodes, add=recordSet)
+
+    cmds.addAttr(recordSet, longName="rigSpecType", dataType="string")
+    cmds.addAttr(recordSet, longName="rigSpecHash", dataType="string")
+    cmds.setAttr(recordSet + ".rigSpecType", componentType, type="string")
+    cmds.setAttr(recordSet + ".rigSpecHash", specHash, type="string")
+
+
+def teardownComponent(name):
+    ''' Deletes every node a component created, and its record set.
+
+        name  : string, name of the component in the rig spec.
+
+        On Exit:
+        Nodes created by the component are deleted. Nodes that were not created by it (user controls, locators) but
+        were parented beneath its nodes are moved to the world first so they survive. Returns list of (UUID, parent path)
+        of those nodes, for reparentRescued.'''
+
+    import maya.cmds as cmds
+
+    recordSet = name + SET_SUFFIX
+    if not cmds.objExists(recordSet):
+        return []
+
+    members = cmds.ls(cmds.sets(recordSet, q=True) or [], long=True) or []
+    memberSet = set(members)
+
+    # Rescue children that belong to the user or another component.
+    rescued = []
+    for node in cmds.ls(members, type="transform", long=True) or []:
+        for child in cmds.listRelatives(node, children=True, type="transform", fullPath=True) or []:
+            if child not in memberSet:
+                rescued.append((cmds.ls(child, uuid=True)[0], node))
+                cmds.parent(child, world=True)
+
+    # Members may already be gone by the time they're reached (shapes, effectors, children of deleted nodes).
+    for node in members:
+        if cmds.objExists(node):
+            cmds.delete(node)
+
+    if cmds.objExists(recordSet):
+        cmds.delete(recordSet)
+
+    return rescued
+
+
+def reparentRescued(rescued):
+    ''' Parents nodes rescued by teardownComponent back under the rebuilt nodes of their old parents' names.
+
+        rescued  : list, (UUID, parent path) pairs returned by teardownComponent.
+
+        On Exit:
+        Each node is parented back under its old parent's path, or under the only node with its short name if the path
+        changed. Returns list of the nodes left in the world because neither was found.'''
+
+    import maya.cmds as cmds
+
+    orphaned = []
+    for uuid, parent in rescued:
+        child = cmds.ls(uuid, long=True)
+        if not child:
+            continue
+
+        if not cmds.objExists(parent):
+            matches = cmds.ls(parent.split("|")[-1], long=True) or []
+            if len(matches) != 1:
+                orphaned.append(child[0])
+                continue
+            parent = matches[0]
+
+        # The rebuilt builder may have parented it back already. (e.g a control under its new offsetGrp)
+        if (cmds.listRelatives(child[0], p=True, f=True) or [None])[0] != parent:
+            cmds.parent(child[0], parent)
+
+    return orphaned
@@ -0,0 +1,122 @@
+import mmap
+import os
+import struct
+
+# Compact binary library of control shapes, so every shape can be loaded with one file read instead of importing a
+# .ma file per shape. Pure Python, no Maya needed; nurbCtrls.py exports to and creates controls from it.
+#
+# Shapes are held as {shape name: [curve data, ...]}, curve data being the dictionaries of nurbCtrls.readCurveData:
+#     {"degree": 3, "periodic": True, "cvs": [[x, y, z], ...], "knots": [...]}
+#
+# File layout, little-endian:
+#     header    "RMSL", version (uint16), shape count (uint32)
+#     index     per shape: name length (uint16), name (utf-8), data offset (uint32), curve count (uint16)
+#     data      per curve: degree (uint8), periodic (uint8), CV count (uint32), knot count (uint32),
+#               CVs (3 float64 each), knots (float64 each)
+
+MAGIC = b"RMSL"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHI")
+INDEX_ENTRY = struct.Struct("<IH")          # Follows the name of each index entry.
+CURVE_HEADER = struct.Struct("<BBII")
+
+
+def packLibrary(shapes):
+    ''' On Exit: Returns the library file contents (bytes) holding every shape of a {name: [curve data]} dictionary.'''
+
+    names = sorted(shapes)
+    encodedNames = [name.encode("utf-8") for name in names]
+
+    # Data offsets are only known once the size of the index is.
+    offset = HEADER.size + sum([2 + len(encoded) + INDEX_ENTRY.size for encoded in encodedNames])
+
+    index = []
+    data = []
+    for i in range(len(names)):
+        curves = shapes[names[i]]
+        index.append(struct.pack("<H", len(encodedNames[i])) + encodedNames[i] + INDEX_ENTRY.pack(offset, len(curves)))
+
+        for curve in curves:
+            cvs = [value for cv in curve["cvs"] for value in cv]
+            block = CURVE_HEADER.pack(curve["degree"], int(curve["periodic"]), len(curve["cvs"]), len(curve["knots"]))
+            block += struct.pack("<%id" % len(cvs), *cvs) + struct.pack("<%id" % len(curve["knots"]), *curve["knots"])
+            data.append(block)
+            offset += len(block)
+
+    return HEADER.pack(MAGIC, VERSION, len(names)) + b"".join(index) + b"".join(data)
+
+
+def unpackLibrary(buffer):
+    ''' Reads every shape out of a library buffer.
+
+        buffer  : bytes or mmap, library file contents.
+
+        On Exit: Returns {shape name: [curve data]}. Raises ValueError if buffer isn't a shape library of a known version,
+                 or is truncated or corrupt.'''
+
+    try:
+        return readShapes(buffer)
+    except struct.error:
+        raise ValueError("Shape library is truncated or corrupt.")
+
+
+def readShapes(buffer):
+    ''' Does the reading for unpackLibrary. struct.error is raised if the buffer ends early.'''
+
+    if len(buffer) < HEADER.size:
+        raise ValueError("Shape library is too short to hold a header.")
+    magic, version, shapeCount = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a shape library.")
+    if version != VERSION:
+        raise ValueError("Shape library version %i is not supported. Expected %i." % (version, VERSION))
+
+    shapes = {}
+    position = HEADER.size
+    for i in range(shapeCount):
+        nameLength = struct.unpack_from("<H", buffer, position)[0]
+        name = bytes(buffer[position + 2:position + 2 + nameLength]).decode("utf-8")
+        position += 2 + nameLength
+        offset, curveCount = INDEX_ENTRY.unpack_from(buffer, position)
+        position += INDEX_ENTRY.size
+
+        curves = []
+        for j in range(curveCount):
+            degree, periodic, cvCount, knotCount = CURVE_HEADER.unpack_from(buffer, offset)
+            offset += CURVE_HEADER.size
+            cvs = struct.unpack_from("<%id" % (cvCount * 3), buffer, offset)
+            offset += 8 * cvCount * 3
+            knots = struct.unpack_from("<%id" % knotCount, buffer, offset)
+            offset += 8 * knotCount
+
+            curves.append({"degree": degree, "periodic": bool(periodic),
+                           "cvs": [list(cvs[k:k + 3]) for k in range(0, len(cvs), 3)], "knots": list(knots)})
+        shapes[name] = curves
+
+    return shapes
+
+
+def writeLibrary(path, shapes):
+    ''' Writes a {name: [curve data]} dictionary to a library file, replacing it if it exists.'''
+
+    tempPath = "%s.%i.tmp" % (path, os.getpid())
+    with open(tempPath, "wb") as libraryFile:
+        libraryFile.write(packLibrary(shapes))
+
+    # Written to a temporary file first so a session loading the library never reads a partial one.
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(tempPath, path)
+
+
+def readLibrary(path):
+    ''' On Exit: Returns {shape name: [curve data]} of a library file, read through a single memory map of it.
+                 Raises ValueError if the file is empty, truncated or not a shape library.'''
+
+    with open(path, "rb") as libraryFile:
+        buffer = mmap.mmap(libraryFile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return unpackLibrary(buffer)
+        finally:
+            buffer.close()
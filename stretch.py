@@ -0,0 +1,86 @@
+from lazy_modules import cmds
+import build_plan
+import rig_plans
+
+# Stretch networks shared by the spine and limb builders. The networks are planned in rig_plans.py (planChainStretch):
+# a single multiplyDivide divides the chain's measured length by global scale, so scaling the rig doesn't stretch the
+# chain, and each joint's translateX is that length times its share of the resting chain. With packed=True every
+# per-joint multiplyDivide drives three joints, one per channel.
+
+
+def chainJoints(startJoint, endJoint):
+    ''' On Exit: Returns list of the joints below startJoint down to endJoint, startJoint excluded. Nothing is selected.'''
+
+    joints = [endJoint]
+    while True:
+        parent = cmds.listRelatives(joints[0], parent=True, type="joint", fullPath=False)
+        if not parent:
+            raise RuntimeError("%s is not below %s." % (endJoint, startJoint))
+        if parent[0] == startJoint.split("|")[-1]:
+            return joints
+        joints.insert(0, parent[0])
+
+
+def removeChainStretch(prefix):
+    ''' Deletes a stretch network previously made with the same prefix, if there is one.'''
+
+    scaleNode = prefix + "stretch_multiDiv"
+    clampNode = prefix + "stretch_clamp"
+    distanceNode = prefix + "stretch_distance"
+
+    nodes = []
+    for node in [scaleNode, clampNode]:
+        if cmds.objExists(node):
+            nodes.append(node)
+            nodes.extend(cmds.listConnections(node, source=False, destination=True, type="multiplyDivide") or [])
+    if cmds.objExists(distanceNode):
+        nodes.append(distanceNode)
+
+    if nodes:
+        cmds.delete(list(set(nodes)))
+
+
+def createChainStretch(prefix, lengthPlug, restLength, joints, globalScalePlug=None, minLength=None, packed=True, restLengths=None):
+    ''' Builds a stretch network for a chain of joints.
+
+        prefix           : string, user-defined prefix for created nodes. Replaces an existing network of the same prefix.
+        lengthPlug       : string, plug giving the current world length of the chain. (e.g "curveInfo1.arcLength")
+        restLength       : float, length of the chain at rest, at a global scale of 1.
+        joints           : list, joints to stretch, root excluded.
+        globalScalePlug  : string, optional global scale plug.
+        minLength        : float, optional length the chain stops shrinking at.
+        packed           : bool, three joints per multiplyDivide instead of one.
+        restLengths      : list, resting translateX of each joint, if already known. Read from the joints if None.
+
+        On Exit: Returns the applied BuildPlan, for its summary().'''
+
+    if restLengths is None:
+        restLengths = [cmds.getAttr("%s.translateX" % joint) for joint in joints]
+
+    removeChainStretch(prefix)
+    plan = rig_plans.planChainStretch(prefix, lengthPlug, restLength, joints, restLengths, globalScalePlug, minLength, packed)
+    build_plan.executePlan(plan)
+    return plan
+
+
+def createLimbStretch(prefix, startJoint, endJoint, ikHandle, globalScalePlug=None, packed=True):
+    ''' Builds a native stretchy IK limb, in place of the lecturer's stretchy_ik.
+
+        prefix           : string, user-defined prefix for created nodes.
+        startJoint       : string, first joint of the IK chain.
+        endJoint         : string, last joint of the IK chain.
+        ikHandle         : string, ikHandle of the chain.
+        globalScalePlug  : string, optional global scale plug. (e.g "global_ctrl.globalScale")
+        packed           : bool, three joints per multiplyDivide instead of one.
+
+        On Exit:
+        The chain stretches along X once the ikHandle is further from startJoint than the chain's length.
+        Returns the applied BuildPlan.'''
+
+    joints = chainJoints(startJoint, endJoint)
+    restLengths = [cmds.getAttr("%s.translateX" % joint) for joint in joints]
+
+    removeChainStretch(prefix)
+    plan = rig_plans.planLimbStretch(prefix, startJoint, ikHandle, joints, restLengths, globalScalePlug, packed)
+    build_plan.executePlan(plan)
+    return plan